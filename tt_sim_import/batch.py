@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Headless batch conversion of supplier workbooks to Techtool export files.
+Each input file is converted by its own worker in a process pool.
+"""
+
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from import_utils import read_sim_file
+from parse_cache import normalise_sim_frame
+from export_utils import write_export_chunks
+from export_stream import compressed_path
+from excel_stream import SimStreamReader, DEFAULT_CHUNK_SIZE
+from validation import validate_sims, ChunkValidator
+from multi_sheet import WorkbookSheets
+from inventory import record_import, record_chunks
+import metrics
+
+# File extensions picked up when a directory is given as input
+SUPPORTED_EXTENSIONS = (".xlsx", ".xls")
+
+# Name of the summary file written to the output directory
+SUMMARY_FILENAME = "conversion_summary.json"
+
+def is_input_file(name):
+    """Return True for the file names of supplier workbooks, skipping Excel lock files such as "~$deliveries.xlsx"."""
+    return not name.startswith("~$") and name.lower().endswith(SUPPORTED_EXTENSIONS)
+
+def collect_input_files(input_path):
+    """Collect the supplier workbooks to convert.
+    
+    Args:
+        input_path (str): A single workbook or a directory containing workbooks
+        
+    Returns:
+        list: Sorted list of workbook paths
+        
+    Raises:
+        FileNotFoundError: If the input path does not exist
+    """
+    if os.path.isfile(input_path):
+        return [input_path]
+    if not os.path.isdir(input_path):
+        raise FileNotFoundError(f"Input path not found: {input_path}")
+    
+    return [os.path.join(input_path, name) for name in sorted(os.listdir(input_path)) if is_input_file(name)]
+
+def output_path_for(input_file, output_dir, output_format="csv"):
+    """Return the output path of the converted file for an input workbook."""
+    stem = os.path.splitext(os.path.basename(input_file))[0]
+    return os.path.join(output_dir, f"{stem}_techtool.{output_format}")
+
+def convert_file(input_file, output_dir, provider=None, output_format="csv", stream=False,
+                 chunk_size=DEFAULT_CHUNK_SIZE, all_sheets=False, sheet_workers=None, compression=None):
+    """Convert a single supplier workbook to a Techtool file.
+    
+    This is the unit of work for the process pool, so it never raises and
+    always returns a plain dictionary that can be pickled back to the parent.
+    The converted SIMs are recorded in the SIM inventory when it is enabled
+    (see inventory.py), chunk by chunk when streaming.
+    
+    Args:
+        input_file (str): Path of the supplier workbook
+        output_dir (str): Directory to write the converted file to
+        provider (str, optional): The provider name. Inferred if not given.
+        output_format (str, optional): 'csv', 'ndjson', 'parquet' or 'arrow'. Defaults to 'csv'.
+        stream (bool, optional): Read and write in bounded-memory chunks. Defaults to False.
+        chunk_size (int, optional): Rows per chunk when streaming
+        all_sheets (bool, optional): Convert every sheet with SIM columns instead of the first sheet
+        sheet_workers (int, optional): Process pool size for parsing the sheets. Defaults to the CPU count.
+        compression (str, optional): Compress the output with "gzip" or "zstd"
+        
+    Returns:
+        dict: Result with file, provider, rows, invalid_cell_numbers, flagged_rows, validation,
+              sheets (names of the converted sheets with all_sheets), output, error, metrics (stage
+              timings, see metrics.py, None while disabled) and seconds keys
+    """
+    start = time.perf_counter()
+    result = {
+        "file": input_file,
+        "provider": provider,
+        "rows": 0,
+        "invalid_cell_numbers": 0,
+        "flagged_rows": 0,
+        "validation": None,
+        "sheets": None,
+        "output": None,
+        "error": None,
+        "metrics": None,
+        "seconds": 0.0
+    }
+    
+    with metrics.collect() as collected:
+        try:
+            output_file = compressed_path(output_path_for(input_file, output_dir, output_format), compression)
+            stats = {}
+            
+            def write(chunks):
+                return write_export_chunks(chunks, output_file, stats=stats, output_format=output_format,
+                                           compression=compression)
+            
+            def write_recorded(chunks, validator, chunk_provider):
+                # Validate each chunk and record it in the inventory as it streams to the output
+                recorder = record_chunks(chunk_provider, input_file)
+                
+                def validated():
+                    for chunk in chunks:
+                        flags = validator.validate(chunk)
+                        if recorder is not None:
+                            recorder.add(chunk, flags)
+                        yield chunk
+                
+                try:
+                    return write(validated())
+                finally:
+                    if recorder is not None:
+                        recorder.close()
+            
+            if all_sheets:
+                sheets = WorkbookSheets(input_file, provider)
+                result["provider"] = sheets.provider
+                result["sheets"] = list(sheets.layouts)
+                if stream:
+                    validator = ChunkValidator(provider=sheets.provider)
+                    result["rows"] = write_recorded(sheets.iter_chunks(chunk_size), validator, sheets.provider)
+                    result["validation"] = validator.summary()
+                else:
+                    sim_df = sheets.read(sheet_workers, chunk_size)
+                    flags, result["validation"] = validate_sims(sim_df, provider=sheets.provider)
+                    result["rows"] = write([sim_df])
+                    record_import(sheets.provider, input_file, sim_df, flags)
+            elif stream:
+                with SimStreamReader(input_file, provider, chunk_size) as reader:
+                    result["provider"] = reader.provider
+                    validator = ChunkValidator(provider=reader.provider)
+                    result["rows"] = write_recorded(reader, validator, reader.provider)
+                result["validation"] = validator.summary()
+            else:
+                result["provider"], sim_df = read_sim_file(input_file, provider)
+                # Stripped and canonicalised like the streamed and GUI imports, so all paths write the same data
+                sim_df = normalise_sim_frame(sim_df, result["provider"])
+                flags, result["validation"] = validate_sims(sim_df, provider=result["provider"])
+                result["rows"] = write([sim_df])
+                record_import(result["provider"], input_file, sim_df, flags)
+            result["invalid_cell_numbers"] = stats.get("invalid_cell_numbers", 0)
+            result["flagged_rows"] = result["validation"]["flagged_rows"]
+            result["output"] = output_file
+        except Exception as e:
+            result["error"] = str(e)
+    result["metrics"] = collected.report() if collected is not None else None
+        
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+def run_batch(input_files, output_dir, provider=None, output_format="csv", max_workers=None, progress=None,
+              stream=False, chunk_size=DEFAULT_CHUNK_SIZE, all_sheets=False, compression=None):
+    """Convert several supplier workbooks in parallel.
+    
+    Args:
+        input_files (list): Paths of the supplier workbooks
+        output_dir (str): Directory to write the converted files to
+        provider (str, optional): The provider name. Inferred per file if not given.
+        output_format (str, optional): 'csv', 'ndjson', 'parquet' or 'arrow'. Defaults to 'csv'.
+        max_workers (int, optional): Size of the process pool. Defaults to the CPU count.
+        progress (callable, optional): Called with each result as it completes
+        stream (bool, optional): Read and write in bounded-memory chunks. Defaults to False.
+        chunk_size (int, optional): Rows per chunk when streaming
+        all_sheets (bool, optional): Convert every sheet with SIM columns instead of the first sheet
+        compression (str, optional): Compress the outputs with "gzip" or "zstd"
+        
+    Returns:
+        list: One result dictionary per input file, in input order
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if not input_files:
+        return []
+    
+    max_workers = min(max_workers or os.cpu_count() or 1, len(input_files))
+    results = {}
+    
+    # Files are already converted in parallel, only a single file spreads its sheets over the CPUs
+    sheet_workers = None if len(input_files) == 1 else 1
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(convert_file, input_file, output_dir, provider, output_format,
+                            stream, chunk_size, all_sheets, sheet_workers, compression): input_file
+            for input_file in input_files
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            metrics.merge(result["metrics"])
+            results[futures[future]] = result
+            if progress:
+                progress(result)
+                
+    return [results[input_file] for input_file in input_files]
+
+def write_summary(results, output_dir, elapsed):
+    """Write the summary of a batch run to the output directory.
+    
+    Args:
+        results (list): Result dictionaries returned by run_batch
+        output_dir (str): Directory to write the summary to
+        elapsed (float): Wall clock time of the whole batch in seconds
+        
+    Returns:
+        str: Path of the written summary file
+    """
+    failures = [r for r in results if r["error"]]
+    summary = {
+        "files": len(results),
+        "converted": len(results) - len(failures),
+        "failed": len(failures),
+        "rows": sum(r["rows"] for r in results),
+        "invalid_cell_numbers": sum(r["invalid_cell_numbers"] for r in results),
+        "flagged_rows": sum(r["flagged_rows"] for r in results),
+        "elapsed_seconds": round(elapsed, 3),
+        "results": results
+    }
+    
+    summary_path = os.path.join(output_dir, SUMMARY_FILENAME)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary_path
+
+def format_summary(results, elapsed):
+    """Format the results of a batch run as a human readable table."""
+    lines = []
+    name_width = max([len(os.path.basename(r["file"])) for r in results] + [4])
+    lines.append(f"{'File':<{name_width}}  {'Provider':<8}  {'Rows':>8}  {'Time':>7}  Status")
+    for r in results:
+        if r["error"]:
+            status = f"FAILED: {r['error'].splitlines()[0]}"
+        elif r["flagged_rows"]:
+            status = f"OK ({r['flagged_rows']} rows failed validation)"
+        elif r["invalid_cell_numbers"]:
+            status = f"OK ({r['invalid_cell_numbers']} invalid cell numbers)"
+        else:
+            status = "OK"
+        lines.append(f"{os.path.basename(r['file']):<{name_width}}  {r['provider'] or '-':<8}  "
+                     f"{r['rows']:>8}  {r['seconds']:>6.2f}s  {status}")
+    
+    failed = sum(1 for r in results if r["error"])
+    total_rows = sum(r["rows"] for r in results)
+    lines.append(f"{len(results)} file(s), {failed} failed, {total_rows} SIMs in {elapsed:.2f}s")
+    return "\n".join(lines)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Round-trip benchmark of the SimulationData serialisers.
+
+A synthetic payload (a list of SIM records plus a numeric results array)
+is saved and loaded with the legacy indented json.dump/json.load path and
+with each serialiser mode, reporting the time and file size of each.
+
+Usage:
+    python bench_sim_data.py [-n RECORDS] [-r RESULTS] [--repeat N]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+import serialisers
+from sim_data import SimulationData
+
+# Payload size benchmarked by default
+DEFAULT_RECORDS = 100000
+DEFAULT_RESULTS = 1000000
+
+def make_payload(records, results, seed=0):
+    """Build a synthetic SimulationData payload."""
+    rng = np.random.default_rng(seed)
+    return SimulationData({
+        "simulation_id": "bench",
+        "parameters": {"records": records, "results": results},
+        "records": [{"iccid": f"8927{i:016d}", "msisdn": f"2782{i % 10000000:07d}", "value": i * 0.5}
+                    for i in range(records)],
+        "results": rng.random(results)
+    }, {"version": "1.0", "created": None, "format": "json"})
+
+def _legacy_save(sim_data, path):
+    with open(path, "w") as f:
+        json.dump({"metadata": sim_data.metadata,
+                   "data": dict(sim_data.data, results=sim_data.data["results"].tolist())}, f, indent=2)
+
+def _legacy_load(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def _size(path):
+    """Size of a document plus its sidecar, if any."""
+    sidecar = serialisers.sidecar_path(path)
+    return os.path.getsize(path) + (os.path.getsize(sidecar) if os.path.exists(sidecar) else 0)
+
+def run(records=DEFAULT_RECORDS, results=DEFAULT_RESULTS, repeat=1):
+    """Time saving and loading the payload in every mode.
+    
+    Returns:
+        list: One dict per mode with save/load seconds (best of repeat) and bytes
+    """
+    sim_data = make_payload(records, results)
+    modes = [
+        ("legacy json (indent=2)", "json", _legacy_save, _legacy_load),
+        (f"compact json ({serialisers.backend_name()})", "json",
+         lambda data, path: data.save_to_file(path, results_sidecar=False),
+         lambda path: SimulationData().load_from_file(path)),
+        ("compact json + npy sidecar", "json",
+         lambda data, path: data.save_to_file(path, results_sidecar=True),
+         lambda path: SimulationData().load_from_file(path)),
+        ("ndjson + npy sidecar", "ndjson",
+         lambda data, path: data.save_to_file(path, results_sidecar=True),
+         lambda path: SimulationData().load_from_file(path))
+    ]
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for index, (name, extension, save, load) in enumerate(modes):
+            path = os.path.join(workdir, f"mode{index}.{extension}")
+            save_seconds, load_seconds = [], []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                save(sim_data, path)
+                save_seconds.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                load(path)
+                load_seconds.append(time.perf_counter() - start)
+            rows.append({"mode": name, "save_seconds": min(save_seconds), "load_seconds": min(load_seconds),
+                         "bytes": _size(path)})
+    return rows
+
+def format_rows(rows):
+    """Format the results as a table with the speed-up over the legacy path."""
+    legacy = rows[0]
+    lines = [f"{'Mode':<30}  {'Save':>8}  {'Load':>8}  {'Size':>10}  {'Round trip vs legacy':>20}"]
+    for row in rows:
+        ratio = (row["save_seconds"] + row["load_seconds"]) / (legacy["save_seconds"] + legacy["load_seconds"])
+        lines.append(f"{row['mode']:<30}  {row['save_seconds']:>7.3f}s  {row['load_seconds']:>7.3f}s  "
+                     f"{row['bytes'] / 2 ** 20:>7.1f} MB  {'x' + format(ratio, '.2f'):>20}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    """Run the round-trip benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark SimulationData save/load round trips.")
+    parser.add_argument("-n", "--records", type=int, default=DEFAULT_RECORDS,
+                        help=f"Number of records in the payload (default: {DEFAULT_RECORDS})")
+    parser.add_argument("-r", "--results", type=int, default=DEFAULT_RESULTS,
+                        help=f"Length of the results array (default: {DEFAULT_RESULTS})")
+    parser.add_argument("--repeat", type=int, default=1, help="Repetitions, the best time is reported")
+    args = parser.parse_args(argv)
+    print(format_rows(run(args.records, args.results, args.repeat)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
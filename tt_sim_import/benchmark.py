@@ -0,0 +1,427 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark harness for the import -> rename -> export path.
+
+Synthetic Vodacom/MTN workbooks are generated with header variants taken
+from COLUMN_MAPPINGS and the provider IP variant lists, then each stage
+(read, header resolution, normalisation, validation, CSV write) is timed
+in a fresh worker process so that the peak RSS of every case is its own.
+The write throughput of the other export formats (JSON Lines, Parquet,
+Arrow) is measured against CSV on the same data, as is the throughput of
+upserting the rows into the SQLite inventory (first import and re-import).
+Results are written as JSON so runs before and after a change can be
+compared with --compare.
+
+Usage:
+    python benchmark.py [-r ROWS ...] [-p PROVIDER ...] [-f FORMAT ...] [-o RESULTS.json] [--compare OLD.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from constants import COLUMN_MAPPINGS, PROVIDER_SPECS
+
+# Row counts benchmarked by default
+DEFAULT_ROW_COUNTS = [1000, 100000, 1000000]
+
+# Default results file
+DEFAULT_RESULTS_FILE = "benchmark_results.json"
+
+# Stages timed for every case, in order
+STAGES = ["read", "resolve", "normalise", "validate", "write"]
+
+# Export formats whose write throughput is compared (Parquet and Arrow only if pyarrow is installed)
+WRITE_FORMATS = ["csv", "ndjson", "parquet", "arrow"]
+
+# Share of generated rows carrying a defect (duplicate ICCID, bad check digit or malformed IP)
+DEFECT_RATE = 0.001
+
+def peak_rss_bytes():
+    """Return the peak resident set size of this process in bytes, or None if unavailable."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+    except (ImportError, AttributeError):
+        return None
+
+def _iccids(rng, count):
+    """Generate ICCIDs with a valid Luhn check digit."""
+    import numpy as np
+    body = np.concatenate([
+        np.tile(np.array([8, 9, 2, 7], dtype=np.int64), (count, 1)),
+        rng.integers(0, 10, (count, 15))
+    ], axis=1)
+    # The check digit is appended, so the doubled digits are the odd positions from the right of the body
+    doubled = body[:, ::-1][:, ::2] * 2
+    total = (doubled - 9 * (doubled > 9)).sum(axis=1) + body[:, ::-1][:, 1::2].sum(axis=1)
+    check = (10 - total % 10) % 10
+    digits = np.concatenate([body, check[:, None]], axis=1).astype(np.uint8) + ord("0")
+    return digits.view("S20").ravel().astype("U20")
+
+def _ip_addresses(rng, count, first_octet):
+    """Generate dotted-quad IP addresses within a /8 network."""
+    octets = rng.integers(0, 256, (count, 3))
+    return [f"{first_octet}.{a}.{b}.{c}" for a, b, c in octets.tolist()]
+
+def generate_workbook(file_path, provider, rows, seed=0):
+    """Write a synthetic supplier workbook.
+    
+    The headers are drawn from the accepted variations so the header
+    resolution is exercised as with real supplier files. Cell numbers are
+    a mix of the formats found in practice and a small share of rows carry
+    defects for the validation stage.
+    
+    Args:
+        file_path (str): Path of the workbook to write
+        provider (str): Provider whose layout to generate
+        rows (int): Number of SIM rows
+        seed (int, optional): Seed of the random generators
+    
+    Returns:
+        list: The header row that was written
+    """
+    import numpy as np
+    from openpyxl import Workbook
+    
+    picker = random.Random(seed)
+    rng = np.random.default_rng(seed)
+    spec = PROVIDER_SPECS[provider]
+    
+    headers = [picker.choice(COLUMN_MAPPINGS[column]).title() for column in spec["required_columns"]]
+    headers += [picker.choice(variants).upper() for variants in spec["ip_columns"].values()]
+    
+    national = rng.integers(600000000, 900000000, rows)
+    cell_formats = [lambda n: f"0{n}", lambda n: n, lambda n: f"27{n}", lambda n: f"0{n // 1000000}-{n % 1000000:06d}"]
+    cell_numbers = [cell_formats[i % len(cell_formats)](n) for i, n in enumerate(national.tolist())]
+    iccids = _iccids(rng, rows).tolist()
+    ips = [_ip_addresses(rng, rows, 10 + i) for i in range(len(spec["ip_columns"]))]
+    
+    # Sprinkle defects: duplicate ICCIDs, broken check digits and malformed IPs
+    for row in rng.choice(rows, int(rows * DEFECT_RATE), replace=False).tolist():
+        defect = row % 3
+        if defect == 0 and row:
+            iccids[row] = iccids[row - 1]
+        elif defect == 1:
+            iccids[row] = iccids[row][:-1] + str((int(iccids[row][-1]) + 1) % 10)
+        else:
+            ips[0][row] = ips[0][row] + ".0"
+    
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(provider)
+    sheet.append(headers)
+    for row in zip(cell_numbers, iccids, *ips):
+        sheet.append(row)
+    workbook.save(file_path)
+    return headers
+
+def workbook_path(workdir, provider, rows, seed=0):
+    """Return the path of a generated workbook. Workbooks are reused between runs."""
+    return os.path.join(workdir, f"synthetic_{provider.lower()}_{rows}_{seed}.xlsx")
+
+def available_write_formats(formats=None):
+    """Return the export formats that can be benchmarked, skipping those without their optional package."""
+    formats = formats or WRITE_FORMATS
+    try:
+        import pyarrow
+    except ImportError:
+        formats = [output_format for output_format in formats if output_format not in ("parquet", "arrow")]
+    return list(formats)
+
+def benchmark_writers(sim_df, output_dir, formats):
+    """Time writing the same data in several export formats.
+    
+    Args:
+        sim_df (pd.DataFrame): DataFrame with the standard Cell/Sim/IP columns
+        output_dir (str): Directory for the written files
+        formats (list): Export formats (see export_stream.EXPORT_WRITERS)
+    
+    Returns:
+        dict: Format -> seconds, bytes written and rows per second
+    """
+    from export_utils import write_export_chunks
+    
+    writers = {}
+    for output_format in formats:
+        file_path = os.path.join(output_dir, f"export.{output_format}")
+        start = time.perf_counter()
+        write_export_chunks([sim_df], file_path, output_format=output_format)
+        elapsed = time.perf_counter() - start
+        writers[output_format] = {
+            "seconds": round(elapsed, 4),
+            "bytes": os.path.getsize(file_path),
+            "rows_per_second": round(len(sim_df) / elapsed) if elapsed else None
+        }
+    return writers
+
+def benchmark_inventory(sim_df, output_dir, provider):
+    """Time upserting the same data into a new SQLite inventory twice (inserts, then updates).
+    
+    Args:
+        sim_df (pd.DataFrame): DataFrame with the standard Cell/Sim/IP columns
+        output_dir (str): Directory for the database
+        provider (str): The provider of the data
+    
+    Returns:
+        dict: Pass ("insert", "update") -> seconds and rows per second, plus the database bytes
+    """
+    from inventory import Inventory
+    
+    db_path = os.path.join(output_dir, "inventory.db")
+    store = Inventory(db_path)
+    result = {}
+    for upsert in ("insert", "update"):
+        start = time.perf_counter()
+        store.upsert(provider, "benchmark.xlsx", sim_df)
+        elapsed = time.perf_counter() - start
+        result[upsert] = {
+            "seconds": round(elapsed, 4),
+            "rows_per_second": round(len(sim_df) / elapsed) if elapsed else None
+        }
+    result["bytes"] = sum(os.path.getsize(db_path + suffix) for suffix in ("", "-wal") if
+                          os.path.exists(db_path + suffix))
+    return result
+
+def run_case(file_path, provider, stream=False, formats=None):
+    """Time each stage of the import -> rename -> export path for one workbook.
+    
+    Args:
+        file_path (str): Path of the supplier workbook
+        provider (str): The provider of the workbook
+        stream (bool, optional): Read with the streaming reader instead of read_excel
+        formats (list, optional): Export formats whose write throughput is compared. Defaults to none.
+    
+    Returns:
+        dict: Result with rows, seconds per stage, total seconds, peak RSS per stage, write
+              throughput per export format and inventory upsert throughput
+    """
+    import pandas as pd
+    from header_resolver import default_resolver
+    from import_utils import select_sim_columns
+    from excel_stream import read_sim_file_chunked
+    from normalise import normalise_msisdn
+    from validation import validate_sims
+    from export_utils import write_export_csv
+    
+    seconds = {}
+    peak_rss = {}
+    
+    def finish(stage, start):
+        seconds[stage] = round(time.perf_counter() - start, 4)
+        peak_rss[stage] = peak_rss_bytes()
+    
+    if stream:
+        # The streaming reader resolves the header itself, the raw header is only needed for the resolve stage
+        raw_columns = list(pd.read_excel(file_path, nrows=0).columns)
+        
+    start = time.perf_counter()
+    if stream:
+        _, sim_df = read_sim_file_chunked(file_path, provider)
+    else:
+        raw_df = pd.read_excel(file_path)
+        raw_columns = list(raw_df.columns)
+    finish("read", start)
+    
+    # Resolution is timed cold, as on the first file of a session
+    default_resolver.clear_cache()
+    start = time.perf_counter()
+    if stream:
+        default_resolver.resolve(raw_columns, provider)
+    else:
+        sim_df = select_sim_columns(raw_df, provider)
+        del raw_df
+    finish("resolve", start)
+    
+    start = time.perf_counter()
+    _, msisdn_valid = normalise_msisdn(sim_df["Cell Number"])
+    finish("normalise", start)
+    
+    start = time.perf_counter()
+    _, validation = validate_sims(sim_df)
+    finish("validate", start)
+    
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        write_export_csv(sim_df, os.path.join(output_dir, "export.csv"))
+        finish("write", start)
+        writers = benchmark_writers(sim_df, output_dir, formats or [])
+        inventory = benchmark_inventory(sim_df, output_dir, provider)
+    
+    return {
+        "file": os.path.basename(file_path),
+        "provider": provider,
+        "rows": len(sim_df),
+        "stream": stream,
+        "seconds": seconds,
+        "total_seconds": round(sum(seconds.values()), 4),
+        "peak_rss_bytes": peak_rss,
+        "invalid_cell_numbers": int((~msisdn_valid).sum()),
+        "flagged_rows": validation["flagged_rows"],
+        "writers": writers,
+        "inventory": inventory
+    }
+
+def run_benchmarks(row_counts=None, providers=None, workdir=None, stream=False, seed=0, progress=None,
+                   formats=None):
+    """Generate the synthetic workbooks (once) and benchmark every provider and size.
+    
+    Every case runs in a fresh worker process, so peak RSS is measured per case.
+    
+    Args:
+        row_counts (list, optional): Row counts to benchmark. Defaults to DEFAULT_ROW_COUNTS.
+        providers (list, optional): Providers to benchmark. Defaults to all providers.
+        workdir (str, optional): Directory holding the generated workbooks
+        stream (bool, optional): Read with the streaming reader
+        seed (int, optional): Seed of the workbook generator
+        progress (callable, optional): Called with a message before each step
+        formats (list, optional): Export formats whose write throughput is compared
+    
+    Returns:
+        dict: Environment information and one result per case
+    """
+    row_counts = row_counts or DEFAULT_ROW_COUNTS
+    providers = providers or list(PROVIDER_SPECS)
+    workdir = workdir or os.path.join(tempfile.gettempdir(), "sim_benchmark")
+    os.makedirs(workdir, exist_ok=True)
+    
+    results = []
+    for provider in providers:
+        for rows in row_counts:
+            file_path = workbook_path(workdir, provider, rows, seed)
+            if not os.path.exists(file_path):
+                if progress:
+                    progress(f"Generating {os.path.basename(file_path)}...")
+                generate_workbook(file_path, provider, rows, seed)
+            if progress:
+                progress(f"Benchmarking {os.path.basename(file_path)}...")
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(run_case, file_path, provider, stream, formats).result())
+    
+    return {"environment": environment_info(), "results": results}
+
+def environment_info():
+    """Describe the machine and library versions the benchmark ran on."""
+    import numpy as np
+    import pandas as pd
+    import openpyxl
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "openpyxl": openpyxl.__version__
+    }
+
+def _case_key(result):
+    """Cases are matched on provider and size, so streamed and whole-file runs can be compared."""
+    return (result["provider"], result["rows"])
+
+def format_results(report, baseline=None):
+    """Format benchmark results as a table, with the ratio to a baseline run if given."""
+    baseline_cases = {_case_key(r): r for r in (baseline or {}).get("results", [])}
+    lines = [f"{'Provider':<8}  {'Rows':>8}  " + "  ".join(f"{stage:>9}" for stage in STAGES) +
+             f"  {'Total':>8}  {'Peak RSS':>9}"]
+    for result in report["results"]:
+        peak = max((v for v in result["peak_rss_bytes"].values() if v), default=None)
+        peak_text = f"{peak / 2 ** 20:.0f} MB" if peak else "-"
+        lines.append(f"{result['provider']:<8}  {result['rows']:>8}  " +
+                     "  ".join(f"{result['seconds'][stage]:>8.3f}s" for stage in STAGES) +
+                     f"  {result['total_seconds']:>7.3f}s  {peak_text:>9}")
+        previous = baseline_cases.get(_case_key(result))
+        if previous:
+            ratios = [_ratio(result["seconds"][stage], previous["seconds"].get(stage)) for stage in STAGES]
+            lines.append(f"{'':<8}  {'vs base':>8}  " + "  ".join(f"{r:>9}" for r in ratios) +
+                         f"  {_ratio(result['total_seconds'], previous['total_seconds']):>8}")
+    
+    writer_lines = []
+    for result in report["results"]:
+        writers = result.get("writers") or {}
+        csv_seconds = writers.get("csv", {}).get("seconds")
+        for output_format, writer in writers.items():
+            rate = f"{writer['rows_per_second']:,}" if writer["rows_per_second"] else "-"
+            writer_lines.append(f"{result['provider']:<8}  {result['rows']:>8}  {output_format:<8}  "
+                                f"{writer['seconds']:>8.3f}s  {rate:>12}  {writer['bytes'] / 2 ** 20:>8.1f} MB  "
+                                f"{_ratio(writer['seconds'], csv_seconds):>8}")
+    if writer_lines:
+        lines.append("")
+        lines.append(f"{'Provider':<8}  {'Rows':>8}  {'Format':<8}  {'Write':>9}  {'Rows/s':>12}  "
+                     f"{'Size':>11}  {'vs csv':>8}")
+        lines.extend(writer_lines)
+    
+    inventory_lines = []
+    for result in report["results"]:
+        inventory = result.get("inventory")
+        if inventory:
+            rates = [f"{inventory[upsert]['rows_per_second'] or 0:>12,}" for upsert in ("insert", "update")]
+            inventory_lines.append(f"{result['provider']:<8}  {result['rows']:>8}  "
+                                   f"{inventory['insert']['seconds']:>8.3f}s  {rates[0]}  "
+                                   f"{inventory['update']['seconds']:>8.3f}s  {rates[1]}  "
+                                   f"{inventory['bytes'] / 2 ** 20:>8.1f} MB")
+    if inventory_lines:
+        lines.append("")
+        lines.append(f"{'Provider':<8}  {'Rows':>8}  {'Insert':>9}  {'Rows/s':>12}  {'Update':>9}  {'Rows/s':>12}  "
+                     f"{'Database':>11}")
+        lines.extend(inventory_lines)
+    return "\n".join(lines)
+
+def _ratio(current, previous):
+    """Format current / previous as e.g. 'x0.52'."""
+    if not previous:
+        return "-"
+    return f"x{current / previous:.2f}"
+
+def parse_args(argv=None):
+    """Parse the command line arguments of the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the SIM import -> export path on synthetic workbooks.")
+    parser.add_argument("-r", "--rows", type=int, nargs="+", default=DEFAULT_ROW_COUNTS,
+                        help="Row counts to benchmark (default: 1000 100000 1000000)")
+    parser.add_argument("-p", "--provider", nargs="+", choices=list(PROVIDER_SPECS),
+                        help="Providers to benchmark (default: all)")
+    parser.add_argument("-o", "--output", default=DEFAULT_RESULTS_FILE,
+                        help=f"JSON results file (default: {DEFAULT_RESULTS_FILE})")
+    parser.add_argument("-w", "--workdir",
+                        help="Directory for the generated workbooks (reused between runs)")
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="Read with the streaming reader instead of read_excel")
+    parser.add_argument("-f", "--formats", nargs="+", choices=WRITE_FORMATS,
+                        help="Export formats whose write throughput is compared (default: all available)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the workbook generator")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the benchmarks and write the results file."""
+    args = parse_args(argv)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    
+    report = run_benchmarks(args.rows, args.provider, args.workdir, args.stream, args.seed,
+                            progress=lambda message: print(message, file=sys.stderr),
+                            formats=available_write_formats(args.formats))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    
+    print(format_results(report, baseline))
+    print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
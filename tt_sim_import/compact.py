@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compact, lossless column representations for imported SIM data.
+
+As Python objects, every ICCID, cell number and IP address costs a pointer
+plus a string object of 50-70 bytes. Imported datasets instead hold:
+
+- ICCIDs and cell numbers as fixed-width ASCII byte arrays (e.g. S20/S11)
+- IP addresses as uint32, when every value is a canonical dotted quad
+- anything else (non-ASCII text) as object arrays, unchanged
+
+DataFrames for export or display are rebuilt as text for the rows needed.
+"""
+
+import numpy as np
+import pandas as pd
+from normalise import identifier_text
+from ip_engine import parse_ipv4, format_ipv4
+
+def compact_text(values):
+    """Store text values as a fixed-width byte array, or as objects if they are not all ASCII.
+    
+    Args:
+        values (array-like): Text values (missing values as empty strings)
+    
+    Returns:
+        np.ndarray: S<width> array, or object array if a value is not ASCII
+    """
+    text = np.asarray(values, dtype=object)
+    try:
+        return np.array(text, dtype="S") if len(text) else np.zeros(0, dtype="S1")
+    except UnicodeEncodeError:
+        return text
+
+def compact_ip(values):
+    """Store IP addresses as uint32 when that is lossless, otherwise as text.
+    
+    The uint32 form is used only if every value parses and formats back to
+    exactly the same text (no blanks, padding or leading zeros).
+    
+    Args:
+        values (array-like): IP address text values
+    
+    Returns:
+        np.ndarray: uint32 array, or the compact_text representation
+    """
+    text = np.asarray(values, dtype=object)
+    addresses, valid = parse_ipv4(text)
+    if len(text) and valid.all():
+        octets = [(addresses >> shift) & 0xFF for shift in (24, 16, 8, 0)]
+        canonical_length = 3 + sum(1 + (octet >= 10) + (octet >= 100) for octet in octets)
+        if (pd.Series(text).str.len().to_numpy() == canonical_length).all():
+            return addresses
+    return compact_text(text)
+
+def compact_columns(sim_df):
+    """Convert a standardised SIM DataFrame to compact column arrays.
+    
+    Args:
+        sim_df (pd.DataFrame): DataFrame with the standard Cell/Sim/IP columns (text values)
+    
+    Returns:
+        dict: Column name -> np.ndarray in its compact representation
+    """
+    columns = {}
+    for column in sim_df.columns:
+        text = identifier_text(sim_df[column]).to_numpy()
+        columns[column] = compact_ip(text) if str(column).startswith("IP Address") else compact_text(text)
+    return columns
+
+def expand_column(values):
+    """Rebuild the text values of a compact column.
+    
+    Returns:
+        np.ndarray: Object array of str
+    """
+    if values.dtype.kind == "S":
+        return values.astype("U").astype(object)
+    if values.dtype == np.uint32:
+        return format_ipv4(values).astype(object)
+    return values
+
+def text_frame(columns, start=0, stop=None):
+    """Build a text DataFrame from compact columns, for a row range.
+    
+    Args:
+        columns (dict): Column name -> compact np.ndarray
+        start (int, optional): First row
+        stop (int, optional): Row after the last row. Defaults to the end.
+    
+    Returns:
+        pd.DataFrame: The standard columns as text
+    """
+    return pd.DataFrame({column: expand_column(values[start:stop]) for column, values in columns.items()},
+                        columns=list(columns))
+
+def column_nbytes(values):
+    """Return the memory held by a column, including Python string objects."""
+    if values.dtype == object:
+        return int(pd.Series(values, copy=False).memory_usage(index=False, deep=True))
+    return int(values.nbytes)
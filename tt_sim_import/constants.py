@@ -21,7 +21,8 @@ COLORS = {
     "mtn_border": "#ffcc00",    # Yellow border for MTN
     "selected_border": "#e9a061", # Orange border for selected
     "vodacom_border_light": "#ffcccc", # Light red for semi-transparent effect
-    "mtn_border_light": "#fff5cc"  # Light yellow for semi-transparent effect
+    "mtn_border_light": "#fff5cc",  # Light yellow for semi-transparent effect
+    "flagged_row": "#fbe0c8"    # Pale orange for rows failing validation in the preview
 }
 
 # Column name mappings for flexibility - using lowercase for case-insensitive comparison
@@ -33,4 +34,53 @@ COLUMN_MAPPINGS = {
 # IP address column variations
 VODACOM_IP_VARIANTS = ["ip address", "ip_address", "ipaddress", "ip"]
 MTN_IP1_VARIANTS = ["ip address1", "ip_address1", "ipaddress1", "ip1", "cn", "cn-ip"]
-MTN_IP2_VARIANTS = ["ip address2", "ip_address2", "ipaddress2", "ip2", "nl", "nl-ip"]
\ No newline at end of file
+MTN_IP2_VARIANTS = ["ip address2", "ip_address2", "ipaddress2", "ip2", "nl", "nl-ip"]
+
+# Declarative provider specifications, compiled once by provider_registry.
+#   required_columns: standard columns (keys of COLUMN_MAPPINGS) the file must contain
+#   ip_columns:       standard IP column name -> accepted header variations, in order
+#   ip_match:         "exact" header match, or "contains" (header contains a variation or vice versa)
+#   export_columns:   standard IP column name -> Techtool export column name
+#   country_code / national_number_length: cell number normalisation rules
+#   ip_subnets:       standard IP column name -> allowed subnets in CIDR notation (none listed: any address)
+#   ip_pairs:         IP columns holding the two APN addresses of one SIM. The addresses must differ and,
+#                     when both columns list subnets, fall in subnets at the same position of the two lists.
+PROVIDER_SPECS = {
+    "Vodacom": {
+        "required_columns": ["Cell Number", "Sim Number"],
+        "ip_columns": {"IP Address": VODACOM_IP_VARIANTS},
+        "ip_match": "exact",
+        "export_columns": {"IP Address": "Ip Address1"},
+        "ip_subnets": {"IP Address": []},
+        "country_code": "27",
+        "national_number_length": 9,
+        "filename_hints": ["vodacom", "voda"],
+        "color": COLORS["vodacom_color"],
+        "logo": "vodacom.png",
+        "ip_error": "Vodacom file must contain an IP Address column.",
+        "ip_status": "Missing IP column."
+    },
+    "MTN": {
+        "required_columns": ["Cell Number", "Sim Number"],
+        "ip_columns": {"IP Address1": MTN_IP1_VARIANTS, "IP Address2": MTN_IP2_VARIANTS},
+        "ip_match": "contains",
+        "export_columns": {"IP Address1": "Ip Address1", "IP Address2": "Ip Address2"},
+        "ip_subnets": {"IP Address1": [], "IP Address2": []},
+        "ip_pairs": [["IP Address1", "IP Address2"]],
+        "country_code": "27",
+        "national_number_length": 9,
+        "filename_hints": ["mtn"],
+        "color": COLORS["mtn_color"],
+        "logo": "mtn.png",
+        "ip_error": ("MTN file must contain both primary and secondary IP address columns.\n\n"
+                     "Acceptable column names for primary IP: IP Address1, IP1, CN, CN-IP\n"
+                     "Acceptable column names for secondary IP: IP Address2, IP2, NL, NL-IP"),
+        "ip_status": "Missing IP columns."
+    }
+}
+
+# Column added to multi-sheet imports with the name of the sheet each SIM was read from
+SOURCE_SHEET_COLUMN = "Source Sheet"
+
+# DataFrame.attrs key of an imported DataFrame holding its original header -> standard column mapping
+COLUMN_MAPPING_ATTR = "column_mapping"
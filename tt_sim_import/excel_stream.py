@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Streaming, bounded-memory reading of supplier Excel files.
+
+The header row is resolved first, after which only the Cell/Sim/IP columns
+are materialised in fixed-size chunks using read-only row iteration. Peak
+memory is proportional to the chunk size rather than to the file size.
+Chunks hold the identifiers as text, so ICCIDs never pass through float64.
+"""
+
+import os
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+from import_utils import resolve_columns, infer_provider, read_sim_file, ColumnResolutionError
+from constants import COLUMN_MAPPINGS, COLUMN_MAPPING_ATTR
+from normalise import identifier_text
+from task_runner import check_cancelled
+import metrics
+
+# Number of rows materialised per chunk
+DEFAULT_CHUNK_SIZE = 50000
+
+# Number of leading rows searched for the header row (title rows are common in supplier files)
+HEADER_SCAN_ROWS = 20
+
+# Extensions that openpyxl can stream in read-only mode
+STREAMABLE_EXTENSIONS = (".xlsx", ".xlsm")
+
+def find_header_layout(rows, provider=None, file_path=None, resolve=None):
+    """Find the first row whose values resolve to the SIM columns.
+    
+    Args:
+        rows (iterable): Leading rows of a sheet as tuples of cell values
+        provider (str, optional): The provider name. Inferred from the header if not given.
+        file_path (str, optional): Path of the workbook, used as a hint when inferring the provider
+        resolve (callable, optional): Column resolver with the signature of resolve_columns
+        
+    Returns:
+        dict: Layout with provider, header_row (zero-based), renamed_columns, columns (standard
+              column names) and indices (position of each standard column in the row)
+              
+    Raises:
+        ColumnResolutionError: If no header row with the required columns is found
+    """
+    resolve = resolve or resolve_columns
+    first_error = None
+    
+    for row_index, row in enumerate(rows):
+        header = ["" if value is None or pd.isna(value) else str(value) for value in row]
+        if not any(header):
+            continue
+        
+        row_provider = provider or infer_provider(header, file_path)
+        if not row_provider:
+            continue
+        
+        try:
+            renamed_columns, ip_columns = resolve(header, row_provider)
+        except ColumnResolutionError as e:
+            first_error = first_error or e
+            continue
+        
+        # Map each standard column to its position in the row
+        positions = {}
+        for index, name in enumerate(header):
+            if name in renamed_columns and renamed_columns[name] not in positions:
+                positions[renamed_columns[name]] = index
+        
+        columns = list(COLUMN_MAPPINGS.keys()) + ip_columns
+        return {
+            "provider": row_provider,
+            "header_row": row_index,
+            "renamed_columns": renamed_columns,
+            "columns": columns,
+            "indices": [positions[name] for name in columns]
+        }
+    
+    if first_error:
+        raise first_error
+    raise ColumnResolutionError(
+        "Could not find a header row with the required columns, or determine the provider of the file.",
+        "Missing columns.")
+
+class SimStreamReader:
+    """Read the standard SIM columns of a workbook in fixed-size chunks.
+    
+    Usage:
+        with SimStreamReader(file_path, provider) as reader:
+            for chunk in reader:
+                ...
+    
+    Attributes:
+        provider (str): The provider of the file, inferred if not given
+        header_row (int): Zero-based index of the header row in the sheet
+        renamed_columns (dict): Mapping of original column names to standard names
+        columns (list): Standard column names of the yielded chunks
+    """
+    
+    def __init__(self, file_path, provider=None, chunk_size=DEFAULT_CHUNK_SIZE, sheet_name=None, layout=None):
+        """Initialize the reader. The workbook is opened lazily by open().
+        
+        Args:
+            layout (dict, optional): Header layout already found by find_header_layout, which
+                                     skips the header scan (used by the multi-sheet reader)
+        """
+        self.file_path = file_path
+        self.layout = layout
+        self.provider = provider
+        self.chunk_size = max(1, int(chunk_size))
+        self.sheet_name = sheet_name
+        self.header_row = None
+        self.renamed_columns = {}
+        self.columns = []
+        self._workbook = None
+        self._worksheet = None
+        self._indices = []
+        self._fallback_df = None
+        
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        
+    def open(self):
+        """Open the workbook and resolve the header row.
+        
+        Raises:
+            ColumnResolutionError: If no header row with the required columns is found
+        """
+        if not self.file_path.lower().endswith(STREAMABLE_EXTENSIONS):
+            # Legacy .xls files cannot be streamed, read them whole and slice into chunks
+            self.provider, self._fallback_df = read_sim_file(self.file_path, self.provider)
+            self.header_row = 0
+            self.renamed_columns = dict(self._fallback_df.attrs.get(COLUMN_MAPPING_ATTR, {}))
+            self.columns = list(self._fallback_df.columns)
+            return
+        
+        from openpyxl import load_workbook
+        
+        metrics.count("bytes_read", os.path.getsize(self.file_path))
+        self._workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+        if self.sheet_name is None:
+            self._worksheet = self._workbook.worksheets[0]
+        else:
+            self._worksheet = self._workbook[self.sheet_name]
+        
+        self._resolve_header()
+        
+    def _resolve_header(self):
+        """Find the first row within HEADER_SCAN_ROWS whose values resolve to the SIM columns."""
+        if self.layout is None:
+            with metrics.span("resolve_headers"):
+                rows = self._worksheet.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True)
+                self.layout = find_header_layout(rows, self.provider, self.file_path)
+        
+        self.provider = self.layout["provider"]
+        self.header_row = self.layout["header_row"]
+        self.renamed_columns = self.layout["renamed_columns"]
+        self.columns = list(self.layout["columns"])
+        self._indices = list(self.layout["indices"])
+    
+    def close(self):
+        """Close the underlying workbook."""
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+            self._worksheet = None
+            
+    def __iter__(self):
+        """Yield DataFrames of at most chunk_size rows with the standard columns.
+        
+        At least one (possibly empty) chunk is always yielded so that writers
+        can emit a header for files without data rows.
+        """
+        if self._fallback_df is None and self._worksheet is None:
+            self.open()
+            
+        if self._fallback_df is not None:
+            for start in range(0, max(len(self._fallback_df), 1), self.chunk_size):
+                yield self._fallback_df.iloc[start:start + self.chunk_size].reset_index(drop=True)
+            return
+        
+        rows = self._worksheet.iter_rows(min_row=self.header_row + 2, values_only=True)
+        yielded = False
+        while True:
+            # Only the reading is timed, not the time the consumer spends between chunks
+            with metrics.span("read") as timed:
+                buffer = self._read_rows(rows)
+                chunk = self._make_chunk(buffer) if buffer or not yielded else None
+                timed.add(rows=len(buffer))
+            if chunk is None:
+                return
+            yield chunk
+            yielded = True
+            if len(buffer) < self.chunk_size:
+                return
+    
+    def _read_rows(self, rows):
+        """Return the values of the next chunk_size non-empty rows (fewer at the end of the sheet)."""
+        width = max(self._indices) + 1
+        getter = itemgetter(*self._indices)
+        single = len(self._indices) == 1
+        buffer = []
+        
+        for row in rows:
+            # Short rows are padded so that the getter never fails
+            if len(row) < width:
+                row = tuple(row) + (None,) * (width - len(row))
+            values = getter(row)
+            if single:
+                values = (values,)
+                
+            # Skip completely empty rows (often trailing formatting in supplier files)
+            if all(value is None for value in values):
+                continue
+            
+            buffer.append(values)
+            if len(buffer) >= self.chunk_size:
+                break
+        return buffer
+            
+    def _make_chunk(self, rows):
+        """Build a DataFrame chunk of text columns from a list of row tuples.
+        
+        The cells are kept as objects until rendered as text: letting pandas
+        infer the dtype would turn integer columns with gaps into float64.
+        """
+        cells = np.empty((len(rows), len(self.columns)), dtype=object)
+        if rows:
+            cells[:] = rows
+        return pd.DataFrame({column: identifier_text(cells[:, i]) for i, column in enumerate(self.columns)},
+                            columns=self.columns)
+    
+def iter_sim_chunks(file_path, provider=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Convenience generator yielding standardised chunks of a workbook.
+    
+    Args:
+        file_path (str): Path to the Excel file
+        provider (str, optional): The provider name. Inferred from the file if not given.
+        chunk_size (int, optional): Maximum number of rows per chunk
+        
+    Yields:
+        pd.DataFrame: Chunks with the standard Cell/Sim/IP columns
+    """
+    with SimStreamReader(file_path, provider, chunk_size) as reader:
+        yield from reader
+
+def read_sim_file_chunked(file_path, provider=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+                          cancel_event=None):
+    """Read a whole workbook chunk by chunk, with progress and cancellation.
+    
+    Args:
+        file_path (str): Path to the Excel file
+        provider (str, optional): The provider name. Inferred from the file if not given.
+        chunk_size (int, optional): Maximum number of rows per chunk
+        progress (callable, optional): Called with the running row count after each chunk
+        cancel_event (threading.Event, optional): Checked between chunks
+        
+    Returns:
+        tuple: (provider name, pd.DataFrame with the standard SIM columns)
+        
+    Raises:
+        ColumnResolutionError: If the provider or a required column cannot be determined
+        OperationCancelled: If the cancel event was set
+    """
+    chunks = []
+    row_count = 0
+    with SimStreamReader(file_path, provider, chunk_size) as reader:
+        for chunk in reader:
+            check_cancelled(cancel_event)
+            chunks.append(chunk)
+            row_count += len(chunk)
+            if progress:
+                progress(row_count)
+        provider = reader.provider
+        mapping = {original: standard for original, standard in reader.renamed_columns.items()
+                   if standard in reader.columns}
+    
+    sim_df = pd.concat(chunks, ignore_index=True)
+    sim_df.attrs[COLUMN_MAPPING_ATTR] = mapping
+    return provider, sim_df
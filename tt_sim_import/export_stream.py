@@ -0,0 +1,353 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Streaming writers for the Techtool export layout.
+
+Chunks are formatted straight from the export column arrays and written as
+they arrive, so no export DataFrame of the whole file is ever built. Besides
+CSV, the same columns can be written as JSON Lines, Parquet or Arrow IPC
+(Feather v2), which downstream tools load much faster than CSV; Parquet and
+Arrow require the optional pyarrow package. CSV and JSON Lines output can be
+compressed with gzip (standard library) or zstd (requires the optional
+zstandard package), chosen explicitly or from the file extension.
+"""
+
+import io
+import os
+import re
+import csv
+import gzip
+import json
+import numpy as np
+import pandas as pd
+
+# Supported output compressions and the file extensions that select them
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".zst": "zstd"}
+COMPRESSIONS = tuple(COMPRESSION_EXTENSIONS.values())
+
+# Compression levels, favouring throughput for very large archives
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Line terminator of the written files (matches what DataFrame.to_csv writes)
+LINE_TERMINATOR = os.linesep
+
+# Characters that must be escaped in a JSON string
+_JSON_ESCAPES = re.compile(r'["\\\x00-\x1f]')
+
+def compression_for(file_path):
+    """Return the compression selected by a file's extension, or None."""
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+
+def compressed_path(file_path, compression):
+    """Return a file path with the extension of a compression appended."""
+    if compression is None:
+        return file_path
+    extension = next(ext for ext, name in COMPRESSION_EXTENSIONS.items() if name == compression)
+    return file_path if file_path.lower().endswith(extension) else file_path + extension
+
+def open_output(file_path, compression=None):
+    """Open a binary output file, compressed if requested.
+    
+    Args:
+        file_path (str): Destination path
+        compression (str, optional): None, "gzip" or "zstd"
+    
+    Returns:
+        file object: Writable binary file
+    
+    Raises:
+        ValueError: If the compression is not supported
+        ImportError: If zstd is requested without the zstandard package
+    """
+    if compression is None:
+        return open(file_path, "wb")
+    if compression == "gzip":
+        return gzip.open(file_path, "wb", compresslevel=GZIP_LEVEL)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd compression requires the zstandard package (pip install zstandard).") from None
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(file_path, "wb"), closefd=True)
+    raise ValueError(f"Unsupported compression: {compression}. Choose from {', '.join(COMPRESSIONS)}.")
+
+def _cell_csv(value):
+    """Render a cell that is not a string the way DataFrame.to_csv would."""
+    if pd.isna(value):
+        return ""
+    return str(value)
+
+def _column_text(values):
+    """Return the values of an export column as a list of str."""
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values.astype(str).tolist()
+    if values.dtype.kind == "S":
+        return values.astype("U").tolist()
+    text = values.tolist()
+    if all(type(value) is str for value in text):
+        return text
+    return [value if type(value) is str else _cell_csv(value) for value in text]
+
+def format_csv_rows(columns, row_count):
+    """Format the rows of a chunk as CSV text.
+    
+    Identifier columns almost never contain separators or quotes, so rows
+    are joined directly; a chunk that needs quoting is formatted with the
+    csv module instead.
+    
+    Args:
+        columns (list): Column value lists (str), all of length row_count
+        row_count (int): Number of rows
+    
+    Returns:
+        str: The rows, each terminated by LINE_TERMINATOR
+    """
+    if not row_count:
+        return ""
+    text = LINE_TERMINATOR.join(map(",".join, zip(*columns))) + LINE_TERMINATOR
+    # Every separator and line break must be the one we inserted, and nothing may need quoting
+    plain = (text.count(",") == (len(columns) - 1) * row_count
+             and text.count("\n") == row_count * LINE_TERMINATOR.count("\n")
+             and text.count("\r") == row_count * LINE_TERMINATOR.count("\r")
+             and '"' not in text)
+    if plain:
+        return text
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator=LINE_TERMINATOR).writerows(zip(*columns))
+    return buffer.getvalue()
+
+def format_ndjson_rows(header, columns, row_count):
+    """Format the rows of a chunk as JSON Lines, one object per row.
+    
+    Rows are filled into a template; only columns containing characters
+    that JSON must escape are encoded value by value.
+    
+    Args:
+        header (list): Export column names
+        columns (list): Column value lists (str), all of length row_count
+        row_count (int): Number of rows
+    
+    Returns:
+        str: The rows, each terminated by a newline
+    """
+    if not row_count:
+        return ""
+    keys = [json.dumps(name, ensure_ascii=False).replace("%", "%%") for name in header]
+    template = "{" + ",".join(f"{key}:%s" if name == "Count" else f'{key}:"%s"'
+                              for name, key in zip(header, keys)) + "}"
+    columns = [values if name == "Count" or not _JSON_ESCAPES.search("".join(values))
+               else [json.dumps(value, ensure_ascii=False)[1:-1] for value in values]
+               for name, values in zip(header, columns)]
+    return "\n".join(template % row for row in zip(*columns)) + "\n"
+
+def _require_pyarrow():
+    """Import pyarrow, which the Parquet and Arrow exports require."""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Arrow exports require the pyarrow package (pip install pyarrow).") from None
+    return pyarrow
+
+class ExportWriter:
+    """Base class of the streaming export writers.
+    
+    Usage:
+        with CsvExportWriter(file_path, header) as writer:
+            for columns in chunks:
+                writer.write(columns)
+    
+    The destination is opened on the first chunk, or on close() if no chunk
+    was written, so that an export without rows still gets its header/schema.
+    
+    Attributes:
+        file_path (str): Destination path
+        header (list): Export columns; columns a chunk lacks are left empty
+        compression (str): None, "gzip" or "zstd"
+        rows (int): Number of rows written so far
+    """
+    
+    # Whether the format can be wrapped in gzip/zstd compression
+    compressible = True
+    
+    def __init__(self, file_path, header=None, compression=None, progress=None):
+        """Initialize the writer.
+        
+        Args:
+            file_path (str): Destination path
+            header (list, optional): Export columns. Defaults to the columns of the first chunk.
+            compression (str, optional): None, "gzip" or "zstd". Defaults to the file extension.
+            progress (callable, optional): Called with the running row count after each chunk
+        
+        Raises:
+            ValueError: If compression is requested for a format that cannot be compressed
+        """
+        self.file_path = file_path
+        self.header = list(header) if header is not None else None
+        self.compression = compression if compression is not None else compression_for(file_path)
+        if self.compression and not self.compressible:
+            raise ValueError(f"{type(self).__name__} output cannot be compressed with {self.compression}.")
+        self.progress = progress
+        self.rows = 0
+        self._opened = False
+        self._closed = False
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def write(self, columns):
+        """Write a chunk of export columns.
+        
+        Args:
+            columns (dict): Export column name -> array-like, all of the same length
+                            (see CompiledProvider.export_arrays)
+        """
+        if self.header is None:
+            self.header = list(columns)
+        if not self._opened:
+            self._open()
+            self._opened = True
+        
+        row_count = len(next(iter(columns.values()), ()))
+        self._write_columns([columns.get(name) for name in self.header], row_count)
+        self.rows += row_count
+        if self.progress:
+            self.progress(self.rows)
+    
+    def close(self):
+        """Open the destination if no chunk was written, and close it."""
+        if self._closed:
+            return
+        self._closed = True
+        if not self._opened and self.header is not None:
+            self._open()
+            self._opened = True
+        if self._opened:
+            self._close()
+    
+    def _text_columns(self, columns, row_count):
+        """Return the columns as str lists, missing columns as empty strings."""
+        return [_column_text(values) if values is not None else [""] * row_count for values in columns]
+    
+    def _open(self):
+        raise NotImplementedError
+    
+    def _write_columns(self, columns, row_count):
+        raise NotImplementedError
+    
+    def _close(self):
+        raise NotImplementedError
+
+class CsvExportWriter(ExportWriter):
+    """Write export column chunks to a (compressed) CSV file."""
+    
+    def _open(self):
+        self._file = open_output(self.file_path, self.compression)
+        self._file.write(format_csv_rows([[name] for name in self.header], 1).encode("utf-8"))
+    
+    def _write_columns(self, columns, row_count):
+        self._file.write(format_csv_rows(self._text_columns(columns, row_count), row_count).encode("utf-8"))
+    
+    def _close(self):
+        self._file.close()
+
+class NdjsonExportWriter(ExportWriter):
+    """Write export column chunks to a (compressed) JSON Lines file.
+    
+    Count is written as a number and every other column as a string, the
+    same values as in the CSV.
+    """
+    
+    def _open(self):
+        self._file = open_output(self.file_path, self.compression)
+    
+    def _write_columns(self, columns, row_count):
+        text = format_ndjson_rows(self.header, self._text_columns(columns, row_count), row_count)
+        self._file.write(text.encode("utf-8"))
+    
+    def _close(self):
+        self._file.close()
+
+class _ArrowExportWriter(ExportWriter):
+    """Base class of the pyarrow writers: Count as int64, every other column as string."""
+    
+    compressible = False
+    
+    def _schema(self):
+        pa = _require_pyarrow()
+        return pa.schema([(name, pa.int64() if name == "Count" else pa.string()) for name in self.header])
+    
+    def _table(self, columns, row_count):
+        pa = _require_pyarrow()
+        arrays = []
+        for name, values in zip(self.header, columns):
+            if name == "Count" and values is not None:
+                arrays.append(pa.array(np.asarray(values, dtype=np.int64)))
+            else:
+                arrays.append(pa.array(self._text_columns([values], row_count)[0], type=pa.string()))
+        return pa.Table.from_arrays(arrays, schema=self._schema())
+    
+    def _write_columns(self, columns, row_count):
+        self._writer.write_table(self._table(columns, row_count))
+    
+    def _close(self):
+        self._writer.close()
+
+class ParquetExportWriter(_ArrowExportWriter):
+    """Write export column chunks to a Parquet file, one row group per chunk."""
+    
+    def _open(self):
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+        self._writer = pq.ParquetWriter(self.file_path, self._schema())
+
+class ArrowExportWriter(_ArrowExportWriter):
+    """Write export column chunks to an Arrow IPC file (Feather v2), one record batch per chunk."""
+    
+    def _open(self):
+        pa = _require_pyarrow()
+        import pyarrow.ipc
+        self._writer = pa.ipc.new_file(self.file_path, self._schema())
+
+# Export formats, their writers and the file extensions that select them
+EXPORT_WRITERS = {
+    "csv": CsvExportWriter,
+    "ndjson": NdjsonExportWriter,
+    "parquet": ParquetExportWriter,
+    "arrow": ArrowExportWriter
+}
+EXPORT_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".parquet": "parquet",
+                     ".arrow": "arrow", ".feather": "arrow"}
+
+def export_format_for(file_path):
+    """Return the export format selected by a file's extension (ignoring a compression extension), or None."""
+    root, extension = os.path.splitext(file_path)
+    if extension.lower() in COMPRESSION_EXTENSIONS:
+        extension = os.path.splitext(root)[1]
+    return EXPORT_EXTENSIONS.get(extension.lower())
+
+def open_export_writer(file_path, header=None, output_format=None, compression=None, progress=None):
+    """Create the export writer of a format.
+    
+    Args:
+        file_path (str): Destination path
+        header (list, optional): Export columns. Defaults to the columns of the first chunk.
+        output_format (str, optional): One of EXPORT_WRITERS. Defaults to the file extension, else CSV.
+        compression (str, optional): None, "gzip" or "zstd". Defaults to the file extension.
+        progress (callable, optional): Called with the running row count after each chunk
+    
+    Returns:
+        ExportWriter: The writer, to be used as a context manager
+    
+    Raises:
+        ValueError: If the format is not supported
+    """
+    output_format = output_format or export_format_for(file_path) or "csv"
+    if output_format not in EXPORT_WRITERS:
+        raise ValueError(f"Unsupported export format: {output_format}. Choose from {', '.join(EXPORT_WRITERS)}.")
+    return EXPORT_WRITERS[output_format](file_path, header, compression, progress)
@@ -5,65 +5,173 @@
 Export functionality for the SIM Management application.
 """
 
-import tkinter as tk
-from tkinter import filedialog, messagebox
 import pandas as pd
 import os
-from import_utils import get_imported_data
+from provider_registry import registry
+from export_stream import open_export_writer
+from session import session_store
+from task_runner import OperationCancelled
+import metrics
 
-def export_import_csv():
+# Rows written per chunk by the GUI export
+EXPORT_CHUNK_SIZE = 50000
+
+def build_export_frame(sim_df, start=1, stats=None, provider=None):
+    """Build the Techtool export layout from a standardised SIM DataFrame.
+    
+    Args:
+        sim_df (pd.DataFrame): DataFrame with the standard Cell/Sim/IP columns
+        start (int, optional): First value of the Count column. Defaults to 1.
+        stats (dict, optional): Receives the running "invalid_cell_numbers" count
+        provider (str, optional): Provider of the data. Detected from the IP columns if not given.
+        
+    Returns:
+        pd.DataFrame: DataFrame with Count, Cell Number, Sim Number and Ip Address columns
+    """
+    compiled = registry.get(provider) if provider else registry.for_columns(sim_df.columns)
+    return compiled.transform(sim_df, start, stats)
+
+def write_export_csv(sim_df, file_path, stats=None, compression=None):
+    """Write a standardised SIM DataFrame to a Techtool CSV file.
+    
+    Args:
+        sim_df (pd.DataFrame): DataFrame with the standard Cell/Sim/IP columns
+        file_path (str): Destination path of the CSV file
+        stats (dict, optional): Receives the "invalid_cell_numbers" count
+        compression (str, optional): None, "gzip" or "zstd". Defaults to the file extension.
+        
+    Returns:
+        int: The number of SIM cards written
+    """
+    return write_export_chunks([sim_df], file_path, stats=stats, output_format="csv", compression=compression)
+
+def export_header(providers):
+    """Return the export columns covering several providers, for a combined export.
+    
+    Args:
+        providers (iterable): Provider names
+        
+    Returns:
+        list: Count, Cell Number, Sim Number and the union of the providers' IP export columns
+    """
+    header = ["Count", "Cell Number", "Sim Number"]
+    for provider in providers:
+        for export_name in registry.get(provider).export_columns.values():
+            if export_name not in header:
+                header.append(export_name)
+    return header
+
+def write_export_chunks(chunks, file_path, progress=None, stats=None, header=None, output_format=None,
+                        compression=None):
+    """Write standardised SIM chunks to a Techtool export file as they arrive.
+    
+    Only one chunk is held in memory at a time, so this pairs with the
+    streaming reader to keep peak memory proportional to the chunk size.
+    Each chunk is formatted straight from its export columns (see
+    export_stream.py) rather than through an export DataFrame.
+    
+    Args:
+        chunks (iterable): DataFrames with the standard Cell/Sim/IP columns
+        file_path (str): Destination path of the export file
+        progress (callable, optional): Called with the running SIM count after each chunk
+        stats (dict, optional): Receives the "invalid_cell_numbers" count
+        header (list, optional): Export columns when the chunks come from several providers
+                                 (see export_header). Columns a chunk lacks are left empty.
+        output_format (str, optional): "csv", "ndjson", "parquet" or "arrow". Defaults to the file extension.
+        compression (str, optional): None, "gzip" or "zstd". Defaults to the file extension.
+        
+    Returns:
+        int: The number of SIM cards written
+    """
+    with open_export_writer(file_path, header, output_format, compression, progress) as writer:
+        for chunk in chunks:
+            compiled = registry.for_columns(chunk.columns)
+            with metrics.span("normalise", rows=len(chunk)):
+                columns = compiled.export_arrays(chunk, start=writer.rows + 1, stats=stats)
+            with metrics.span("write", rows=len(chunk)):
+                writer.write(columns)
+    if metrics.enabled() and os.path.exists(file_path):
+        metrics.count("bytes_written", os.path.getsize(file_path))
+    return writer.rows
+
+def write_export_csv_chunks(chunks, file_path, progress=None, stats=None, header=None, compression=None):
+    """Write standardised SIM chunks to a Techtool CSV file as they arrive (see write_export_chunks)."""
+    return write_export_chunks(chunks, file_path, progress, stats, header, "csv", compression)
+
+def export_import_csv(runner=None):
     """Function to create and export the export_sims DataFrame.
     
-    Exports the currently imported SIM data to a CSV file with proper formatting.
+    Exports every dataset imported in the session to one CSV file with proper
+    formatting, or to JSON Lines, Parquet or Arrow depending on the extension
+    chosen in the save dialog. The datasets are written one after the other, chunk by chunk,
+    so they are never concatenated in memory.
+    
+    Args:
+        runner (TaskRunner, optional): Runs the export in the background when given
     """
-    # Get the current data from import_utils
-    global_df = get_imported_data()
+    # tkinter is only needed by the GUI callbacks, the headless converter runs without it
+    from tkinter import filedialog, messagebox
+    
+    datasets = session_store.names()
 
-    if global_df.empty:
+    if not datasets:
         messagebox.showerror("Error", "No data available. Please import Sim's first.")
         return
 
-    try:
-        # Create the export_sims DataFrame
-        export_sims = pd.DataFrame()
-        export_sims["Count"] = range(1, len(global_df) + 1)
-        
-        # Dynamically check if cell numbers already have "27" prefix
-        def add_prefix_if_needed(cell_num):
-            cell_str = str(cell_num)
-            if cell_str.startswith('27'):
-                return cell_str
-            else:
-                return "27" + cell_str
+    # Open file dialog to select the save location
+    file_path = filedialog.asksaveasfilename(
+        title="Save Export CSV",
+        defaultextension=".csv",
+        filetypes=(("CSV Files", "*.csv"), ("Compressed CSV Files", "*.csv.gz;*.csv.zst"),
+                   ("JSON Lines Files", "*.ndjson;*.jsonl"), ("Parquet Files", "*.parquet"),
+                   ("Arrow/Feather Files", "*.arrow;*.feather"), ("All Files", "*.*"))
+    )
+
+    if not file_path:
+        return  # If no file selected, exit the function
+
+    def work(report, cancel_event):
+        stats = {}
+        total = sum(len(session_store.get(name)) for name in datasets)
+        header = export_header(session_store.get(name).provider for name in datasets)
         
-        # Apply the function to add prefix only if needed
-        export_sims["Cell Number"] = global_df["Cell Number"].apply(add_prefix_if_needed)
-        export_sims["Sim Number"] = global_df["Sim Number"]
+        def progress(sim_count):
+            report(f"Exporting... {sim_count:,} of {total:,} SIMs written")
         
-        # Handle IP address columns dynamically
-        if "IP Address" in global_df.columns:
-            export_sims["Ip Address1"] = global_df["IP Address"]
+        try:
+            chunks = session_store.iter_chunks(EXPORT_CHUNK_SIZE, datasets, cancel_event)
+            with metrics.run("export", file=os.path.basename(file_path), datasets=len(datasets)):
+                sim_count = write_export_chunks(chunks, file_path, progress, stats, header)
+        except OperationCancelled:
+            # Do not leave a truncated export behind
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        return sim_count, stats
+    
+    def on_success(result):
+        sim_count, stats = result
+        message = f"File exported successfully!\n\n{sim_count} SIM cards exported to {file_path}"
+        if stats.get("invalid_cell_numbers"):
+            message += f"\n\nWarning: {stats['invalid_cell_numbers']} cell numbers have an invalid length."
+        if runner is not None:
+            runner.show_status(f"Exported {sim_count:,} SIMs to {os.path.basename(file_path)}")
+        messagebox.showinfo("Success", message)
+    
+    def on_error(e):
+        if runner is not None:
+            runner.show_status("Export failed")
+        messagebox.showerror("Error", f"An error occurred: {str(e)}")
         
-        if "IP Address1" in global_df.columns:
-            export_sims["Ip Address1"] = global_df["IP Address1"]
-            
-        if "IP Address2" in global_df.columns:
-            export_sims["Ip Address2"] = global_df["IP Address2"]
-
-        # Open file dialog to select the save location
-        file_path = filedialog.asksaveasfilename(
-            title="Save Export CSV",
-            defaultextension=".csv",
-            filetypes=(("CSV Files", "*.csv"), ("All Files", "*.*"))
-        )
-
-        if not file_path:
-            return  # If no file selected, exit the function
-
-        # Export the DataFrame to CSV
-        sim_count = len(export_sims)
-        export_sims.to_csv(file_path, index=False, encoding='utf-8')
-        messagebox.showinfo("Success", f"File exported successfully!\n\n{sim_count} SIM cards exported to {file_path}")
+    def on_cancel():
+        runner.show_status("Export cancelled")
 
-    except Exception as e:
-        messagebox.showerror("Error", f"An error occurred: {str(e)}")
\ No newline at end of file
+    if runner is None:
+        try:
+            result = work(lambda message: None, None)
+        except Exception as e:
+            on_error(e)
+            return
+        on_success(result)
+    else:
+        runner.submit(work, on_success, on_error, on_cancel)
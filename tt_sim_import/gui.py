@@ -10,57 +10,99 @@ from tkinter import ttk
 import ctypes
 import sys
 import os
-from PIL import Image, ImageTk
-from constants import COLORS
+import logging
+import threading
+from PIL import ImageTk
+from constants import COLORS, PROVIDER_SPECS
 from providers import select_provider, create_logo_canvas
-from import_utils import import_sims
-from export_utils import export_import_csv
 from resource_path import resource_path
+from image_cache import image_cache
+from task_runner import TaskRunner
+import startup_timing
 
-# Store the app logo as a global variable to prevent garbage collection
-app_logo_image = None
+logger = logging.getLogger('tt_sim_import.gui')
 
-def load_app_logo(parent, width=200):
+# Modules of the data stack (pandas/numpy) imported after the window is drawn
+DEFERRED_MODULES = ["numpy", "pandas", "import_utils", "export_utils"]
+
+# Delay after the first paint before warming up the data stack
+WARMUP_DELAY_MS = 50
+
+# Store the app logo images as a global variable to prevent garbage collection,
+# one per rendered width and DPI scale since the logo is shown at several sizes
+app_logo_images = {}
+
+def load_app_logo(parent, width=200, scale=1.0):
     """Load and display the Amecor logo.
     
     Args:
         parent (tk.Widget): Parent widget for the logo
         width (int, optional): Desired width of the logo. Height will be calculated proportionally.
+        scale (float, optional): DPI scale the logo is rendered for (see get_scaling_factor). Defaults to 1.0.
         
     Returns:
         tk.Label: The label containing the logo
     """
-    global app_logo_image
-      # Use the resource_path helper to get the correct path whether we're running from source or as a frozen app
+    # Use the resource_path helper to get the correct path whether we're running from source or as a frozen app
     logo_path = resource_path(os.path.join("tt_sim_import", "assets", "New_Amecor_Logo.png"))
     
     try:
         if os.path.exists(logo_path):
-            # Load and resize the logo image
-            original_img = Image.open(logo_path)
-            
-            # Calculate height to maintain aspect ratio
-            aspect_ratio = original_img.height / original_img.width
-            height = int(width * aspect_ratio)
-            
-            # Resize the image
-            resized_img = original_img.resize((width, height), Image.Resampling.LANCZOS)
+            # Get the logo resized to the width (aspect ratio kept) from the render cache
+            resized_img = image_cache.width(logo_path, width, scale)
             
             # Convert to PhotoImage
-            app_logo_image = ImageTk.PhotoImage(resized_img)
+            if (width, scale) not in app_logo_images:
+                app_logo_images[width, scale] = ImageTk.PhotoImage(resized_img)
             
             # Create a label to display the logo
-            logo_label = tk.Label(parent, image=app_logo_image, bg=COLORS["background"])
+            logo_label = tk.Label(parent, image=app_logo_images[width, scale], bg=COLORS["background"])
             return logo_label
             
     except Exception as e:
-        print(f"Error loading app logo: {e}")
+        logger.warning(f"Error loading app logo: {e}")
     
     # Return None if logo couldn't be loaded
     return None
 
+def import_sims(*args, **kwargs):
+    """Import SIMs, loading the data stack on first use."""
+    return startup_timing.timed_import("import_utils").import_sims(*args, **kwargs)
+
+def export_import_csv(*args, **kwargs):
+    """Export SIMs, loading the data stack on first use."""
+    return startup_timing.timed_import("export_utils").export_import_csv(*args, **kwargs)
+
+def preview_data(*args, **kwargs):
+    """Open the data preview grid, loading the data stack on first use."""
+    return startup_timing.timed_import("preview").preview_data(*args, **kwargs)
+
+def clear_imported_data(*args, **kwargs):
+    """Clear the imported datasets, loading the data stack on first use."""
+    return startup_timing.timed_import("import_utils").clear_imported_data(*args, **kwargs)
+
+def warm_up_data_stack():
+    """Import pandas/numpy and the import/export modules on a background thread.
+    
+    The window is already drawn at this point, so the import cost is hidden
+    behind the user picking a provider. Buttons still work if clicked before
+    the warm-up finishes; the import machinery serialises the two imports.
+    """
+    def warm_up():
+        for module_name in DEFERRED_MODULES:
+            try:
+                startup_timing.timed_import(module_name)
+            except Exception as e:
+                logger.warning(f"Error preloading {module_name}: {e}")
+                return
+        startup_timing.mark("data stack loaded")
+        startup_timing.dump()
+    
+    threading.Thread(target=warm_up, name="data-stack-warmup", daemon=True).start()
+
 def create_gui():
     """Function to create a modern GUI for SIM Management with improved resolution."""
+    startup_timing.mark("create_gui")
     # Enable DPI awareness for Windows to support high-resolution displays
     if sys.platform.startswith('win'):
         try:
@@ -74,6 +116,7 @@ def create_gui():
 
     # Initialize the application window
     root = tk.Tk()
+    startup_timing.mark("tk initialised")
     root.title("SIM Card Management Portal")
     # Increase initial height slightly more
     root.geometry("800x700") 
@@ -105,7 +148,7 @@ def create_gui():
     title_label.pack(side=tk.LEFT)
     
     # Load and display the Amecor logo in the header
-    logo_label = load_app_logo(header_frame, width=80)
+    logo_label = load_app_logo(header_frame, width=80, scale=scaling_factor)
     if logo_label:
         logo_label.pack(side=tk.RIGHT, padx=10)
       # Main content frame with card-like appearance - now using light gray
@@ -123,7 +166,7 @@ def create_gui():
     logo_section.pack(fill=tk.X, pady=(0, 20))
     
     # Add the Amecor logo larger and centered in the main content area
-    main_logo = load_app_logo(logo_section, width=250)
+    main_logo = load_app_logo(logo_section, width=250, scale=scaling_factor)
     if main_logo:
         main_logo.configure(bg=COLORS["card_bg"])
         main_logo.pack(anchor=tk.CENTER)
@@ -159,62 +202,46 @@ def create_gui():
     # Add more padding below the logos frame
     logos_frame.pack(pady=(10, 25))
     
-    # Create container frames for logo + status label
-    vodacom_container = tk.Frame(logos_frame, bg=COLORS["card_bg"])
-    vodacom_container.pack(side=tk.LEFT, padx=20, anchor=tk.N)
-    
-    mtn_container = tk.Frame(logos_frame, bg=COLORS["card_bg"])
-    mtn_container.pack(side=tk.LEFT, padx=20, anchor=tk.N)
-
-    # Create frames for each logo with padding and border
-    vodacom_frame = tk.Frame(vodacom_container, bd=2, relief=tk.FLAT, 
-                            padx=10, 
-                            pady=10, 
-                            bg=COLORS["card_bg"])
-    vodacom_frame.pack()
-    
-    mtn_frame = tk.Frame(mtn_container, bd=2, relief=tk.FLAT, 
-                        padx=10, 
-                        pady=10, 
-                        bg=COLORS["card_bg"])
-    mtn_frame.pack()
-    
-    # Create logos using canvas - standard size
+    # Create a logo and status label for every provider declared in PROVIDER_SPECS
     logo_size = 100
-    vodacom_logo = create_logo_canvas(vodacom_frame, COLORS["vodacom_color"], "Vodacom", 
-                                     width=logo_size, height=logo_size)
-    vodacom_logo.pack()
+    provider_frames = {}
+    status_labels = {}
     
-    mtn_logo = create_logo_canvas(mtn_frame, COLORS["mtn_color"], "MTN", 
-                                 width=logo_size, height=logo_size)
-    mtn_logo.pack()
-
-    # Create status labels below each logo container
-    # Reserve height for ~3 lines of text and add bottom padding
-    vodacom_status_label = tk.Label(vodacom_container, text="", 
-                                   font=('Segoe UI', 8), 
-                                   bg=COLORS["card_bg"], 
-                                   fg=COLORS["text"], 
-                                   wraplength=140, 
-                                   justify=tk.CENTER,
-                                   height=3) # Reserve height for 3 lines
-    vodacom_status_label.pack(pady=(5, 3), fill=tk.X) # Add bottom padding
-
-    mtn_status_label = tk.Label(mtn_container, text="", 
+    for provider_name, spec in PROVIDER_SPECS.items():
+        # Create container frame for logo + status label
+        container = tk.Frame(logos_frame, bg=COLORS["card_bg"])
+        container.pack(side=tk.LEFT, padx=20, anchor=tk.N)
+        
+        # Create frame for the logo with padding and border
+        logo_frame = tk.Frame(container, bd=2, relief=tk.FLAT, 
+                              padx=10, 
+                              pady=10, 
+                              bg=COLORS["card_bg"])
+        logo_frame.pack()
+        provider_frames[provider_name] = logo_frame
+        
+        # Create logo using canvas - standard size
+        logo = create_logo_canvas(logo_frame, spec["color"], provider_name, 
+                                  width=logo_size, height=logo_size, logo_filename=spec.get("logo"),
+                                  scale=scaling_factor)
+        logo.pack()
+        
+        # Create status label below the logo container
+        # Reserve height for ~3 lines of text and add bottom padding
+        status_label = tk.Label(container, text="", 
                                 font=('Segoe UI', 8), 
                                 bg=COLORS["card_bg"], 
                                 fg=COLORS["text"], 
                                 wraplength=140, 
                                 justify=tk.CENTER,
                                 height=3) # Reserve height for 3 lines
-    mtn_status_label.pack(pady=(5, 3), fill=tk.X) # Add bottom padding
-    
-    # Bind click events for logo selection
-    vodacom_logo.bind("<Button-1>", lambda e: select_provider("Vodacom", vodacom_frame, mtn_frame, selected_provider))
-    vodacom_frame.bind("<Button-1>", lambda e: select_provider("Vodacom", vodacom_frame, mtn_frame, selected_provider))
-    
-    mtn_logo.bind("<Button-1>", lambda e: select_provider("MTN", vodacom_frame, mtn_frame, selected_provider))
-    mtn_frame.bind("<Button-1>", lambda e: select_provider("MTN", vodacom_frame, mtn_frame, selected_provider))
+        status_label.pack(pady=(5, 3), fill=tk.X) # Add bottom padding
+        status_labels[provider_name] = status_label
+        
+        # Bind click events for logo selection
+        on_click = lambda e, name=provider_name: select_provider(name, provider_frames, selected_provider)
+        logo.bind("<Button-1>", on_click)
+        logo_frame.bind("<Button-1>", on_click)
     
     # Action buttons section
     buttons_section = tk.Frame(main_frame, bg=COLORS["card_bg"], pady=20)
@@ -247,8 +274,8 @@ def create_gui():
     import_sims_button = tk.Button(
         button_frame, 
         text=f"{import_icon}Import SIM Cards", 
-        # Pass status labels to import_sims
-        command=lambda: import_sims(selected_provider, vodacom_status_label, mtn_status_label),
+        # Pass status labels to import_sims, the work itself runs on the task runner
+        command=lambda: import_sims(selected_provider, status_labels, runner, all_sheets.get()),
         bg=COLORS["primary"],
         fg="white",
         font=('Segoe UI', button_font_size, 'bold'),
@@ -265,7 +292,7 @@ def create_gui():
     export_csv_button = tk.Button(
         button_frame, 
         text=f"{export_icon}Export to CSV", 
-        command=export_import_csv,
+        command=lambda: export_import_csv(runner),
         bg=COLORS["secondary"],
         fg="white",
         font=('Segoe UI', button_font_size, 'bold'),
@@ -278,6 +305,71 @@ def create_gui():
     )
     export_csv_button.pack(side=tk.LEFT)
     
+    # Virtualised grid of the imported rows, only the visible rows are rendered
+    preview_button = tk.Button(
+        button_frame, 
+        text="Preview", 
+        command=lambda: preview_data(root),
+        bg=COLORS["primary"],
+        fg="white",
+        font=('Segoe UI', button_font_size, 'bold'),
+        padx=button_padding_x,
+        pady=button_padding_y,
+        bd=0,
+        cursor="hand2",
+        activebackground=COLORS["accent"],
+        activeforeground="white"
+    )
+    preview_button.pack(side=tk.LEFT, padx=(15, 0))
+    
+    cancel_button = tk.Button(
+        button_frame, 
+        text="Cancel", 
+        command=lambda: runner.cancel(),
+        bg=COLORS["accent"],
+        fg="white",
+        font=('Segoe UI', button_font_size, 'bold'),
+        padx=button_padding_x,
+        pady=button_padding_y,
+        bd=0,
+        cursor="hand2",
+        activebackground=COLORS["selected"],
+        activeforeground="white",
+        disabledforeground=COLORS["card_bg"]
+    )
+    cancel_button.pack(side=tk.LEFT, padx=(15, 0))
+    
+    # Imports accumulate in the session (one dataset per provider and file) until cleared
+    clear_button = tk.Button(
+        button_frame, 
+        text="Clear Data", 
+        command=lambda: clear_imported_data(status_labels, runner),
+        bg=COLORS["accent"],
+        fg="white",
+        font=('Segoe UI', button_font_size, 'bold'),
+        padx=button_padding_x,
+        pady=button_padding_y,
+        bd=0,
+        cursor="hand2",
+        activebackground=COLORS["selected"],
+        activeforeground="white",
+        disabledforeground=COLORS["card_bg"]
+    )
+    clear_button.pack(side=tk.LEFT, padx=(15, 0))
+    
+    # Import every sheet with SIM columns (deliveries split per APN or batch) instead of the first sheet
+    all_sheets = tk.BooleanVar(value=False)
+    all_sheets_check = tk.Checkbutton(
+        button_frame,
+        text="Import all sheets",
+        variable=all_sheets,
+        bg=COLORS["card_bg"],
+        fg=COLORS["text"],
+        activebackground=COLORS["card_bg"],
+        font=('Segoe UI', 10)
+    )
+    all_sheets_check.pack(side=tk.LEFT, padx=(15, 0))
+    
     # Status bar at the bottom
     status_bar = tk.Frame(root, bg=COLORS["primary"], height=30)
     status_bar.pack(side=tk.BOTTOM, fill=tk.X)
@@ -292,6 +384,15 @@ def create_gui():
     )
     status_text.pack(side=tk.LEFT, pady=5)
     
+    # Heavy import/export work runs in the background, one operation at a time
+    runner = TaskRunner(root, status_text, cancel_button, [import_sims_button, export_csv_button, clear_button])
+    
+    def on_close():
+        runner.shutdown()
+        root.destroy()
+    
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    
     # Center the window on screen
     root.update_idletasks()
     width = root.winfo_width()
@@ -299,6 +400,14 @@ def create_gui():
     x = (root.winfo_screenwidth() // 2) - (width // 2)
     y = (root.winfo_screenheight() // 2) - (height // 2)
     root.geometry(f'{width}x{height}+{x}+{y}')
+    startup_timing.mark("window built")
+    
+    # Load pandas/numpy only once the first frame has been painted
+    def after_first_paint():
+        startup_timing.mark("first paint")
+        warm_up_data_stack()
+    
+    root.after(WARMUP_DELAY_MS, after_first_paint)
     
     return root
     
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Precompiled resolution of supplier column headers to the standard column names.
+
+The column variations from constants.py are compiled once into a normalised
+reverse-lookup index; the IP column matchers are precompiled per provider by
+the provider registry. Each distinct header signature is resolved only once,
+repeated layouts are a dictionary hit.
+"""
+
+import threading
+from collections import OrderedDict
+from constants import COLUMN_MAPPINGS
+from provider_registry import registry as default_registry, normalise_header
+
+# Maximum number of header signatures kept in the cache
+DEFAULT_CACHE_SIZE = 256
+
+class ColumnResolutionError(ValueError):
+    """Raised when the columns of a file cannot be mapped to the standard names.
+    
+    Attributes:
+        status_text (str): Short message suitable for a status label
+    """
+    
+    def __init__(self, message, status_text="Missing columns."):
+        super().__init__(message)
+        self.status_text = status_text
+
+class HeaderResolver:
+    """Resolve supplier column headers to the standard column names.
+    
+    Args:
+        column_mappings (dict, optional): Standard name to accepted variations
+        registry (ProviderRegistry, optional): Providers with their compiled IP matchers
+        cache_size (int, optional): Number of header signatures to memoise
+    """
+    
+    def __init__(self, column_mappings=COLUMN_MAPPINGS, registry=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.column_mappings = column_mappings
+        self.registry = registry or default_registry
+        
+        # Reverse-lookup index: normalised variation -> (standard name, priority)
+        self.required_index = {}
+        for standard_name, variations in column_mappings.items():
+            for priority, variation in enumerate(variations):
+                self.required_index.setdefault(normalise_header(variation), (standard_name, priority))
+        
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+    def resolve(self, columns, provider):
+        """Map the columns of a supplier file to the standard column names.
+        
+        Args:
+            columns (list): Column names as found in the file
+            provider (str): The provider the file belongs to ('Vodacom' or 'MTN')
+            
+        Returns:
+            tuple: (dict mapping original column names to standard names,
+                    list of standard IP column names)
+                    
+        Raises:
+            ColumnResolutionError: If a required column cannot be found
+        """
+        # Keyed on the compiled provider, so re-registering a provider invalidates its entries
+        compiled = self.registry.get(provider)
+        signature = (compiled, tuple(str(col) for col in columns))
+        
+        with self._lock:
+            cached = self._cache.get(signature)
+            if cached is not None:
+                self._cache.move_to_end(signature)
+                self.hits += 1
+        
+        if cached is None:
+            try:
+                cached = self._resolve(list(signature[1]), compiled)
+            except ColumnResolutionError as e:
+                cached = e
+            with self._lock:
+                self.misses += 1
+                self._cache[signature] = cached
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                    
+        if isinstance(cached, ColumnResolutionError):
+            raise ColumnResolutionError(str(cached), cached.status_text)
+        
+        renamed_columns, ip_columns = cached
+        return dict(renamed_columns), list(ip_columns)
+    
+    def cache_info(self):
+        """Return the hit/miss statistics of the signature cache."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+    
+    def clear_cache(self):
+        """Forget all memoised header signatures."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def _resolve(self, columns, provider):
+        """Resolve a header signature for a compiled provider without the cache."""
+        # Normalised header -> original name, the last duplicate wins
+        lowercase_columns = {normalise_header(col): col for col in columns}
+        
+        # Pick the highest priority variation present for each standard name
+        best = {}
+        for header, original in lowercase_columns.items():
+            match = self.required_index.get(header)
+            if match is not None:
+                standard_name, priority = match
+                if standard_name not in best or priority < best[standard_name][0]:
+                    best[standard_name] = (priority, original)
+        
+        renamed_columns = {}
+        missing_cols = []
+        for standard_name in provider.required_columns:
+            if standard_name in best:
+                renamed_columns[best[standard_name][1]] = standard_name
+            else:
+                missing_cols.append(standard_name)
+        
+        # If any required column wasn't found, report the accepted variations
+        if missing_cols:
+            error_msg = "File must contain columns: " + ", ".join(missing_cols) + "\n\n"
+            error_msg += "Acceptable column name variations:\n"
+            for col in missing_cols:
+                error_msg += f"- {col}: {', '.join([var.title() for var in self.column_mappings[col]])}\n"
+            error_msg += "\nColumns found in file: " + ", ".join(columns)
+            raise ColumnResolutionError(error_msg, "Missing columns.")
+        
+        # Provider-specific IP address columns, using the provider's compiled matchers
+        ip_renames = provider.match_ip_columns(lowercase_columns, renamed_columns)
+        if ip_renames is None:
+            error_msg = provider.ip_error + "\n\n"
+            error_msg += f"Columns found: {', '.join(columns)}"
+            raise ColumnResolutionError(error_msg, provider.ip_status)
+        
+        renamed_columns.update(ip_renames)
+        return renamed_columns, list(provider.ip_columns)
+
+# Shared resolver compiled once per process
+default_resolver = HeaderResolver()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cache of pre-rendered image assets for the SIM Management GUI.
+
+Rendered variants are keyed by (asset path, mtime, target size, DPI scale),
+kept in memory and persisted as raw RGBA pixels to a local cache directory,
+so warm starts skip PNG decoding and LANCZOS resampling entirely.
+"""
+
+import os
+import sys
+import glob
+import hashlib
+import logging
+from PIL import Image
+
+# Environment variable overriding the on-disk cache location
+IMAGE_CACHE_DIR_ENV = "SIM_IMAGE_CACHE_DIR"
+
+logger = logging.getLogger('tt_sim_import.image_cache')
+
+def default_cache_dir():
+    """Return the per-user directory used to persist rendered images."""
+    override = os.environ.get(IMAGE_CACHE_DIR_ENV)
+    if override:
+        return override
+    if sys.platform.startswith('win'):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "SIM_Management", "cache", "images")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "sim_management", "images")
+
+class ImageCache:
+    """Render image assets at a target size once and reuse the result.
+    
+    Args:
+        cache_dir (str, optional): Directory for persisted renders. None disables persistence.
+    """
+    
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._memory = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+    def fit(self, asset_path, max_width, max_height, scale=1.0):
+        """Return the asset scaled to fit inside a box, keeping its aspect ratio.
+        
+        Args:
+            asset_path (str): Path of the image asset
+            max_width (int): Width of the box in pixels
+            max_height (int): Height of the box in pixels
+            scale (float, optional): DPI scale applied to the box. Defaults to 1.0.
+            
+        Returns:
+            PIL.Image.Image: The rendered image
+        """
+        return self._get(asset_path, ("fit", max_width, max_height), scale)
+    
+    def width(self, asset_path, width, scale=1.0):
+        """Return the asset scaled to a width, keeping its aspect ratio.
+        
+        Args:
+            asset_path (str): Path of the image asset
+            width (int): Target width in pixels
+            scale (float, optional): DPI scale applied to the width. Defaults to 1.0.
+            
+        Returns:
+            PIL.Image.Image: The rendered image
+        """
+        return self._get(asset_path, ("width", width), scale)
+    
+    def stats(self):
+        """Return hit/miss statistics of the cache."""
+        return {"memory_hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+    
+    def _get(self, asset_path, spec, scale):
+        """Look up a rendered variant in memory, then on disk, rendering it if needed."""
+        mtime = os.path.getmtime(asset_path)
+        key = (os.path.abspath(asset_path), mtime, spec, round(scale, 3))
+        
+        image = self._memory.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+        
+        image = self._load(key)
+        if image is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            image = self._render(asset_path, spec, scale)
+            self._store(key, image)
+            
+        self._memory[key] = image
+        return image
+    
+    @staticmethod
+    def _render(asset_path, spec, scale):
+        """Decode the asset and resample it to the requested size."""
+        with Image.open(asset_path) as original:
+            img_width, img_height = original.size
+            if spec[0] == "fit":
+                max_width, max_height = spec[1] * scale, spec[2] * scale
+                ratio = min(max_width / img_width, max_height / img_height)
+                size = (int(img_width * ratio), int(img_height * ratio))
+            else:
+                width = int(spec[1] * scale)
+                size = (width, int(width * img_height / img_width))
+            
+            resized = original.resize((max(size[0], 1), max(size[1], 1)), Image.Resampling.LANCZOS)
+        return resized.convert("RGBA")
+    
+    def _file_prefix(self, key):
+        """Return the cache file prefix shared by all mtimes of a variant."""
+        path, _, spec, scale = key
+        stem = os.path.splitext(os.path.basename(path))[0]
+        variant = "-".join(str(part) for part in spec)
+        return os.path.join(self.cache_dir, f"{stem}-{variant}-{scale}")
+    
+    def _file_path(self, key):
+        """Return the cache file of a rendered variant."""
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+        return f"{self._file_prefix(key)}-{digest}.rgba"
+    
+    def _load(self, key):
+        """Load a persisted render, or return None."""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._file_path(key), "rb") as f:
+                header = f.readline().decode("ascii").split()
+                width, height = int(header[0]), int(header[1])
+                return Image.frombytes("RGBA", (width, height), f.read())
+        except (OSError, ValueError, IndexError):
+            return None
+    
+    def _store(self, key, image):
+        """Persist a render, replacing renders of older versions of the asset."""
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            file_path = self._file_path(key)
+            for stale in glob.glob(glob.escape(self._file_prefix(key)) + "-*.rgba"):
+                if stale != file_path:
+                    os.remove(stale)
+            temp_path = file_path + ".tmp"
+            with open(temp_path, "wb") as f:
+                f.write(f"{image.width} {image.height}\n".encode("ascii"))
+                f.write(image.tobytes())
+            os.replace(temp_path, file_path)
+        except OSError as e:
+            # The cache is an optimisation only, rendering still works without it
+            logger.warning(f"Could not persist rendered image: {e}")
+
+# Shared cache used by the GUI
+image_cache = ImageCache(default_cache_dir())
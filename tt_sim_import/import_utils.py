@@ -5,191 +5,260 @@
 Import functionality for the SIM Management application.
 """
 
-import tkinter as tk
-from tkinter import filedialog, messagebox
 import pandas as pd
 import os
-from constants import COLUMN_MAPPINGS, VODACOM_IP_VARIANTS, MTN_IP1_VARIANTS, MTN_IP2_VARIANTS
+from constants import COLUMN_MAPPINGS, SOURCE_SHEET_COLUMN, COLUMN_MAPPING_ATTR
+from header_resolver import ColumnResolutionError, default_resolver
+from provider_registry import registry
+from parse_cache import parse_cache
+from session import session_store
+from inventory import record_import
+import metrics
 
-# Define global_df as a module-level variable
-global_df = pd.DataFrame()
+def resolve_columns(columns, provider):
+    """Map the columns of a supplier file to the standard column names.
+    
+    Resolution is delegated to the shared, precompiled HeaderResolver, so
+    repeated header layouts are resolved from its signature cache.
+    
+    Args:
+        columns (list): Column names as found in the file
+        provider (str): The provider the file belongs to, e.g. 'Vodacom' or 'MTN'
+        
+    Returns:
+        tuple: (dict mapping original column names to standard names,
+                list of standard IP column names)
+                
+    Raises:
+        ColumnResolutionError: If a required column cannot be found
+    """
+    return default_resolver.resolve(columns, provider)
 
-def import_sims(selected_provider, vodacom_status_label, mtn_status_label):
-    """Function to import an Excel file and update the status label.
+def infer_provider(columns, file_path=None):
+    """Guess the provider of a supplier file from its name and column headers.
     
     Args:
-        selected_provider (tk.StringVar): StringVar containing the selected provider
-        vodacom_status_label (tk.Label): Label to display Vodacom import status
-        mtn_status_label (tk.Label): Label to display MTN import status
+        columns (list): Column names as found in the file
+        file_path (str, optional): Path of the file, used for name based hints
         
     Returns:
-        pd.DataFrame: The imported data as a DataFrame, or empty DataFrame if import fails
+        str: The provider name, or None if the provider cannot be determined
     """
-    global global_df
+    return registry.infer(columns, file_path)
 
-    # Clear previous status messages
-    vodacom_status_label.config(text="", fg="green") # Reset color
-    mtn_status_label.config(text="", fg="green") # Reset color
+def select_sim_columns(df, provider):
+    """Rename the columns of a raw supplier DataFrame and keep only the SIM columns.
+    
+    Args:
+        df (pd.DataFrame): The raw DataFrame as read from the supplier file
+        provider (str): The provider the file belongs to, e.g. 'Vodacom' or 'MTN'
+        
+    Returns:
+        pd.DataFrame: DataFrame with the standard Cell/Sim/IP columns, the column mapping in its attrs
+        
+    Raises:
+        ColumnResolutionError: If a required column cannot be found
+    """
+    with metrics.span("resolve_headers"):
+        renamed_columns, _ = resolve_columns(df.columns, provider)
+    with metrics.span("rename", rows=len(df)):
+        df = df.rename(columns={col: renamed_columns.get(str(col), col) for col in df.columns})
+    
+    # Keep the required columns including all IP columns of the provider
+    compiled = registry.get(provider)
+    with metrics.span("validate_provider", rows=len(df)):
+        report = compiled.validate(df)
+    if report["missing_columns"]:
+        raise ColumnResolutionError(
+            "File must contain columns: " + ", ".join(report["missing_columns"]), "Missing columns.")
+    sim_df = df[compiled.columns]
+    sim_df.attrs[COLUMN_MAPPING_ATTR] = {original: standard for original, standard in renamed_columns.items()
+                                         if standard in compiled.columns}
+    return sim_df
 
+def read_sim_file(file_path, provider=None):
+    """Read a supplier Excel file into a standardised DataFrame.
+    
+    Args:
+        file_path (str): Path to the Excel file
+        provider (str, optional): The provider name. Inferred from the file if not given.
+        
+    Returns:
+        tuple: (provider name, pd.DataFrame with the standard SIM columns)
+        
+    Raises:
+        ColumnResolutionError: If the provider or a required column cannot be determined
+    """
+    from excel_stream import find_header_layout, HEADER_SCAN_ROWS
+    
+    # The header row is searched like the streaming reader does, so title rows above it are accepted
+    with metrics.span("read", bytes=os.path.getsize(file_path)) as timed:
+        leading = pd.read_excel(file_path, header=None, nrows=HEADER_SCAN_ROWS, dtype=object)
+        layout = find_header_layout(leading.itertuples(index=False, name=None), provider, file_path)
+        # Identifiers are read as text: as floats, 19-20 digit ICCIDs lose their last digits
+        df = pd.read_excel(file_path, header=layout["header_row"], dtype=str)
+        timed.add(rows=len(df))
+    
+    provider = layout["provider"]
+    return provider, select_sim_columns(df, provider)
+
+def import_sims(selected_provider, status_labels, runner=None, all_sheets=False):
+    """Function to import an Excel file and update the status label.
+    
+    Args:
+        selected_provider (tk.StringVar): StringVar containing the selected provider
+        status_labels (dict): Provider name -> tk.Label displaying that provider's import status
+        runner (TaskRunner, optional): Runs the import in the background when given
+        all_sheets (bool, optional): Import every sheet with SIM columns instead of the first sheet
+        
+    The imported data is added to the session store next to the data of
+    earlier imports; importing the same file again replaces its dataset.
+    
+    Returns:
+        pd.DataFrame: The imported data as a DataFrame, or empty DataFrame if import fails.
+                      None when the import was started in the background.
+    """
+    # tkinter is only needed by the GUI callbacks, the headless converter runs without it
+    from tkinter import filedialog, messagebox
+    
     # Check if provider is selected
     if not selected_provider.get():
-        messagebox.showerror("Error", "Please select a provider (Vodacom or MTN) first")
+        messagebox.showerror("Error", f"Please select a provider ({' or '.join(registry.names())}) first")
         return pd.DataFrame()
-
+    
     provider = selected_provider.get()
-    # Determine the correct status label to update
-    status_label = vodacom_status_label if provider == "Vodacom" else mtn_status_label
-
+    # Determine the correct status label to update, the other providers keep their imported data
+    status_label = status_labels[provider]
+    status_label.config(text="", fg="green") # Reset color
+    
     # Open file dialog to select the Excel file
     file_path = filedialog.askopenfilename(
         title=f"Select {provider} Import Sim's File",
         filetypes=(("Excel Files", "*.xlsx;*.xls"), ("All Files", "*.*"))
     )
-
+    
     if not file_path:
         status_label.config(text="Import cancelled.", fg="orange")
         return pd.DataFrame()  # If no file selected, return empty DataFrame
-
-    try:
-        # Read the Excel file into a DataFrame
-        df = pd.read_excel(file_path)
-        
-        # Print column names to debug
-        print("Available columns in the file:", df.columns.tolist())
-        
-        # Create a lowercase version of column names for matching
-        lowercase_columns = {col.lower().strip(): col for col in df.columns}
-        
-        print("Lowercase columns for matching:", lowercase_columns)
-        
-        # Find and rename columns based on variations
-        renamed_columns = {}
-        missing_cols = []
-        
-        for standard_name, variations in COLUMN_MAPPINGS.items():
-            found = False
-            for variation in variations:
-                if variation in lowercase_columns:
-                    # Map the actual column name (preserving case) to the standard name
-                    renamed_columns[lowercase_columns[variation]] = standard_name
-                    found = True
-                    break
-                    
-            if not found:
-                missing_cols.append(standard_name)
-        
-        # If any required column wasn't found, show detailed error
-        if missing_cols:
-            # Print more debug info
-            print("Missing columns:", missing_cols)
-            print("Lowercase columns in file:", lowercase_columns)
-            
-            error_msg = "File must contain columns: " + ", ".join(missing_cols) + "\n\n"
-            error_msg += "Acceptable column name variations:\n"
-            for col in missing_cols:
-                error_msg += f"- {col}: {', '.join([var.title() for var in COLUMN_MAPPINGS[col]])}\n"
-            error_msg += "\nColumns found in file: " + ", ".join(df.columns.tolist())
-            messagebox.showerror("Error", error_msg) # Keep critical errors as popups
-            status_label.config(text="Import failed: Missing columns.", fg="red")
+    
+    def parse(progress=None, cancel_event=None):
+        # Read the Excel file and resolve the standard columns
+        if all_sheets:
+            from multi_sheet import read_all_sheets
+            return read_all_sheets(file_path, provider, progress=progress, cancel_event=cancel_event)
+        if runner is None:
+            return read_sim_file(file_path, provider)
+        from excel_stream import read_sim_file_chunked
+        return read_sim_file_chunked(file_path, provider, progress=progress, cancel_event=cancel_event)
+    
+    def load(parse_file):
+        # Re-imports of the same workbook are served from the parse cache, then recorded in the inventory
+        with metrics.run("import", provider=provider, file=os.path.basename(file_path)):
+            result = parse_cache.load(file_path, provider, parse_file, all_sheets)
+            record_import(provider, file_path, result[1], result[2], cached=result[5])
+            return result
+    
+    if runner is None:
+        try:
+            _, columns, flags, summary, mapping, _ = load(parse)
+        except Exception as e:
+            _show_import_error(e, status_label)
             return pd.DataFrame()
-            
-        # Rename columns to standard names
-        df = df.rename(columns=renamed_columns)
-
-        # Provider-specific validation for IP addresses
-        if provider == "Vodacom":
-            # Vodacom always has 1 IP Address - check various naming patterns (case insensitive)
-            ip_col_found = None
-            
-            for var in VODACOM_IP_VARIANTS:
-                matching_cols = [col for col in lowercase_columns if var == col]
-                if matching_cols:
-                    ip_col_found = lowercase_columns[matching_cols[0]]
-                    break
-                    
-            if not ip_col_found:
-                error_msg = "Vodacom file must contain an IP Address column.\n\n"
-                error_msg += f"Columns found: {', '.join(df.columns.tolist())}"
-                messagebox.showerror("Error", error_msg) # Keep critical errors as popups
-                status_label.config(text="Import failed: Missing IP column.", fg="red")
-                return pd.DataFrame()
-                
-            # Standardize the IP column name
-            df = df.rename(columns={ip_col_found: "IP Address"})
-            ip_columns = ["IP Address"]
-            
-        else:  # MTN
-            # MTN needs 2 IP addresses - check various naming patterns (case insensitive)
-            ip1_col_found = None
-            ip2_col_found = None
-            
-            # Print available columns for debug
-            print("Looking for IP1 columns with variations:", MTN_IP1_VARIANTS)
-            print("Looking for IP2 columns with variations:", MTN_IP2_VARIANTS)
-            
-            # More flexible matching for IP columns - check if any variant is contained in any column name
-            for col_lower, col_original in lowercase_columns.items():
-                # For primary IP
-                for var in MTN_IP1_VARIANTS:
-                    if var in col_lower or col_lower in var:
-                        ip1_col_found = col_original
-                        print(f"Found primary IP column: '{col_original}'")
-                        break
-                if ip1_col_found:
-                    break  # Exit if found
-            
-            # Same for secondary IP
-            for col_lower, col_original in lowercase_columns.items():
-                # For secondary IP
-                for var in MTN_IP2_VARIANTS:
-                    if var in col_lower or col_lower in var:
-                        ip2_col_found = col_original
-                        print(f"Found secondary IP column: '{col_original}'")
-                        break
-                if ip2_col_found:
-                    break  # Exit if found
-            
-            if not ip1_col_found or not ip2_col_found:
-                error_msg = "MTN file must contain both primary and secondary IP address columns.\n\n"
-                error_msg += "Acceptable column names for primary IP: IP Address1, IP1, CN, CN-IP\n"
-                error_msg += "Acceptable column names for secondary IP: IP Address2, IP2, NL, NL-IP\n\n"
-                error_msg += f"Columns found: {', '.join(df.columns.tolist())}"
-                messagebox.showerror("Error", error_msg) # Keep critical errors as popups
-                status_label.config(text="Import failed: Missing IP columns.", fg="red")
-                return pd.DataFrame()
-                
-            # Standardize the IP column names
-            df = df.rename(columns={ip1_col_found: "IP Address1", ip2_col_found: "IP Address2"})
-            ip_columns = ["IP Address1", "IP Address2"]
-
-        # Create the global DataFrame with the required columns including all available IP columns
-        columns_to_keep = list(COLUMN_MAPPINGS.keys()) + ip_columns
-        global_df = df[columns_to_keep]
-        sim_count = len(global_df)
+        dataset = session_store.add(provider, file_path, columns, flags, summary, mapping)
+        _show_import_success(dataset, status_label)
+        return dataset.frame()
+    
+    def work(report, cancel_event):
+        def progress(row_count):
+            report(f"Importing {provider} SIMs... {row_count:,} rows read")
         
-        # Update the status label instead of showing a messagebox
-        success_message = f"{provider} Sim's imported successfully!\n{sim_count} SIMs ({len(ip_columns)} IP cols)."
-        status_label.config(text=success_message, fg="green")
+        def parse_and_report():
+            parsed_provider, sim_df = parse(progress, cancel_event)
+            report(f"Validating {len(sim_df):,} {provider} SIMs...")
+            return parsed_provider, sim_df
         
-        # Clear the other provider's status label
-        if provider == "Vodacom":
-            mtn_status_label.config(text="")
-        else:
-            vodacom_status_label.config(text="")
-            
-        return global_df
+        report(f"Importing {provider} SIMs...")
+        return load(parse_and_report)
+    
+    def on_success(result):
+        _, columns, flags, summary, mapping, cached = result
+        # The session is only modified on the GUI thread
+        dataset = session_store.add(provider, file_path, columns, flags, summary, mapping)
+        _show_import_success(dataset, status_label)
+        source = " (cached)" if cached else ""
+        runner.show_status(f"Imported {len(dataset):,} {provider} SIMs{source}. Session: {session_store.describe()}")
+    
+    def on_error(e):
+        _show_import_error(e, status_label)
+        runner.show_status("Import failed")
+    
+    def on_cancel():
+        status_label.config(text="Import cancelled.", fg="orange")
+        runner.show_status("Import cancelled")
+    
+    status_label.config(text="Importing...", fg="gray")
+    runner.submit(work, on_success, on_error, on_cancel)
+    return None
+
+def _show_import_success(dataset, status_label):
+    """Report an imported dataset in its provider's status label.
+    
+    Args:
+        dataset (Dataset): The dataset added to the session store
+        status_label (tk.Label): The status label of the dataset's provider
+    """
+    columns = [col for col in dataset.columns if col != SOURCE_SHEET_COLUMN]
+    ip_count = len(columns) - len(COLUMN_MAPPINGS)
+    summary = dataset.summary
+    
+    # Update the status label instead of showing a messagebox
+    success_message = f"{dataset.provider} Sim's imported successfully!\n{len(dataset)} SIMs ({ip_count} IP cols)."
+    if SOURCE_SHEET_COLUMN in dataset.columns:
+        success_message += f"\nFrom {len(set(dataset.columns[SOURCE_SHEET_COLUMN]))} sheets."
+    provider_files = len(session_store.datasets(dataset.provider))
+    if provider_files > 1:
+        success_message += f"\n{provider_files} {dataset.provider} files in session."
+    if summary.get("flagged_rows"):
+        success_message += f"\n{summary['flagged_rows']} rows failed validation."
+    status_label.config(text=success_message, fg="orange" if summary.get("flagged_rows") else "green")
 
-    except Exception as e:
-        error_message = f"An error occurred: {str(e)}"
+def _show_import_error(error, status_label):
+    """Report a failed import in a popup and the status label."""
+    from tkinter import messagebox
+    
+    if isinstance(error, ColumnResolutionError):
+        messagebox.showerror("Error", str(error)) # Keep critical errors as popups
+        status_label.config(text=f"Import failed: {error.status_text}", fg="red")
+    else:
+        error_message = f"An error occurred: {str(error)}"
         messagebox.showerror("Error", error_message) # Keep unexpected errors as popups
         status_label.config(text="Import failed: Unexpected error.", fg="red")
-        return pd.DataFrame()
+
+def clear_imported_data(status_labels, runner=None):
+    """Remove every imported dataset from the session.
+    
+    Args:
+        status_labels (dict): Provider name -> tk.Label displaying that provider's import status
+        runner (TaskRunner, optional): Its status bar shows the session state
+    """
+    session_store.clear()
+    for label in status_labels.values():
+        label.config(text="", fg="green")
+    if runner is not None:
+        runner.show_status(f"Session: {session_store.describe()}")
 
 def get_imported_data():
-    """Function to get the currently imported data.
+    """Function to get the most recently imported data.
+    
+    The session holds the dataset as compact column arrays, so this expands
+    the whole dataset to text in a new DataFrame. Iterate over
+    session_store.latest().iter_chunks() to read it in bounded memory.
     
     Returns:
-        pd.DataFrame: The current global DataFrame
+        pd.DataFrame: A copy of the latest dataset in the session store as text,
+                      or an empty DataFrame if nothing was imported
     """
-    global global_df
-    return global_df
\ No newline at end of file
+    dataset = session_store.latest()
+    if dataset is None:
+        return pd.DataFrame()
+    return dataset.frame()
@@ -0,0 +1,539 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Optional persistent SQLite inventory of the imported SIMs.
+
+Every successful import (GUI, batch, watch folder and service) is upserted
+into one table keyed by ICCID holding the canonical cell number, the IP
+addresses (canonical dotted quads) and the import the SIM was last seen in;
+the imports table records the provider and source file of each import. Rows
+are sent with executemany in batches inside a single transaction, so a
+1M-row import is one commit (streamed conversions commit once per chunk). Indexes on the ICCID,
+the cell number, the IP addresses and the import (and on the provider and
+source file of the imports) turn lookups ("which SIM has this IP"), duplicate
+checks and exports into indexed queries instead of re-parsing workbooks.
+The provider is kept per import rather than per SIM: every extra index on
+the SIM table adds about 3 s per 1M upserted rows.
+
+Set the SIM_INVENTORY environment variable to enable it:
+    SIM_INVENTORY=1              use the per-user default database
+    SIM_INVENTORY=inventory.db   use the given database file
+
+Usage:
+    python inventory.py [--db FILE] (--ip IP | --iccid ICCID | --msisdn NUMBER | --shared-ips |
+                                     --imports | --export FILE [--provider NAME] [--source-file PATH])
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+from itertools import islice
+import numpy as np
+import pandas as pd
+from provider_registry import registry
+from normalise import normalise_msisdn, identifier_text
+from ip_engine import parse_ipv4, format_ipv4
+from compact import text_frame
+import metrics
+
+# Environment variable enabling the inventory: "1" for the default database, or a database path
+INVENTORY_ENV = "SIM_INVENTORY"
+
+# Rows sent to SQLite per executemany call
+UPSERT_BATCH_SIZE = 50000
+
+# Rows converted to text at a time when upserting compact columns
+CONVERT_CHUNK_SIZE = 100000
+
+# Page cache per connection in KiB, large enough to keep the index pages of a big import in memory
+CACHE_KIB = 256 * 1024
+
+# Number of IP address columns stored per SIM
+IP_SLOTS = 2
+
+# Errors of a failed recording (database, file system, and conversion of unexpected data)
+_RECORD_ERRORS = (sqlite3.Error, OSError, ValueError, TypeError, KeyError)
+
+logger = logging.getLogger('tt_sim_import.inventory')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS imports (
+    id INTEGER PRIMARY KEY,
+    provider TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    imported_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sims (
+    iccid TEXT NOT NULL UNIQUE,
+    msisdn TEXT NOT NULL,
+    ip_address1 TEXT,
+    ip_address2 TEXT,
+    import_id INTEGER NOT NULL REFERENCES imports(id),
+    flags INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sims_msisdn ON sims (msisdn);
+CREATE INDEX IF NOT EXISTS sims_ip_address1 ON sims (ip_address1);
+CREATE INDEX IF NOT EXISTS sims_ip_address2 ON sims (ip_address2);
+CREATE INDEX IF NOT EXISTS sims_import ON sims (import_id);
+CREATE INDEX IF NOT EXISTS imports_provider ON imports (provider);
+CREATE INDEX IF NOT EXISTS imports_source_file ON imports (source_file);
+"""
+
+_UPSERT = """
+INSERT INTO sims (iccid, msisdn, ip_address1, ip_address2, import_id, flags)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (iccid) DO UPDATE SET
+    msisdn = excluded.msisdn,
+    ip_address1 = excluded.ip_address1,
+    ip_address2 = excluded.ip_address2,
+    import_id = excluded.import_id,
+    flags = excluded.flags
+"""
+
+_SELECT_SIMS = """
+SELECT sims.iccid, sims.msisdn, sims.ip_address1, sims.ip_address2, imports.provider, imports.source_file, sims.flags
+FROM sims JOIN imports ON imports.id = sims.import_id
+"""
+
+def default_inventory_path():
+    """Return the per-user path of the inventory database."""
+    if sys.platform.startswith('win'):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "SIM_Management", "inventory.db")
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "sim_management", "inventory.db")
+
+def inventory_path_from_env():
+    """Return the database selected by SIM_INVENTORY, or None if the inventory is disabled."""
+    target = os.environ.get(INVENTORY_ENV, "")
+    if not target or target == "0":
+        return None
+    return default_inventory_path() if target == "1" else target
+
+def canonical_ip_text(values):
+    """Return IP addresses as canonical dotted quads where they parse, stripped text otherwise.
+    
+    Returns:
+        np.ndarray: Object array of str, None for blank values
+    """
+    text = identifier_text(values).to_numpy(copy=True)
+    addresses, valid = parse_ipv4(text)
+    if valid.any():
+        text[valid] = format_ipv4(addresses[valid])
+    text[text == ""] = None
+    return text
+
+class Inventory:
+    """SQLite inventory of imported SIMs, keyed by ICCID.
+    
+    Each call opens its own connection, so the inventory can be used from
+    the GUI thread and from background tasks alike.
+    
+    Args:
+        db_path (str, optional): Database file. None disables the inventory.
+    """
+    
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self._initialised = False
+    
+    @property
+    def enabled(self):
+        """True if a database is configured."""
+        return bool(self.db_path)
+    
+    def connect(self):
+        """Open a connection, creating the database and its schema on first use.
+        
+        Returns:
+            sqlite3.Connection: Connection in autocommit mode (transactions are explicit)
+        """
+        if not self.enabled:
+            raise ValueError(f"The SIM inventory is disabled. Set {INVENTORY_ENV} to enable it.")
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute(f"PRAGMA cache_size = -{CACHE_KIB}")
+        if not self._initialised:
+            connection.executescript(_SCHEMA)
+            self._initialised = True
+        return connection
+    
+    def upsert(self, provider, source_file, sim_data, flags=None):
+        """Insert or update the SIMs of an import in one transaction.
+        
+        A SIM already in the inventory (same ICCID) takes the cell number,
+        IP addresses, provider and source of this import. Rows without an
+        ICCID cannot be keyed and are skipped.
+        
+        Args:
+            provider (str): Provider of the data
+            source_file (str): Path of the imported workbook
+            sim_data (pd.DataFrame or dict): Standard columns as a DataFrame, or compact
+                                             column arrays (see compact.py)
+            flags (np.ndarray, optional): Validation flags per row
+        
+        Returns:
+            dict: rows written, inserted (new ICCIDs), updated and skipped
+        """
+        compiled = registry.get(provider)
+        row_count = _row_count(sim_data)
+        if isinstance(sim_data, pd.DataFrame):
+            chunks = (sim_data.iloc[start:start + CONVERT_CHUNK_SIZE]
+                      for start in range(0, row_count, CONVERT_CHUNK_SIZE))
+        else:
+            chunks = (text_frame(sim_data, start, start + CONVERT_CHUNK_SIZE)
+                      for start in range(0, row_count, CONVERT_CHUNK_SIZE))
+        flags = np.zeros(row_count, dtype=np.int64) if flags is None else np.asarray(flags, dtype=np.int64)
+        
+        connection = self.connect()
+        try:
+            with metrics.span("inventory", rows=row_count):
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    before = connection.execute("SELECT COUNT(*) FROM sims").fetchone()[0]
+                    import_id = self._add_import(connection, provider, source_file, row_count)
+                    written = 0
+                    start = 0
+                    for chunk in chunks:
+                        chunk_flags = flags[start:start + len(chunk)]
+                        written += self._write(connection, compiled, chunk, chunk_flags, import_id)
+                        start += len(chunk)
+                    after = connection.execute("SELECT COUNT(*) FROM sims").fetchone()[0]
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+        finally:
+            connection.close()
+        return {"rows": written, "inserted": after - before, "updated": written - (after - before),
+                "skipped": row_count - written}
+    
+    @staticmethod
+    def _add_import(connection, provider, source_file, row_count):
+        """Insert an import record and return its id."""
+        return connection.execute(
+            "INSERT INTO imports (provider, source_file, rows, imported_at) VALUES (?, ?, ?, ?)",
+            (provider, os.path.abspath(source_file), row_count, time.time())).lastrowid
+    
+    def _write(self, connection, compiled, chunk, flags, import_id):
+        """Upsert the keyed rows of a chunk in batches and return their number."""
+        rows = self._rows(compiled, chunk, flags, import_id)
+        written = 0
+        while True:
+            batch = list(islice(rows, UPSERT_BATCH_SIZE))
+            if not batch:
+                return written
+            connection.executemany(_UPSERT, batch)
+            written += len(batch)
+    
+    @staticmethod
+    def _rows(compiled, chunk, flags, import_id):
+        """Yield the parameter tuples of a chunk's keyed rows."""
+        iccids = identifier_text(chunk["Sim Number"]).to_numpy()
+        msisdns, _ = normalise_msisdn(chunk["Cell Number"], compiled.country_code, compiled.national_number_length)
+        addresses = [canonical_ip_text(chunk[column]) if column in chunk.columns else np.full(len(chunk), None)
+                     for column in compiled.ip_columns[:IP_SLOTS]]
+        addresses += [np.full(len(chunk), None)] * (IP_SLOTS - len(addresses))
+        keyed = iccids != ""
+        for iccid, msisdn, ip_address1, ip_address2, flag in zip(
+                iccids[keyed].tolist(), msisdns.to_numpy()[keyed].tolist(), addresses[0][keyed].tolist(),
+                addresses[1][keyed].tolist(), flags[keyed].tolist()):
+            yield iccid, msisdn, ip_address1, ip_address2, import_id, flag
+    
+    def _query(self, sql, parameters=()):
+        """Run a query and return the rows as dictionaries."""
+        connection = self.connect()
+        try:
+            cursor = connection.execute(sql, parameters)
+            names = [description[0] for description in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+        finally:
+            connection.close()
+    
+    def find_by_ip(self, address):
+        """Return the SIMs using an IP address in either IP column."""
+        text = canonical_ip_text([address])[0]
+        return self._query(_SELECT_SIMS + " WHERE sims.ip_address1 = ? OR sims.ip_address2 = ?", (text, text))
+    
+    def find_by_iccid(self, iccid):
+        """Return the SIM with an ICCID, or None."""
+        rows = self._query(_SELECT_SIMS + " WHERE sims.iccid = ?", (identifier_text([iccid])[0],))
+        return rows[0] if rows else None
+    
+    def find_by_msisdn(self, msisdn, provider=None):
+        """Return the SIMs with a cell number, canonicalised with the provider's numbering rules."""
+        compiled = registry.get(provider) if provider else next(iter(registry))
+        numbers, _ = normalise_msisdn(pd.Series([msisdn]), compiled.country_code, compiled.national_number_length)
+        return self._query(_SELECT_SIMS + " WHERE sims.msisdn = ?", (numbers.iloc[0],))
+    
+    def existing(self, column, values):
+        """Return the values already in the inventory, e.g. to check a new delivery for duplicates.
+        
+        Args:
+            column (str): "iccid", "msisdn", "ip_address1" or "ip_address2"
+            values (iterable): Canonical values to look up
+        
+        Returns:
+            set: The values found, each found through the column's index
+        """
+        if column not in ("iccid", "msisdn", "ip_address1", "ip_address2"):
+            raise ValueError(f"Unknown inventory column: {column}")
+        connection = self.connect()
+        try:
+            connection.execute("CREATE TEMP TABLE lookup (value TEXT PRIMARY KEY) WITHOUT ROWID")
+            values = iter(values)
+            while True:
+                batch = [(value,) for value in islice(values, UPSERT_BATCH_SIZE)]
+                if not batch:
+                    break
+                connection.executemany("INSERT OR IGNORE INTO lookup VALUES (?)", batch)
+            rows = connection.execute(f"SELECT DISTINCT sims.{column} FROM lookup "
+                                      f"JOIN sims ON sims.{column} = lookup.value").fetchall()
+            return {value for value, in rows}
+        finally:
+            connection.close()
+    
+    def shared_ips(self):
+        """Return the IP addresses used by more than one SIM.
+        
+        Returns:
+            dict: IP address -> list of ICCIDs
+        """
+        connection = self.connect()
+        try:
+            rows = connection.execute("""
+                WITH addresses (ip, iccid) AS (
+                    SELECT ip_address1, iccid FROM sims WHERE ip_address1 IS NOT NULL
+                    UNION SELECT ip_address2, iccid FROM sims WHERE ip_address2 IS NOT NULL
+                )
+                SELECT ip, iccid FROM addresses
+                WHERE ip IN (SELECT ip FROM addresses GROUP BY ip HAVING COUNT(*) > 1)
+                ORDER BY ip, iccid
+            """).fetchall()
+        finally:
+            connection.close()
+        shared = {}
+        for ip, iccid in rows:
+            shared.setdefault(ip, []).append(iccid)
+        return shared
+    
+    def imports(self):
+        """Return the recorded imports, oldest first."""
+        return self._query("SELECT id, provider, source_file, rows, imported_at FROM imports ORDER BY id")
+    
+    def recorded(self, provider, source_file, rows=None):
+        """Return True if an import of a file was recorded for a provider (with that many rows, if given)."""
+        sql = "SELECT 1 FROM imports WHERE source_file = ? AND provider = ?"
+        parameters = [os.path.abspath(source_file), provider]
+        if rows is not None:
+            sql += " AND rows = ?"
+            parameters.append(int(rows))
+        return bool(self._query(sql + " LIMIT 1", parameters))
+    
+    def count(self, provider=None):
+        """Return the number of SIMs in the inventory, optionally of one provider."""
+        if provider:
+            return self._query("SELECT COUNT(*) AS sims FROM sims WHERE import_id IN "
+                               "(SELECT id FROM imports WHERE provider = ?)", (provider,))[0]["sims"]
+        return self._query("SELECT COUNT(*) AS sims FROM sims")[0]["sims"]
+    
+    def iter_chunks(self, provider, source_file=None, chunk_size=CONVERT_CHUNK_SIZE):
+        """Yield a provider's SIMs as standardised DataFrames, e.g. for write_export_chunks.
+        
+        Args:
+            provider (str): Provider whose SIMs are exported (through the provider index)
+            source_file (str, optional): Only the SIMs last imported from this workbook
+            chunk_size (int, optional): Rows per DataFrame
+        
+        Yields:
+            pd.DataFrame: Chunks with the provider's standard Cell/Sim/IP columns
+        """
+        compiled = registry.get(provider)
+        imports = "SELECT id FROM imports WHERE provider = ?"
+        parameters = [provider]
+        if source_file:
+            imports += " AND source_file = ?"
+            parameters.append(os.path.abspath(source_file))
+        sql = f"SELECT msisdn, iccid, ip_address1, ip_address2 FROM sims WHERE import_id IN ({imports})"
+        columns = ["Cell Number", "Sim Number"] + compiled.ip_columns[:IP_SLOTS]
+        
+        connection = self.connect()
+        try:
+            cursor = connection.execute(sql + " ORDER BY rowid", parameters)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                chunk = pd.DataFrame([row[:len(columns)] for row in rows], columns=columns, dtype=object)
+                yield chunk.fillna("")
+        finally:
+            connection.close()
+
+class ImportRecorder:
+    """
+    Records an import converted chunk by chunk (see batch.convert_file) in the inventory.
+    
+    Each chunk is upserted in its own short transaction, so conversions running
+    in parallel are not locked out of the database while a large file streams.
+    Like record_import, a failure is logged and ends the recording without
+    failing the conversion; chunks recorded before it are kept.
+    """
+    
+    def __init__(self, store, provider, source_file):
+        self.store = store
+        self.provider = provider
+        self.source_file = source_file
+        self.counts = {"rows": 0, "inserted": 0, "updated": 0, "skipped": 0}
+        self.failed = False
+        self._compiled = registry.get(provider)
+        self._connection = None
+        self._import_id = None
+    
+    def add(self, chunk, flags=None):
+        """Upsert a chunk of standardised SIM rows."""
+        if self.failed:
+            return
+        flags = np.zeros(len(chunk), dtype=np.int64) if flags is None else np.asarray(flags, dtype=np.int64)
+        try:
+            if self._connection is None:
+                self._connection = self.store.connect()
+                self._import_id = self.store._add_import(self._connection, self.provider, self.source_file, 0)
+            connection = self._connection
+            with metrics.span("inventory", rows=len(chunk)):
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    # Upserts keep their rowid, only the SIMs inserted by this chunk are above the last one
+                    last = connection.execute("SELECT COALESCE(MAX(rowid), 0) FROM sims").fetchone()[0]
+                    written = self.store._write(connection, self._compiled, chunk, flags, self._import_id)
+                    inserted = connection.execute("SELECT COUNT(*) FROM sims WHERE rowid > ?",
+                                                  (last,)).fetchone()[0]
+                    connection.execute("UPDATE imports SET rows = rows + ? WHERE id = ?",
+                                       (len(chunk), self._import_id))
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+        except _RECORD_ERRORS as e:
+            logger.warning(f"Could not record the import in the SIM inventory: {e}")
+            self.failed = True
+            self.close()
+            return
+        self.counts["rows"] += written
+        self.counts["inserted"] += inserted
+        self.counts["updated"] += written - inserted
+        self.counts["skipped"] += len(chunk) - written
+    
+    def close(self):
+        """Close the connection and return the upsert counts, or None if the recording failed."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        return None if self.failed else self.counts
+
+def record_chunks(provider, source_file):
+    """Start recording an import read in chunks, if the inventory is enabled.
+    
+    Returns:
+        ImportRecorder: The recorder (close it once the conversion ends), or None if the inventory is disabled
+    """
+    if not inventory.enabled:
+        return None
+    try:
+        return ImportRecorder(inventory, provider, source_file)
+    except _RECORD_ERRORS as e:
+        logger.warning(f"Could not record the import in the SIM inventory: {e}")
+        return None
+
+def _row_count(sim_data):
+    """Return the number of rows of a DataFrame or of compact column arrays."""
+    if isinstance(sim_data, pd.DataFrame):
+        return len(sim_data)
+    return len(next(iter(sim_data.values()), ()))
+
+def record_import(provider, source_file, sim_data, flags=None, cached=False):
+    """Upsert a successful import into the shared inventory, if it is enabled.
+    
+    The inventory is a record only: failures are logged and never fail the import.
+    A parse cache hit of a file already recorded is not upserted again, so
+    cached re-imports stay instant.
+    
+    Args:
+        provider (str): Provider of the data
+        source_file (str): Path of the imported workbook
+        sim_data (pd.DataFrame or dict): Standard columns, or compact column arrays
+        flags (np.ndarray, optional): Validation flags per row
+        cached (bool, optional): The data was served from the parse cache
+    
+    Returns:
+        dict: The upsert counts, or None if the inventory is disabled, failed or the import was already recorded
+    """
+    if not inventory.enabled:
+        return None
+    try:
+        if cached and inventory.recorded(provider, source_file, _row_count(sim_data)):
+            return None
+        return inventory.upsert(provider, source_file, sim_data, flags)
+    except _RECORD_ERRORS as e:
+        logger.warning(f"Could not record the import in the SIM inventory: {e}")
+        return None
+
+# Shared inventory recording the GUI imports and the batch, watch-folder and service conversions
+inventory = Inventory(inventory_path_from_env())
+
+def parse_args(argv=None):
+    """Parse the command line arguments of the inventory queries."""
+    parser = argparse.ArgumentParser(description="Query the SIM inventory.")
+    parser.add_argument("--db", default=inventory.db_path or default_inventory_path(),
+                        help="Inventory database (default: SIM_INVENTORY or the per-user database)")
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument("--ip", help="Show the SIMs using an IP address")
+    query.add_argument("--iccid", help="Show the SIM with an ICCID")
+    query.add_argument("--msisdn", help="Show the SIMs with a cell number")
+    query.add_argument("--shared-ips", action="store_true", help="List the IP addresses used by several SIMs")
+    query.add_argument("--imports", action="store_true", help="List the recorded imports")
+    query.add_argument("--export", metavar="FILE", help="Export the SIMs of --provider to a Techtool file")
+    parser.add_argument("-p", "--provider", choices=registry.names(), help="Provider of --msisdn/--export")
+    parser.add_argument("--source-file", help="Only export the SIMs last imported from this workbook")
+    args = parser.parse_args(argv)
+    if args.export and not args.provider:
+        parser.error("--export requires --provider")
+    return args
+
+def main(argv=None):
+    """Run an inventory query and print the result."""
+    args = parse_args(argv)
+    store = Inventory(args.db)
+    if args.export:
+        from export_utils import write_export_chunks
+        rows = write_export_chunks(store.iter_chunks(args.provider, args.source_file), args.export)
+        print(f"{rows} SIMs exported to {args.export}")
+        return 0
+    if args.shared_ips:
+        for ip, iccids in store.shared_ips().items():
+            print(f"{ip}: {', '.join(iccids)}")
+        return 0
+    if args.imports:
+        records = store.imports()
+    elif args.ip:
+        records = store.find_by_ip(args.ip)
+    elif args.iccid:
+        records = [record for record in [store.find_by_iccid(args.iccid)] if record]
+    else:
+        records = store.find_by_msisdn(args.msisdn, args.provider)
+    for record in records:
+        print("  ".join(f"{key}={value}" for key, value in record.items() if value is not None))
+    if not records:
+        print("No match.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,14 @@ This module imports and uses functionality from the other modules.
 import os
 import sys
 import traceback
+import multiprocessing
+
+try:
+    # Start the startup clock before tkinter and the GUI modules are imported
+    import startup_timing
+except ImportError:
+    startup_timing = None
+
 import tkinter as tk
 from tkinter import messagebox
 
@@ -39,6 +47,8 @@ def main():
     try:
         # Create the GUI and start the application
         root = create_gui()
+        if startup_timing:
+            startup_timing.mark("entering mainloop")
         root.mainloop()
     except Exception as e:
         # Handle any unexpected errors
@@ -53,4 +63,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Worker processes of the frozen (PyInstaller) build re-run this executable
+    multiprocessing.freeze_support()
     main()
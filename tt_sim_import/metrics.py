@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Timing spans and counters for the import/export path.
+
+Stages are wrapped in spans (read, resolve_headers, rename,
+validate_provider, validate_rows, normalise, write) carrying row and byte
+counts. Spans of the same name are aggregated per run. At the end of a run
+a summary is logged through the 'tt_sim_import.metrics' logger and, if a
+metrics file is configured, the runs so far are written to it as JSON.
+
+Set the SIM_METRICS environment variable to enable it (or call configure()):
+    SIM_METRICS=1             log the run summaries (per span details at DEBUG)
+    SIM_METRICS=metrics.json  also write the runs as JSON (useful for the windowed build)
+    SIM_METRICS_LEVEL=DEBUG   logging level of the summaries (default: INFO)
+
+When disabled, span() returns a shared no-op context manager and count()
+returns immediately, so instrumented code pays one function call per stage.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+# Environment variables enabling the metrics and setting their logging level
+METRICS_ENV = "SIM_METRICS"
+METRICS_LEVEL_ENV = "SIM_METRICS_LEVEL"
+
+logger = logging.getLogger('tt_sim_import.metrics')
+
+class _Settings:
+    """Current configuration, read from the environment on import."""
+    
+    def __init__(self):
+        target = os.environ.get(METRICS_ENV, "")
+        self.enabled = bool(target) and target != "0"
+        self.metrics_file = target if self.enabled and target != "1" else None
+        self.level = logging.getLevelName(os.environ.get(METRICS_LEVEL_ENV, "INFO").upper())
+        if not isinstance(self.level, int):
+            self.level = logging.INFO
+
+def _setup_logging():
+    """Make sure the run summaries are emitted at the configured level."""
+    if not logging.getLogger().handlers:
+        logging.basicConfig(format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if not logger.isEnabledFor(_settings.level):
+        logger.setLevel(_settings.level)
+
+_settings = _Settings()
+if _settings.enabled:
+    _setup_logging()
+_local = threading.local()
+_runs = []
+_runs_lock = threading.Lock()
+
+def enabled():
+    """Return True if metrics are being collected."""
+    return _settings.enabled
+
+def configure(enable=True, metrics_file=None, level=None):
+    """Enable or disable the metrics.
+    
+    The setting is also exported to the environment, so worker processes
+    started afterwards collect metrics as well.
+    
+    Args:
+        enable (bool, optional): Collect metrics. Defaults to True.
+        metrics_file (str, optional): JSON file receiving the runs
+        level (int or str, optional): Logging level of the run summaries
+    """
+    _settings.enabled = enable
+    _settings.metrics_file = metrics_file if enable else None
+    if level is not None:
+        _settings.level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    if enable:
+        os.environ[METRICS_ENV] = metrics_file or "1"
+        os.environ[METRICS_LEVEL_ENV] = logging.getLevelName(_settings.level)
+        _setup_logging()
+    else:
+        os.environ.pop(METRICS_ENV, None)
+
+class Collector:
+    """Aggregate of the spans and counters recorded during a run."""
+    
+    def __init__(self):
+        self.spans = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+    
+    def record(self, name, seconds, fields):
+        """Add a finished span."""
+        with self._lock:
+            entry = self.spans.get(name)
+            if entry is None:
+                entry = self.spans[name] = {"count": 0, "seconds": 0.0, "max_seconds": 0.0}
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            for key, value in fields.items():
+                entry[key] = entry.get(key, 0) + value
+    
+    def count(self, name, value):
+        """Add to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    
+    def merge(self, report):
+        """Add the spans and counters of another collector's report (e.g. from a worker process)."""
+        if not report:
+            return
+        for name, entry in report.get("spans", {}).items():
+            with self._lock:
+                target = self.spans.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+                for key, value in entry.items():
+                    if key == "rows_per_second":
+                        continue
+                    if key == "max_seconds":
+                        target[key] = max(target[key], value)
+                    else:
+                        target[key] = target.get(key, 0) + value
+        for name, value in report.get("counters", {}).items():
+            self.count(name, value)
+    
+    def report(self):
+        """Return the spans and counters as a JSON-serialisable dictionary."""
+        with self._lock:
+            spans = {}
+            for name, entry in self.spans.items():
+                spans[name] = dict(entry, seconds=round(entry["seconds"], 6),
+                                   max_seconds=round(entry["max_seconds"], 6))
+                if entry.get("rows") and entry["seconds"] > 0:
+                    spans[name]["rows_per_second"] = round(entry["rows"] / entry["seconds"])
+            return {"spans": spans, "counters": dict(self.counters)}
+
+def _collectors():
+    """Return the collector stack of the calling thread."""
+    stack = getattr(_local, "collectors", None)
+    if stack is None:
+        stack = _local.collectors = [Collector()]
+    return stack
+
+class Span:
+    """A timed stage. Counters added with add() are summed per span name."""
+    
+    __slots__ = ("name", "fields", "_collector", "_start")
+    
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+    
+    def add(self, **counters):
+        """Add row/byte counts to the span."""
+        for key, value in counters.items():
+            self.fields[key] = self.fields.get(key, 0) + value
+    
+    def __enter__(self):
+        self._collector = _collectors()[-1]
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self._start
+        if exc_type is not None:
+            self.fields["errors"] = self.fields.get("errors", 0) + 1
+        self._collector.record(self.name, seconds, self.fields)
+        if logger.isEnabledFor(logging.DEBUG):
+            details = " ".join(f"{key}={value}" for key, value in self.fields.items())
+            logger.debug(f"{self.name}: {seconds * 1000:.1f} ms {details}".rstrip())
+        return False
+
+class _NullSpan:
+    """Span used while metrics are disabled."""
+    
+    __slots__ = ()
+    
+    def add(self, **counters):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name, **fields):
+    """Time a stage.
+    
+    Usage:
+        with metrics.span("read", bytes=size) as timed:
+            df = ...
+            timed.add(rows=len(df))
+    
+    Args:
+        name (str): Stage name
+        **fields: Counts (rows, bytes, ...) summed per stage
+    
+    Returns:
+        Span: Context manager, a shared no-op one while metrics are disabled
+    """
+    if not _settings.enabled:
+        return _NULL_SPAN
+    return Span(name, fields)
+
+def count(name, value=1):
+    """Add to a counter of the current run, e.g. count("bytes_read", size)."""
+    if _settings.enabled:
+        _collectors()[-1].count(name, value)
+
+def merge(report):
+    """Add a report collected elsewhere (e.g. returned by a worker process) to the current run."""
+    if _settings.enabled and report:
+        _collectors()[-1].merge(report)
+
+@contextmanager
+def collect():
+    """Collect the spans of a block separately, then add them to the enclosing collection.
+    
+    Yields:
+        Collector: The block's collector, or None while metrics are disabled
+    """
+    if not _settings.enabled:
+        yield None
+        return
+    stack = _collectors()
+    collector = Collector()
+    stack.append(collector)
+    try:
+        yield collector
+    finally:
+        stack.pop()
+        stack[-1].merge(collector.report())
+
+@contextmanager
+def run(name, **fields):
+    """Measure a run (an import, an export, a batch conversion...) and report it when it ends.
+    
+    Args:
+        name (str): Run name
+        **fields: Details stored with the run, e.g. file or provider
+    
+    Yields:
+        Collector: The run's collector (merge() worker reports into it), or None while disabled
+    """
+    if not _settings.enabled:
+        yield None
+        return
+    start = time.perf_counter()
+    with collect() as collector:
+        try:
+            yield collector
+        finally:
+            report_run(name, collector.report(), time.perf_counter() - start, **fields)
+
+def report_run(name, report, seconds, **fields):
+    """Log a run measured elsewhere (e.g. in a worker process) and add it to the metrics file.
+    
+    Args:
+        name (str): Run name
+        report (dict): Spans and counters, see Collector.report
+        seconds (float): Duration of the run
+        **fields: Details stored with the run
+    """
+    if not _settings.enabled or report is None:
+        return
+    record = dict({"run": name, "started": time.strftime("%Y-%m-%dT%H:%M:%S"), "seconds": round(seconds, 6)},
+                  **fields)
+    record.update(spans=report.get("spans", {}), counters=report.get("counters", {}))
+    if logger.isEnabledFor(_settings.level):
+        logger.log(_settings.level, format_run(record))
+    with _runs_lock:
+        _runs.append(record)
+        if _settings.metrics_file:
+            try:
+                with open(_settings.metrics_file, "w", encoding="utf-8") as f:
+                    json.dump({"runs": _runs}, f, indent=2)
+            except OSError as e:
+                logger.warning(f"Could not write metrics file: {e}")
+
+def format_run(record):
+    """Format a run record as a human readable summary."""
+    lines = [f"{record['run']} finished in {record['seconds']:.3f}s"]
+    for name, entry in record["spans"].items():
+        extra = "".join(f" {key}={entry[key]}" for key in ("rows", "bytes", "rows_per_second", "errors")
+                        if key in entry)
+        lines.append(f"  {name:<18} {entry['seconds']:9.3f}s  x{entry['count']}{extra}")
+    for name, value in record["counters"].items():
+        lines.append(f"  {name:<18} {value}")
+    return "\n".join(lines)
+
+def runs():
+    """Return the records of the runs finished in this process."""
+    with _runs_lock:
+        return list(_runs)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Import of workbooks that split their SIMs across several sheets.
+
+The header of every sheet is located in the parent process, resolving each
+distinct header layout only once. The sheets with a resolvable header are
+then parsed concurrently, one process pool worker per sheet, so the wall
+time approaches that of the largest sheet. The results are concatenated
+with a "Source Sheet" column.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from constants import SOURCE_SHEET_COLUMN, COLUMN_MAPPING_ATTR
+from import_utils import resolve_columns, ColumnResolutionError
+from excel_stream import (SimStreamReader, find_header_layout, DEFAULT_CHUNK_SIZE, HEADER_SCAN_ROWS,
+                          STREAMABLE_EXTENSIONS)
+from task_runner import check_cancelled
+
+def _read_sheet(file_path, sheet_name, layout, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Read the standard columns of one sheet whose header layout is already known.
+    
+    This is the unit of work for the process pool.
+    """
+    with SimStreamReader(file_path, layout["provider"], chunk_size, sheet_name, layout=layout) as reader:
+        return pd.concat(list(reader), ignore_index=True)
+
+class WorkbookSheets:
+    """The sheets of a workbook that contain SIM data.
+    
+    Usage:
+        sheets = WorkbookSheets(file_path, provider)
+        sim_df = sheets.read()
+    
+    Attributes:
+        provider (str): The provider of the workbook, inferred from the first resolvable sheet if not given
+        layouts (dict): Sheet name -> header layout (see find_header_layout), in workbook order
+        skipped (dict): Sheet name -> reason, for sheets without a resolvable header
+        layout_count (int): Number of distinct header layouts that were resolved
+    """
+    
+    def __init__(self, file_path, provider=None):
+        """Scan the leading rows of every sheet and resolve their headers.
+        
+        Raises:
+            ColumnResolutionError: If no sheet has a header with the required columns
+        """
+        self.file_path = file_path
+        self.provider = provider
+        self.layouts = {}
+        self.skipped = {}
+        self.layout_count = 0
+        self._frames = None
+        self._resolved = {}
+        
+        if file_path.lower().endswith(STREAMABLE_EXTENSIONS):
+            leading_rows = self._leading_rows()
+        else:
+            # Legacy .xls files cannot be streamed, read every sheet whole
+            self._frames = pd.read_excel(file_path, sheet_name=None, header=None, dtype=object)
+            leading_rows = {
+                name: list(frame.head(HEADER_SCAN_ROWS).itertuples(index=False, name=None))
+                for name, frame in self._frames.items()
+            }
+        self._scan(leading_rows)
+    
+    def _leading_rows(self):
+        """Read the rows that may hold the header of every sheet."""
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            return {
+                worksheet.title: list(worksheet.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True))
+                for worksheet in workbook.worksheets
+            }
+        finally:
+            workbook.close()
+    
+    def _resolve(self, header, provider):
+        """Resolve a header, once per distinct layout. Failures are remembered too."""
+        key = (tuple(header), provider)
+        if key not in self._resolved:
+            try:
+                self._resolved[key] = resolve_columns(header, provider)
+            except ColumnResolutionError as e:
+                self._resolved[key] = e
+        result = self._resolved[key]
+        if isinstance(result, ColumnResolutionError):
+            raise result
+        return result
+    
+    def _scan(self, leading_rows):
+        """Find the header layout of every sheet."""
+        # Without a provider, the first sheet with a resolvable header decides it for all sheets
+        if self.provider is None:
+            for rows in leading_rows.values():
+                try:
+                    self.provider = find_header_layout(rows, None, self.file_path, self._resolve)["provider"]
+                    break
+                except ColumnResolutionError:
+                    continue
+        
+        first_error = None
+        for name, rows in leading_rows.items():
+            try:
+                self.layouts[name] = find_header_layout(rows, self.provider, self.file_path, self._resolve)
+            except ColumnResolutionError as e:
+                first_error = first_error or e
+                self.skipped[name] = e.status_text
+        
+        if not self.layouts:
+            raise first_error or ColumnResolutionError("The workbook does not contain any sheets.",
+                                                       "No sheets found.")
+        self.layout_count = sum(1 for result in self._resolved.values() if not isinstance(result, Exception))
+    
+    def _sheet_frame(self, name):
+        """Build the standardised DataFrame of a sheet read whole (legacy .xls files)."""
+        layout = self.layouts[name]
+        frame = self._frames[name].iloc[layout["header_row"] + 1:, layout["indices"]]
+        frame.columns = layout["columns"]
+        return frame.dropna(how="all").reset_index(drop=True)
+    
+    def read(self, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, cancel_event=None):
+        """Read every sheet, concurrently when there is more than one.
+        
+        Args:
+            max_workers (int, optional): Size of the process pool. Defaults to the CPU count.
+            chunk_size (int, optional): Rows per chunk within a sheet
+            progress (callable, optional): Called with the running row count after each sheet
+            cancel_event (threading.Event, optional): Checked after each sheet
+        
+        Returns:
+            pd.DataFrame: The standard SIM columns of all sheets plus a "Source Sheet" column
+        
+        Raises:
+            OperationCancelled: If the cancel event was set
+        """
+        names = list(self.layouts)
+        frames = {}
+        row_count = 0
+        max_workers = min(max_workers or os.cpu_count() or 1, len(names))
+        
+        if self._frames is not None or max_workers == 1:
+            for name in names:
+                check_cancelled(cancel_event)
+                if self._frames is not None:
+                    frames[name] = self._sheet_frame(name)
+                else:
+                    frames[name] = _read_sheet(self.file_path, name, self.layouts[name], chunk_size)
+                row_count += len(frames[name])
+                if progress:
+                    progress(row_count)
+        else:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+            try:
+                futures = {
+                    executor.submit(_read_sheet, self.file_path, name, self.layouts[name], chunk_size): name
+                    for name in names
+                }
+                for future in as_completed(futures):
+                    check_cancelled(cancel_event)
+                    frames[futures[future]] = future.result()
+                    row_count += len(frames[futures[future]])
+                    if progress:
+                        progress(row_count)
+            finally:
+                # On errors or cancellation, do not wait for the sheets that were not started
+                executor.shutdown(wait=cancel_event is None or not cancel_event.is_set(), cancel_futures=True)
+        
+        mapping = {}
+        for name in names:
+            frames[name][SOURCE_SHEET_COLUMN] = name
+            layout = self.layouts[name]
+            mapping.update((original, standard) for original, standard in layout["renamed_columns"].items()
+                           if standard in layout["columns"])
+        sim_df = pd.concat([frames[name] for name in names], ignore_index=True)
+        sim_df.attrs[COLUMN_MAPPING_ATTR] = mapping
+        return sim_df
+    
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield bounded-memory chunks of every sheet in turn, with a "Source Sheet" column.
+        
+        Yields:
+            pd.DataFrame: Chunks with the standard Cell/Sim/IP columns and the source sheet
+        """
+        for name, layout in self.layouts.items():
+            if self._frames is not None:
+                frame = self._sheet_frame(name)
+                for start in range(0, max(len(frame), 1), chunk_size):
+                    yield frame.iloc[start:start + chunk_size].assign(**{SOURCE_SHEET_COLUMN: name})
+                continue
+            
+            with SimStreamReader(self.file_path, self.provider, chunk_size, name, layout=layout) as reader:
+                for chunk in reader:
+                    yield chunk.assign(**{SOURCE_SHEET_COLUMN: name})
+
+def read_all_sheets(file_path, provider=None, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+                    cancel_event=None):
+    """Read every sheet of a workbook that has a resolvable SIM header.
+    
+    Args:
+        file_path (str): Path to the Excel file
+        provider (str, optional): The provider name. Inferred from the sheets if not given.
+        max_workers (int, optional): Size of the process pool. Defaults to the CPU count.
+        chunk_size (int, optional): Rows per chunk within a sheet
+        progress (callable, optional): Called with the running row count after each sheet
+        cancel_event (threading.Event, optional): Checked after each sheet
+    
+    Returns:
+        tuple: (provider name, pd.DataFrame with the standard SIM columns and a "Source Sheet" column)
+    
+    Raises:
+        ColumnResolutionError: If no sheet has a header with the required columns
+        OperationCancelled: If the cancel event was set
+    """
+    sheets = WorkbookSheets(file_path, provider)
+    return sheets.provider, sheets.read(max_workers, chunk_size, progress, cancel_event)
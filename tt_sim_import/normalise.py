@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Vectorized normalisation of SIM identifiers.
+
+Cell numbers arrive from Excel as integers, floats ("821234567.0"), with a
+trunk zero ("0821234567"), in international form ("+27 82 123 4567",
+"0027821234567") or with spaces and dashes. They are canonicalised in bulk
+to "27XXXXXXXXX" using NumPy operations on character code matrices, so no
+Python code runs per row.
+"""
+
+from itertools import repeat
+import numpy as np
+import pandas as pd
+
+# South African country code and length of the national number (without trunk zero)
+COUNTRY_CODE = "27"
+NATIONAL_NUMBER_LENGTH = 9
+
+# Character codes used by the matrix operations
+_ZERO = ord("0")
+_NINE = ord("9")
+_DOT = ord(".")
+
+def _as_text_matrix(values):
+    """Convert a sequence of values to a (rows, width) matrix of unicode code points.
+    
+    Missing values become empty rows.
+    """
+    series = pd.Series(values, copy=False)
+    text = series.astype(object).where(series.notna(), "")
+    text = np.asarray(text.to_numpy(dtype=object), dtype="U")
+    width = max(text.dtype.itemsize // 4, 1)
+    text = text.astype(f"U{width}")
+    return text.view(np.uint32).reshape(len(text), width)
+
+def _strip_float_suffix(codes):
+    """Blank out a trailing ".0" style suffix as produced by float cells."""
+    is_dot = codes == _DOT
+    has_dot = is_dot.any(axis=1)
+    if not has_dot.any():
+        return codes
+    
+    # Position of the last dot in each row
+    width = codes.shape[1]
+    last_dot = width - 1 - np.argmax(is_dot[:, ::-1], axis=1)
+    after_dot = np.arange(width)[None, :] > last_dot[:, None]
+    
+    # Only strip when everything after the last dot is zeros (or padding)
+    only_zeros = ((codes == _ZERO) | (codes == 0) | ~after_dot).all(axis=1)
+    strip = has_dot & only_zeros
+    codes = codes.copy()
+    codes[strip[:, None] & (after_dot | is_dot)] = 0
+    return codes
+
+def _compact_digits(codes):
+    """Move the digits of each row to the front, dropping formatting characters.
+    
+    Returns:
+        tuple: (digit code matrix, number of digits per row)
+    """
+    is_digit = (codes >= _ZERO) & (codes <= _NINE)
+    lengths = is_digit.sum(axis=1)
+    
+    # Most rows are plain digits followed by padding and need no work
+    dirty = ~(is_digit | (codes == 0)).all(axis=1)
+    if not dirty.any():
+        return codes, lengths
+    
+    # Scatter every digit of the dirty rows to its position within the compacted row
+    dirty_codes = codes[dirty]
+    dirty_digits = is_digit[dirty]
+    target = np.cumsum(dirty_digits, axis=1) - 1
+    rows = np.broadcast_to(np.arange(dirty_codes.shape[0])[:, None], dirty_codes.shape)
+    compacted = np.zeros_like(dirty_codes)
+    compacted[rows[dirty_digits], target[dirty_digits]] = dirty_codes[dirty_digits]
+    
+    digits = codes.copy()
+    digits[dirty] = compacted
+    return digits, lengths
+
+def _starts_with(digits, lengths, prefix):
+    """Vectorized startswith over a digit matrix."""
+    if digits.shape[1] < len(prefix):
+        return np.zeros(digits.shape[0], dtype=bool)
+    match = lengths >= len(prefix)
+    for i, char in enumerate(prefix):
+        match &= digits[:, i] == ord(char)
+    return match
+
+def _normalise_numeric(numbers, country_code, national_length):
+    """Canonicalise numeric cell numbers with integer arithmetic.
+    
+    Returns:
+        tuple: (np.ndarray of canonical strings, np.ndarray of bools, True where valid)
+    """
+    missing = np.isnan(numbers) if numbers.dtype.kind == "f" else np.zeros(len(numbers), dtype=bool)
+    integers = np.where(missing, 0, numbers).astype(np.int64)
+    
+    national_base = 10 ** national_length
+    prefix = int(country_code) * national_base
+    
+    canonical = integers.copy()
+    # 27XXXXXXXXX: already canonical
+    valid = (integers >= prefix) & (integers < prefix + national_base)
+    # XXXXXXXXX: leading zero lost in a numeric cell
+    bare = (integers >= national_base // 10) & (integers < national_base)
+    canonical[bare] += prefix
+    # 270XXXXXXXXX: country code followed by a stray trunk zero
+    cc_trunk = (integers >= prefix * 10) & (integers < prefix * 10 + national_base)
+    canonical[cc_trunk] -= prefix * 10 - prefix
+    
+    valid = (valid | bare | cc_trunk) & ~missing
+    
+    # Render the digits arithmetically, NumPy's int to str conversion is slow
+    canonical_length = len(country_code) + national_length
+    powers = 10 ** np.arange(canonical_length - 1, -1, -1, dtype=np.int64)
+    codes = (canonical[:, None] // powers[None, :]) % 10 + _ZERO
+    text = codes.astype(np.uint32).view(f"U{canonical_length}").ravel()
+    
+    # Invalid numbers keep their own digits and may be of any length
+    invalid = ~valid & ~missing
+    if invalid.any():
+        text = text.astype(object)
+        text[invalid] = integers[invalid].astype(str)
+    text = text.astype(object) if text.dtype != object else text
+    text[missing] = ""
+    return text, valid
+
+def normalise_msisdn(values, country_code=COUNTRY_CODE, national_length=NATIONAL_NUMBER_LENGTH):
+    """Canonicalise cell numbers to the international form without "+".
+    
+    Args:
+        values (array-like): Cell numbers as read from the supplier file
+        country_code (str, optional): Country code to canonicalise to. Defaults to "27".
+        national_length (int, optional): Digits of the national number. Defaults to 9.
+        
+    Returns:
+        tuple: (pd.Series of canonical numbers, np.ndarray of bools, True where valid).
+               Invalid numbers keep their digits so they can still be inspected.
+    """
+    index = values.index if isinstance(values, pd.Series) else None
+    count = len(values)
+    if count == 0:
+        return pd.Series([], index=index, dtype=object), np.zeros(0, dtype=bool)
+    
+    # Numeric columns (the usual case for Excel cells) skip the text matrix entirely
+    numbers = np.asarray(values) if not isinstance(values, pd.Series) else values.to_numpy()
+    if numbers.dtype.kind in "iuf" and (numbers.dtype.kind != "f" or
+                                       np.all(np.isnan(numbers) | (numbers == np.floor(numbers)))):
+        text, valid = _normalise_numeric(numbers, country_code, national_length)
+        return pd.Series(text, index=index, dtype=object), valid
+    
+    codes = _strip_float_suffix(_as_text_matrix(values))
+    digits, lengths = _compact_digits(codes)
+    
+    canonical_length = len(country_code) + national_length
+    width = max(digits.shape[1], canonical_length + 2)
+    if digits.shape[1] < width:
+        digits = np.pad(digits, ((0, 0), (0, width - digits.shape[1])))
+    
+    # Offset of the national number within the digits, or -1 if the form is not recognised
+    offset = np.full(count, -1, dtype=np.int64)
+    
+    # 0027XXXXXXXXX: international dialling prefix
+    intl = _starts_with(digits, lengths, "00" + country_code) & (lengths == canonical_length + 2)
+    offset[intl] = 2 + len(country_code)
+    
+    # 270XXXXXXXXX: country code followed by a stray trunk zero
+    cc_trunk = _starts_with(digits, lengths, country_code + "0") & (lengths == canonical_length + 1)
+    offset[cc_trunk & (offset < 0)] = len(country_code) + 1
+    
+    # 27XXXXXXXXX: already canonical
+    canonical = _starts_with(digits, lengths, country_code) & (lengths == canonical_length)
+    offset[canonical & (offset < 0)] = len(country_code)
+    
+    # 0XXXXXXXXX: national number with trunk zero
+    trunk = _starts_with(digits, lengths, "0") & (lengths == national_length + 1)
+    offset[trunk & (offset < 0)] = 1
+    
+    # XXXXXXXXX: bare national number (leading zero lost in a numeric cell)
+    bare = (lengths == national_length) & (digits[:, 0] != _ZERO)
+    offset[bare & (offset < 0)] = 0
+    
+    valid = offset >= 0
+    
+    # Assemble country code + national number for the valid rows
+    result = np.zeros((count, width), dtype=np.uint32)
+    result[:, :len(country_code)] = [ord(char) for char in country_code]
+    columns = np.clip(offset[:, None], 0, None) + np.arange(national_length)[None, :]
+    result[:, len(country_code):canonical_length] = np.take_along_axis(digits, columns, axis=1)
+    
+    # Invalid rows keep their cleaned digits
+    result[~valid] = digits[~valid]
+    
+    text = result.view(f"U{width}").ravel()
+    return pd.Series(text, index=index, dtype=object), valid
+
+def _cell_text(value):
+    """Render a single identifier cell as text."""
+    if value is None or value is pd.NA:
+        return ""
+    if isinstance(value, float):
+        if value != value:
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    return str(value).strip()
+
+def identifier_text(values):
+    """Render identifier cells (ICCIDs, IP addresses) as text.
+    
+    Integral floats lose their ".0" suffix, strings are stripped and missing
+    values become empty strings. The cells are split by kind with array masks
+    and each kind is converted in bulk, without a Python call per cell.
+    
+    Args:
+        values (array-like): Identifier values as read from the supplier file
+        
+    Returns:
+        pd.Series: Text values (object dtype)
+    """
+    series = pd.Series(values, copy=False)
+    array = series.to_numpy()
+    if array.dtype.kind in "iu":
+        text = _text_array(map(str, array.tolist()), len(array))
+    elif array.dtype.kind == "f":
+        text = _float_text(array)
+    else:
+        kind = pd.api.types.infer_dtype(array, skipna=False)
+        if kind == "string":
+            # Text columns (the common case) need no masks
+            text = _text_array(map(str.strip, array.tolist()), len(array))
+        elif kind == "floating":
+            text = _float_text(array.astype(np.float64))
+        else:
+            text = _object_text(array)
+    return pd.Series(text, index=series.index, dtype=object)
+
+def _text_array(strings, length):
+    """Collect strings into an object array (filling a preallocated array is faster than np.array)."""
+    text = np.empty(length, dtype=object)
+    text[:] = list(strings)
+    return text
+
+def _float_text(numbers):
+    """Render a float array as identifier text (see identifier_text)."""
+    text = np.full(len(numbers), "", dtype=object)
+    missing = np.isnan(numbers)
+    # Integral values within the int64 range go through int64, larger ones through Python ints
+    integral = ~missing & (numbers == np.floor(numbers)) & (np.abs(numbers) < 2.0 ** 63)
+    whole = numbers[integral].astype(np.int64)
+    text[integral] = _text_array(map(str, whole.tolist()), len(whole))
+    other = ~missing & ~integral
+    if other.any():
+        text[other] = [_cell_text(value) for value in numbers[other].tolist()]
+    return text
+
+def _object_text(array):
+    """Render an object array of mixed cells as identifier text (see identifier_text)."""
+    text = np.full(len(array), "", dtype=object)
+    floats = np.fromiter(map(isinstance, array, repeat(float)), dtype=bool, count=len(array))
+    if floats.any():
+        text[floats] = _float_text(array[floats].astype(np.float64))
+    rest = np.flatnonzero(~floats)
+    if len(rest):
+        # NaN is a float, the other missing markers (None, pd.NA, NaT) are found among the rest
+        rest = rest[~pd.isna(array[rest])]
+        text[rest] = _text_array(map(str.strip, map(str, array[rest].tolist())), len(rest))
+    return text
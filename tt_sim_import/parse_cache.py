@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Content-addressed cache of parsed supplier workbooks.
+
+Parsing the .xlsx file is by far the slowest step of an import, and the same
+workbook is often imported several times. Parsed files are keyed by a hash of
+the file content plus the import mode and a fingerprint of the column
+mappings and provider specifications. The resolved, normalised columns (in
+their compact form, see compact.py) and their validation flags are stored as
+uncompressed NumPy .npz archives, so a hit loads without touching Excel or
+creating a Python object per cell. The cache directory is bounded in size,
+evicting the least recently used entries first.
+"""
+
+import os
+import sys
+import json
+import glob
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from constants import COLUMN_MAPPINGS, COLUMN_MAPPING_ATTR
+from provider_registry import registry
+from normalise import normalise_msisdn, identifier_text
+from validation import validate_sims, summarise_flags, FLAG_DTYPE
+from compact import compact_columns
+
+# Environment variable overriding the on-disk cache location
+PARSE_CACHE_DIR_ENV = "SIM_PARSE_CACHE_DIR"
+
+# Bumped whenever the stored layout or the parsing rules change
+PARSE_CACHE_VERSION = 3
+
+# Default size bound of the cache directory
+DEFAULT_MAX_BYTES = 512 * 2 ** 20
+
+# Bytes read at a time when hashing a workbook
+HASH_BLOCK_SIZE = 2 ** 20
+
+logger = logging.getLogger('tt_sim_import.parse_cache')
+
+def default_cache_dir():
+    """Return the per-user directory used to persist parsed workbooks."""
+    override = os.environ.get(PARSE_CACHE_DIR_ENV)
+    if override:
+        return override
+    if sys.platform.startswith('win'):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "SIM_Management", "cache", "parsed")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "sim_management", "parsed")
+
+def file_digest(file_path):
+    """Return the BLAKE2b digest of a file's content."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def normalise_sim_frame(sim_df, provider):
+    """Convert an imported SIM DataFrame to the text form that is cached.
+    
+    Cell numbers are canonicalised with the provider's numbering rules, the
+    other columns are rendered as text. Imports produce this form whether or
+    not they hit the cache, so both give identical data.
+    
+    Args:
+        sim_df (pd.DataFrame): DataFrame with the standard Cell/Sim/IP columns
+        provider (str): The provider of the data
+    
+    Returns:
+        pd.DataFrame: DataFrame with the same columns holding text values
+    """
+    compiled = registry.get(provider)
+    columns = {}
+    for column in sim_df.columns:
+        if column == "Cell Number":
+            values, _ = normalise_msisdn(sim_df[column], compiled.country_code, compiled.national_number_length)
+        else:
+            values = identifier_text(sim_df[column])
+        columns[column] = values.to_numpy()
+    return pd.DataFrame(columns, columns=list(sim_df.columns))
+
+def _from_stored(values):
+    """Return a column loaded from an archive in its compact form."""
+    return values.astype(object) if values.dtype.kind == "U" else values
+
+class ParseCache:
+    """Size-bounded, content-addressed cache of parsed workbooks.
+    
+    Args:
+        cache_dir (str, optional): Directory for the cached files. None disables the cache.
+        max_bytes (int, optional): Size bound of the cache directory
+    """
+    
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+    
+    def key(self, file_path, provider=None, all_sheets=False):
+        """Return the cache key of a workbook imported in a given mode.
+        
+        Args:
+            file_path (str): Path of the workbook
+            provider (str, optional): Provider selected for the import, None if inferred
+            all_sheets (bool, optional): Whether every sheet is imported
+        """
+        mode = json.dumps([PARSE_CACHE_VERSION, provider, bool(all_sheets), COLUMN_MAPPINGS,
+                           registry.fingerprint()], sort_keys=True)
+        mode_digest = hashlib.sha1(mode.encode("utf-8")).hexdigest()[:12]
+        return f"{file_digest(file_path)}-{mode_digest}"
+    
+    def load(self, file_path, provider, parse, all_sheets=False):
+        """Return a parsed workbook from the cache, parsing and caching it on a miss.
+        
+        Args:
+            file_path (str): Path of the workbook
+            provider (str): Provider selected for the import, None if inferred
+            parse (callable): Called without arguments on a miss, returns (provider, sim_df)
+            all_sheets (bool, optional): Whether every sheet is imported
+        
+        Returns:
+            tuple: (provider, compact column arrays, validation flags, validation summary,
+                    original header -> standard column mapping, True on a cache hit)
+        """
+        key = self.key(file_path, provider, all_sheets) if self.cache_dir else None
+        cached = self.get(key) if key else None
+        if cached is not None:
+            cached_provider, columns, flags, mapping = cached
+            return cached_provider, columns, flags, summarise_flags(flags), mapping, True
+        
+        provider, sim_df = parse()
+        mapping = dict(sim_df.attrs.get(COLUMN_MAPPING_ATTR, {}))
+        sim_df = normalise_sim_frame(sim_df, provider)
+        flags, summary = validate_sims(sim_df, provider=provider)
+        columns = compact_columns(sim_df)
+        if key:
+            self.put(key, provider, columns, flags, mapping)
+        return provider, columns, flags, summary, mapping, False
+    
+    def get(self, key):
+        """Return the cached (provider, compact columns, flags, column mapping) of a key, or None."""
+        file_path = self._file_path(key)
+        try:
+            with np.load(file_path, allow_pickle=False) as archive:
+                meta = json.loads(str(archive["meta"]))
+                columns = {name: _from_stored(archive[f"column{i}"]) for i, name in enumerate(meta["columns"])}
+                flags = archive["flags"]
+            # Mark the entry as recently used for the LRU eviction
+            os.utime(file_path, None)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return meta["provider"], columns, flags, meta.get("column_mapping", {})
+    
+    def put(self, key, provider, columns, flags, mapping=None):
+        """Store a parsed workbook and evict the least recently used entries beyond the size bound.
+        
+        Args:
+            key (str): Cache key (see key())
+            provider (str): Provider of the data
+            columns (dict): Column name -> compact np.ndarray (see compact.compact_columns)
+            flags (array-like): Per-row validation flags
+            mapping (dict, optional): Original header -> standard column mapping of the import
+        """
+        if not self.cache_dir:
+            return
+        # Byte and uint32 columns are stored as they are, non-ASCII text columns as unicode arrays
+        arrays = {f"column{i}": values.astype(str) if values.dtype == object else values
+                  for i, values in enumerate(columns.values())}
+        meta = {"provider": provider, "columns": list(columns), "rows": len(flags), "column_mapping": mapping or {}}
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            file_path = self._file_path(key)
+            temp_path = file_path + ".tmp"
+            with open(temp_path, "wb") as f:
+                np.savez(f, meta=np.array(json.dumps(meta)), flags=np.asarray(flags, dtype=FLAG_DTYPE), **arrays)
+            os.replace(temp_path, file_path)
+            self.stores += 1
+            self._evict()
+        except OSError as e:
+            # The cache is an optimisation only, importing still works without it
+            logger.warning(f"Could not cache parsed workbook: {e}")
+    
+    def clear(self):
+        """Remove every cached entry."""
+        for file_path, _, _ in self._entries():
+            os.remove(file_path)
+    
+    def stats(self):
+        """Return hit/miss statistics and the current size of the cache."""
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries)
+        }
+    
+    def _file_path(self, key):
+        """Return the cache file of a key."""
+        return os.path.join(self.cache_dir, f"{key}.npz")
+    
+    def _entries(self):
+        """Return (path, size, last use) of every cached entry."""
+        if not self.cache_dir:
+            return []
+        entries = []
+        for file_path in glob.glob(os.path.join(glob.escape(self.cache_dir), "*.npz")):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            entries.append((file_path, stat.st_size, stat.st_mtime))
+        return entries
+    
+    def _evict(self):
+        """Remove the least recently used entries until the cache fits its size bound."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        # The newest entry is always kept, even if it alone exceeds the bound
+        for file_path, size, _ in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(file_path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+# Shared cache used by the GUI import
+parse_cache = ParseCache(default_cache_dir())
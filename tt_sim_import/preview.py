@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Virtualised preview grid of the datasets imported in the session.
+
+The grid holds a fixed pool of Treeview rows, as many as fit in the window,
+and refills their values from the dataset's compact columns whenever the
+view moves. Only the visible rows are ever turned into text, so opening the
+preview does not copy the dataset and scrolling through a million rows
+costs the same as scrolling through a hundred. The scrollbar is driven
+separately and maps to the dataset's row count.
+
+Column headings show the original workbook header each standard column was
+resolved from, and rows failing validation are highlighted with the checks
+they fail.
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+import numpy as np
+from constants import COLORS
+from compact import expand_column
+from validation import describe_flags
+from session import session_store
+
+# Columns added in front of and after the dataset's own columns
+ROW_COLUMN = "#"
+FLAGS_COLUMN = "Flags"
+
+# Rows moved per mouse wheel notch
+WHEEL_ROWS = 3
+
+# Row height used until the Treeview style reports one
+DEFAULT_ROW_HEIGHT = 20
+
+class PreviewModel:
+    """Row window over a dataset, without copying its columns.
+    
+    Attributes:
+        dataset (Dataset): The previewed dataset
+        columns (list): Columns shown, including the row number and flags columns
+    """
+    
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.columns = [ROW_COLUMN] + list(dataset.columns) + [FLAGS_COLUMN]
+        self._flagged = None
+    
+    def __len__(self):
+        return len(self.dataset)
+    
+    @property
+    def flagged(self):
+        """Positions of the rows failing validation, computed on first use."""
+        if self._flagged is None:
+            self._flagged = np.flatnonzero(self.dataset.flags)
+        return self._flagged
+    
+    def heading(self, column):
+        """Return the heading of a column, with the original header(s) it was resolved from."""
+        sources = [original for original, standard in self.dataset.column_mapping.items()
+                   if standard == column and original != column]
+        return f"{column} ({' / '.join(sources)})" if sources else column
+    
+    def mapping_text(self):
+        """Describe the resolved column mapping, e.g. 'MSISDN -> Cell Number, ICCID -> Sim Number'."""
+        if not self.dataset.column_mapping:
+            return "Column mapping: not recorded"
+        pairs = ", ".join(f"{original} -> {standard}" for original, standard in self.dataset.column_mapping.items())
+        return f"Column mapping: {pairs}"
+    
+    def rows(self, start, count):
+        """Return the text of a window of rows.
+        
+        Args:
+            start (int): First row
+            count (int): Number of rows
+        
+        Returns:
+            list: (values tuple, True if the row is flagged) per row, fewer near the end
+        """
+        stop = min(start + count, len(self))
+        if stop <= start:
+            return []
+        # Slices of the compact arrays are views, only this window is expanded to text
+        text = [expand_column(values[start:stop]) for values in self.dataset.columns.values()]
+        flags = self.dataset.flags[start:stop]
+        rows = []
+        for offset in range(stop - start):
+            flag = int(flags[offset])
+            values = (start + offset + 1,) + tuple(column[offset] for column in text)
+            rows.append((values + (", ".join(describe_flags(flag)),), flag != 0))
+        return rows
+    
+    def clamp(self, top, visible):
+        """Limit the first visible row so the window stays inside the dataset."""
+        return max(0, min(int(top), len(self) - visible))
+    
+    def move(self, top, visible, action, amount=None, unit=None):
+        """Apply a scrollbar command (moveto fraction, or scroll n units/pages) to the first visible row.
+        
+        Args:
+            top (int): Current first visible row
+            visible (int): Number of visible rows
+            action (str): "moveto" or "scroll", as passed by ttk.Scrollbar
+            amount (str or int, optional): Fraction for moveto, step count for scroll
+            unit (str, optional): "units" or "pages" for scroll
+        
+        Returns:
+            int: The new first visible row
+        """
+        if action == "moveto":
+            top = round(float(amount) * len(self))
+        elif action == "scroll":
+            step = max(visible - 1, 1) if unit == "pages" else 1
+            top += int(amount) * step
+        return self.clamp(top, visible)
+    
+    def fractions(self, top, visible):
+        """Return the (first, last) scrollbar fractions of a window."""
+        if not len(self):
+            return 0.0, 1.0
+        return top / len(self), min(top + visible, len(self)) / len(self)
+    
+    def next_flagged(self, row):
+        """Return the first flagged row after a row, wrapping around, or None if no row is flagged."""
+        if not len(self.flagged):
+            return None
+        index = np.searchsorted(self.flagged, row, side="right")
+        return int(self.flagged[index % len(self.flagged)])
+
+class PreviewWindow:
+    """Toplevel window showing a virtualised grid of the session's datasets."""
+    
+    def __init__(self, parent, store=session_store):
+        self.store = store
+        self.model = None
+        self.top = 0
+        self.visible = 1
+        self.row_height = DEFAULT_ROW_HEIGHT
+        self._items = []
+        self._pending = None
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("Data Preview")
+        self.window.geometry("900x600")
+        self.window.configure(bg=COLORS["card_bg"])
+        
+        controls = tk.Frame(self.window, bg=COLORS["card_bg"])
+        controls.pack(fill=tk.X, padx=10, pady=(10, 5))
+        self.dataset_var = tk.StringVar()
+        self.dataset_box = ttk.Combobox(controls, textvariable=self.dataset_var, state="readonly", width=50,
+                                        postcommand=self._refresh_names)
+        self.dataset_box.pack(side=tk.LEFT)
+        self.dataset_box.bind("<<ComboboxSelected>>", lambda e: self.show(self.dataset_var.get()))
+        tk.Button(controls, text="Next flagged", command=self.next_flagged, bg=COLORS["secondary"], fg="white",
+                  bd=0, padx=10, cursor="hand2").pack(side=tk.LEFT, padx=(10, 0))
+        self.position_label = tk.Label(controls, text="", bg=COLORS["card_bg"], fg=COLORS["text"],
+                                       font=('Segoe UI', 9))
+        self.position_label.pack(side=tk.RIGHT)
+        
+        self.mapping_label = tk.Label(self.window, text="", bg=COLORS["card_bg"], fg=COLORS["text"],
+                                      font=('Segoe UI', 9), anchor=tk.W, justify=tk.LEFT, wraplength=860)
+        self.mapping_label.pack(fill=tk.X, padx=10)
+        
+        grid = tk.Frame(self.window, bg=COLORS["card_bg"])
+        grid.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        # The tree only ever holds the visible rows, the scrollbar spans the whole dataset
+        self.tree = ttk.Treeview(grid, show="headings", selectmode="none")
+        self.scrollbar = ttk.Scrollbar(grid, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.tag_configure("flagged", background=COLORS["flagged_row"])
+        row_height = ttk.Style(self.window).lookup("Treeview", "rowheight")
+        if row_height:
+            self.row_height = int(row_height)
+        
+        self.tree.bind("<Configure>", lambda e: self._resize(e.height))
+        self.window.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.top - WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.top + WHEEL_ROWS))
+        for key, step in (("<Up>", -1), ("<Down>", 1)):
+            self.window.bind(key, lambda e, step=step: self.scroll_to(self.top + step))
+        for key, pages in (("<Prior>", -1), ("<Next>", 1)):
+            self.window.bind(key, lambda e, pages=pages: self._on_scrollbar("scroll", pages, "pages"))
+        self.window.bind("<Home>", lambda e: self.scroll_to(0))
+        self.window.bind("<End>", lambda e: self.scroll_to(len(self.model) if self.model else 0))
+        
+        latest = self.store.latest()
+        if latest is not None:
+            self.show(latest.name)
+    
+    def _refresh_names(self):
+        """List the datasets currently in the session."""
+        self.dataset_box["values"] = self.store.names()
+    
+    def show(self, name):
+        """Show a dataset of the session."""
+        dataset = self.store.get(name)
+        self.dataset_var.set(name)
+        self.model = PreviewModel(dataset)
+        self.tree["columns"] = self.model.columns
+        for column in self.model.columns:
+            width = 60 if column == ROW_COLUMN else 220 if column == FLAGS_COLUMN else 160
+            self.tree.heading(column, text=self.model.heading(column), anchor=tk.W)
+            self.tree.column(column, width=width, minwidth=40, stretch=column != ROW_COLUMN)
+        self.mapping_label.config(text=f"{dataset.source_file} - {self.model.mapping_text()}")
+        self.top = 0
+        self._schedule_render()
+    
+    def _resize(self, height):
+        """Grow or shrink the pool of Treeview rows to the rows that fit in the grid."""
+        # The heading takes about one row
+        self.visible = max(1, height // self.row_height - 1)
+        while len(self._items) < self.visible:
+            self._items.append(self.tree.insert("", tk.END, values=()))
+        while len(self._items) > self.visible:
+            self.tree.delete(self._items.pop())
+        self._schedule_render()
+    
+    def _on_wheel(self, event):
+        """Scroll with the mouse wheel (Windows and macOS deltas)."""
+        notches = event.delta // 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+        self.scroll_to(self.top - notches * WHEEL_ROWS)
+    
+    def _on_scrollbar(self, *args):
+        """Handle a scrollbar drag or click."""
+        if self.model is not None:
+            self.scroll_to(self.model.move(self.top, self.visible, *args))
+    
+    def scroll_to(self, row):
+        """Move the first visible row; the grid is refreshed once the pending events are handled."""
+        if self.model is None:
+            return
+        top = self.model.clamp(row, self.visible)
+        if top != self.top:
+            self.top = top
+            self._schedule_render()
+    
+    def next_flagged(self):
+        """Bring the next row failing validation into view."""
+        if self.model is None:
+            return
+        row = self.model.next_flagged(self.top)
+        if row is None:
+            messagebox.showinfo("Preview", "No rows failed validation.", parent=self.window)
+            return
+        self.scroll_to(row)
+    
+    def _schedule_render(self):
+        """Coalesce the scroll events of a burst into one refresh."""
+        if self._pending is None:
+            self._pending = self.window.after_idle(self._render)
+    
+    def _render(self):
+        """Refill the Treeview rows with the visible window of the dataset."""
+        self._pending = None
+        if self.model is None:
+            return
+        rows = self.model.rows(self.top, len(self._items))
+        for index, item in enumerate(self._items):
+            if index < len(rows):
+                values, flagged = rows[index]
+                self.tree.item(item, values=values, tags=("flagged",) if flagged else ())
+            else:
+                self.tree.item(item, values=(), tags=())
+        self.scrollbar.set(*self.model.fractions(self.top, len(self._items)))
+        total = len(self.model)
+        last = min(self.top + len(self._items), total)
+        self.position_label.config(text=f"Rows {min(self.top + 1, total):,}-{last:,} of {total:,} "
+                                        f"({len(self.model.flagged):,} flagged)")
+
+def preview_data(parent):
+    """Open the preview grid on the session's datasets.
+    
+    Args:
+        parent (tk.Widget): Window owning the preview
+    
+    Returns:
+        PreviewWindow: The preview, or None if nothing was imported yet
+    """
+    if not len(session_store):
+        messagebox.showinfo("Preview", "No data imported yet. Please import SIMs first.")
+        return None
+    return PreviewWindow(parent)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Registry of network providers compiled from the declarative PROVIDER_SPECS.
+
+Each specification is compiled once into a CompiledProvider that holds the
+precompiled IP header matchers, a vectorized validator and the transformer
+producing the Techtool export layout. The GUI, the batch converter and the
+tests all share the same compiled objects.
+"""
+
+import re
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from constants import PROVIDER_SPECS
+from normalise import normalise_msisdn
+from ip_engine import IpRules
+
+def normalise_header(name):
+    """Normalise a column header for case-insensitive comparison."""
+    return str(name).lower().strip()
+
+class _ExactMatcher:
+    """Match headers equal to one of the variants, earlier variants taking priority."""
+    
+    def __init__(self, variants):
+        self.priorities = {}
+        for priority, var in enumerate(variants):
+            self.priorities.setdefault(normalise_header(var), priority)
+            
+    def first(self, lowercase_columns, exclude):
+        """Return the original column of the highest priority variant present."""
+        candidates = [(self.priorities[header], original)
+                      for header, original in lowercase_columns.items()
+                      if header in self.priorities and original not in exclude]
+        return min(candidates)[1] if candidates else None
+
+class _SubstringMatcher:
+    """Match headers that contain a variant, or are contained in one.
+    
+    The "header contains variant" test is a single precompiled regular
+    expression, the "variant contains header" test is a set lookup over all
+    substrings of the variants.
+    """
+    
+    def __init__(self, variants):
+        variants = [normalise_header(var) for var in variants]
+        self.pattern = re.compile("|".join(re.escape(var) for var in variants))
+        self.substrings = {
+            var[start:end]
+            for var in variants
+            for start in range(len(var))
+            for end in range(start + 1, len(var) + 1)
+        }
+        
+    def matches(self, header):
+        """Return True if the normalised header matches one of the variants."""
+        return bool(header) and (header in self.substrings or self.pattern.search(header) is not None)
+    
+    def first(self, lowercase_columns, exclude):
+        """Return the first original column (in file order) matching a variant."""
+        for header, original in lowercase_columns.items():
+            if original not in exclude and self.matches(header):
+                return original
+        return None
+
+class CompiledProvider:
+    """A provider specification compiled into reusable matchers, validator and transformer.
+    
+    Attributes:
+        name (str): Provider name, e.g. 'Vodacom'
+        required_columns (list): Standard non-IP columns the file must contain
+        ip_columns (list): Standard IP column names, in order
+        columns (list): All standard columns of an imported file
+        export_columns (dict): Standard IP column name -> Techtool export column name
+        ip_rules (IpRules): Subnet and pair checks of the IP columns
+    """
+    
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+        self.required_columns = list(spec["required_columns"])
+        self.ip_columns = list(spec["ip_columns"])
+        self.columns = self.required_columns + self.ip_columns
+        self.export_columns = dict(spec["export_columns"])
+        self.country_code = spec.get("country_code", "27")
+        self.national_number_length = spec.get("national_number_length", 9)
+        self.filename_hints = [hint.lower() for hint in spec.get("filename_hints", [])]
+        self.color = spec.get("color", "#888888")
+        self.logo = spec.get("logo", f"{name.lower()}.png")
+        self.ip_error = spec.get("ip_error", f"{name} file must contain the IP address columns: "
+                                             + ", ".join(self.ip_columns))
+        self.ip_status = spec.get("ip_status", "Missing IP columns.")
+        self.ip_rules = IpRules(spec.get("ip_subnets"), spec.get("ip_pairs", ()))
+        
+        matcher_class = _SubstringMatcher if spec.get("ip_match", "exact") == "contains" else _ExactMatcher
+        self._ip_matchers = [(standard_name, matcher_class(variants))
+                             for standard_name, variants in spec["ip_columns"].items()]
+        self._exact_ip_headers = [{normalise_header(var) for var in variants}
+                                  for variants in spec["ip_columns"].values()]
+    
+    def __repr__(self):
+        return f"CompiledProvider({self.name!r})"
+        
+    def match_ip_columns(self, lowercase_columns, exclude=()):
+        """Find the IP columns of a file.
+        
+        Args:
+            lowercase_columns (dict): Normalised header -> original column name
+            exclude (iterable, optional): Original columns already mapped elsewhere
+            
+        Returns:
+            dict: Original column name -> standard IP column name, or None if any is missing
+        """
+        claimed = set(exclude)
+        renamed_columns = {}
+        for standard_name, matcher in self._ip_matchers:
+            original = matcher.first(lowercase_columns, claimed)
+            if original is None:
+                return None
+            renamed_columns[original] = standard_name
+            claimed.add(original)
+        return renamed_columns
+    
+    def matches_header_exactly(self, lowercase_headers):
+        """Return True if every IP column has an exact header match (used for inference)."""
+        return all(lowercase_headers & variants for variants in self._exact_ip_headers)
+    
+    def validate(self, sim_df):
+        """Check the standard columns of an imported DataFrame.
+        
+        Both checks are single vectorized operations over all columns.
+        
+        Args:
+            sim_df (pd.DataFrame): DataFrame with standard column names
+            
+        Returns:
+            dict: "missing_columns" (list) and "blank_values" (dict of column -> count)
+        """
+        expected = pd.Index(self.columns)
+        present = expected.isin(sim_df.columns)
+        columns = expected[present]
+        
+        values = sim_df[columns]
+        blank = values.isna().to_numpy() | (values.to_numpy(dtype=object) == "")
+        blank_counts = blank.sum(axis=0) if len(values) else np.zeros(len(columns), dtype=int)
+        
+        return {
+            "missing_columns": expected[~present].tolist(),
+            "blank_values": dict(zip(columns.tolist(), blank_counts.tolist()))
+        }
+    
+    def export_arrays(self, sim_df, start=1, stats=None):
+        """Compute the Techtool export columns from a standardised SIM DataFrame.
+        
+        The Sim and IP columns are passed through as the source arrays, so
+        streaming writers can consume them without building a second DataFrame.
+        
+        Args:
+            sim_df (pd.DataFrame): DataFrame with the standard columns of this provider
+            start (int, optional): First value of the Count column. Defaults to 1.
+            stats (dict, optional): Receives the running "invalid_cell_numbers" count
+            
+        Returns:
+            dict: Export column name -> np.ndarray, in export order
+        """
+        columns = {"Count": np.arange(start, start + len(sim_df))}
+        
+        # Canonicalise cell numbers with this provider's numbering rules
+        cell_numbers, valid = normalise_msisdn(sim_df["Cell Number"], self.country_code,
+                                               self.national_number_length)
+        columns["Cell Number"] = cell_numbers.to_numpy()
+        if stats is not None:
+            stats["invalid_cell_numbers"] = stats.get("invalid_cell_numbers", 0) + int((~valid).sum())
+            
+        columns["Sim Number"] = sim_df["Sim Number"].to_numpy()
+        for standard_name, export_name in self.export_columns.items():
+            columns[export_name] = sim_df[standard_name].to_numpy()
+        return columns
+    
+    def transform(self, sim_df, start=1, stats=None):
+        """Build the Techtool export layout from a standardised SIM DataFrame.
+        
+        Args:
+            sim_df (pd.DataFrame): DataFrame with the standard columns of this provider
+            start (int, optional): First value of the Count column. Defaults to 1.
+            stats (dict, optional): Receives the running "invalid_cell_numbers" count
+            
+        Returns:
+            pd.DataFrame: DataFrame with Count, Cell Number, Sim Number and Ip Address columns
+        """
+        return pd.DataFrame(self.export_arrays(sim_df, start, stats))
+
+class ProviderRegistry:
+    """Ordered collection of compiled providers."""
+    
+    def __init__(self, specs=None):
+        self._providers = {}
+        for name, spec in (specs or {}).items():
+            self.register(name, spec)
+            
+    def register(self, name, spec):
+        """Compile and register a provider specification.
+        
+        Args:
+            name (str): Provider name
+            spec (dict): Specification in the PROVIDER_SPECS format
+            
+        Returns:
+            CompiledProvider: The compiled provider
+        """
+        compiled = CompiledProvider(name, spec)
+        self._providers[name] = compiled
+        return compiled
+    
+    def get(self, name):
+        """Return the compiled provider with the given name.
+        
+        Raises:
+            ValueError: If the provider is not registered
+        """
+        try:
+            return self._providers[name]
+        except KeyError:
+            raise ValueError(f"Unknown provider: {name}. Known providers: {', '.join(self.names())}")
+    
+    def names(self):
+        """Return the registered provider names, in registration order."""
+        return list(self._providers)
+    
+    def __iter__(self):
+        return iter(self._providers.values())
+    
+    def fingerprint(self):
+        """Return a short digest of the registered specifications.
+        
+        The digest changes whenever a provider is added or its specification
+        changes, so results derived from the specifications can be invalidated.
+        """
+        specs = [(provider.name, provider.spec) for provider in self]
+        text = json.dumps(specs, sort_keys=True, default=str)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+    
+    def infer(self, columns, file_path=None):
+        """Guess the provider of a file from its name and column headers.
+        
+        File name hints are checked first. Otherwise the provider with the
+        most IP columns whose headers all match exactly wins.
+        
+        Returns:
+            str: Provider name, or None if it cannot be determined
+        """
+        if file_path:
+            file_name = str(file_path).replace("\\", "/").rsplit("/", 1)[-1].lower()
+            for provider in self:
+                if any(hint in file_name for hint in provider.filename_hints):
+                    return provider.name
+        
+        lowercase_headers = {normalise_header(col) for col in columns}
+        for provider in sorted(self, key=lambda p: -len(p.ip_columns)):
+            if provider.matches_header_exactly(lowercase_headers):
+                return provider.name
+        return None
+    
+    def for_columns(self, columns):
+        """Return the provider whose standard columns are all present, preferring more IP columns.
+        
+        Raises:
+            ValueError: If no provider matches the columns
+        """
+        columns = set(columns)
+        for provider in sorted(self, key=lambda p: -len(p.ip_columns)):
+            if columns.issuperset(provider.columns):
+                return provider
+        raise ValueError("The data does not contain the columns of any known provider.")
+
+# Registry compiled once per process from constants.PROVIDER_SPECS
+registry = ProviderRegistry(PROVIDER_SPECS)
+
+def register_provider(name, spec):
+    """Register an additional provider with the shared registry."""
+    return registry.register(name, spec)
+
+def get_provider(name):
+    """Return a compiled provider from the shared registry."""
+    return registry.get(name)
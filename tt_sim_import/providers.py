@@ -8,9 +8,11 @@ Provider selection functionality for the SIM Management application.
 import tkinter as tk
 import os
 import time
-from PIL import Image, ImageTk
+import logging
+from PIL import ImageTk
 from constants import COLORS
 from resource_path import resource_path
+from image_cache import image_cache
 
 # Store the PhotoImage objects as global variables to prevent garbage collection
 logo_images = {}
@@ -20,69 +22,48 @@ logo_enlarged_images = {}  # Store enlarged images for 3D effect
 # Store canvas configurations for proper reset
 canvas_original_configs = {}
 
-def select_provider(provider_name, vodacom_frame, mtn_frame, selected_provider):
+logger = logging.getLogger('tt_sim_import.providers')
+
+def select_provider(provider_name, provider_frames, selected_provider):
     """Function to handle provider selection and update UI accordingly.
     
     Args:
-        provider_name (str): The name of the selected provider ('Vodacom' or 'MTN')
-        vodacom_frame (tk.Frame): The frame containing the Vodacom logo
-        mtn_frame (tk.Frame): The frame containing the MTN logo
+        provider_name (str): The name of the selected provider, e.g. 'Vodacom' or 'MTN'
+        provider_frames (dict): Provider name -> the frame containing that provider's logo
         selected_provider (tk.StringVar): StringVar to store the selected provider
     """
     # Skip animation if provider is already selected
     if selected_provider.get() == provider_name:
         return
-        
-    # Get canvas elements
-    vodacom_canvas = None
-    mtn_canvas = None
-    
-    for child in vodacom_frame.winfo_children():
-        if isinstance(child, tk.Canvas):
-            vodacom_canvas = child
-            
-    for child in mtn_frame.winfo_children():
-        if isinstance(child, tk.Canvas):
-            mtn_canvas = child
     
     # Set the provider
     selected_provider.set(provider_name)
     
     # Update UI to show which provider is selected
-    if provider_name == "Vodacom":
-        # Change Vodacom border to orange (selected) and restore MTN to its default
-        vodacom_frame.config(bg=COLORS["selected"], relief=tk.RAISED)
-        mtn_frame.config(bg=COLORS["card_bg"], relief=tk.FLAT)
+    for name, frame in provider_frames.items():
+        # Get canvas element
+        canvas = None
+        for child in frame.winfo_children():
+            if isinstance(child, tk.Canvas):
+                canvas = child
         
-        # Update border colors and animation
-        if vodacom_canvas:
-            # Apply 3D effect to Vodacom (move forward)
-            apply_3d_effect(vodacom_canvas, "Vodacom", True)
-            
-        if mtn_canvas:
-            # Reset MTN to normal
-            reset_to_normal(mtn_canvas, "MTN")
-            
-    else:  # MTN
-        # Change MTN border to orange (selected) and restore Vodacom to its default
-        vodacom_frame.config(bg=COLORS["card_bg"], relief=tk.FLAT)
-        mtn_frame.config(bg=COLORS["selected"], relief=tk.RAISED)
-        
-        # Update border colors and animation
-        if vodacom_canvas:
-            # Reset Vodacom to normal
-            reset_to_normal(vodacom_canvas, "Vodacom")
-            
-        if mtn_canvas:
-            # Apply 3D effect to MTN (move forward)
-            apply_3d_effect(mtn_canvas, "MTN", True)
+        if name == provider_name:
+            # Change border to the selected colour and apply 3D effect (move forward)
+            frame.config(bg=COLORS["selected"], relief=tk.RAISED)
+            if canvas:
+                apply_3d_effect(canvas, name, True)
+        else:
+            # Restore the other providers to their default
+            frame.config(bg=COLORS["card_bg"], relief=tk.FLAT)
+            if canvas:
+                reset_to_normal(canvas, name)
 
 def apply_3d_effect(canvas, provider_name, forward=True):
     """Apply 3D effect to the logo by making it larger and updating the border.
     
     Args:
         canvas (tk.Canvas): Canvas containing the logo
-        provider_name (str): The name of the provider ('Vodacom' or 'MTN')
+        provider_name (str): The name of the provider e.g. 'Vodacom' or 'MTN'
         forward (bool): Whether to apply forward effect or return to normal
     """
     # Update border with the new selected logo border color
@@ -98,7 +79,7 @@ def apply_3d_effect(canvas, provider_name, forward=True):
     # Get the enlarged image
     enlarged_img = logo_enlarged_images.get(provider_name)
     if not enlarged_img:
-        print(f"WARNING: Enlarged image for {provider_name} not found")
+        logger.warning(f"Enlarged image for {provider_name} not found")
         return
     
     # Get canvas dimensions
@@ -119,7 +100,7 @@ def reset_to_normal(canvas, provider_name):
     
     Args:
         canvas (tk.Canvas): Canvas containing the logo
-        provider_name (str): The name of the provider ('Vodacom' or 'MTN')
+        provider_name (str): The name of the provider e.g. 'Vodacom' or 'MTN'
     """
     # Updated border colors for the new light background
     canvas.config(
@@ -134,7 +115,7 @@ def reset_to_normal(canvas, provider_name):
     # Get the original image
     orig_img = logo_original_images.get(provider_name)
     if not orig_img:
-        print(f"WARNING: Original image for {provider_name} not found")
+        logger.warning(f"Original image for {provider_name} not found")
         return
     
     # Get canvas dimensions
@@ -150,24 +131,29 @@ def reset_to_normal(canvas, provider_name):
     # Update the display
     canvas.update()
 
-def create_logo_canvas(parent, color, provider_name, width=100, height=100):
+def create_logo_canvas(parent, color, provider_name, width=100, height=100, logo_filename=None, scale=1.0):
     """Create a logo canvas that displays the provider's PNG logo.
     
     Args:
         parent (tk.Widget): Parent widget for the canvas
         color (str): HEX color code for the fallback logo
-        provider_name (str): Name of the provider ('Vodacom' or 'MTN')
+        provider_name (str): Name of the provider e.g. 'Vodacom' or 'MTN'
         width (int, optional): Canvas width. Defaults to 100.
         height (int, optional): Canvas height. Defaults to 100.
+        logo_filename (str, optional): Logo file in the assets folder. Defaults to '<provider>.png'.
+        scale (float, optional): DPI scale applied to the canvas and the logo. Defaults to 1.0.
         
     Returns:
         tk.Canvas: The created logo canvas
     """
-    print(f"Creating logo for provider: {provider_name}")
-    
     # Set the border color for the light gray background
     border_color = COLORS["accent"]  # Light blue border
     
+    # The logo box is rendered for the DPI scale by the image cache, the canvas is sized in screen pixels
+    inner_width = width - 6  # Account for border thickness
+    inner_height = height - 6
+    width, height = round(width * scale), round(height * scale)
+    
     # Create canvas with a colored border and WHITE background for logos
     canvas = tk.Canvas(parent, width=width, height=height, bg="white", 
                        highlightthickness=2, highlightbackground=border_color,
@@ -180,39 +166,22 @@ def create_logo_canvas(parent, color, provider_name, width=100, height=100):
         "highlightcolor": border_color
     }
       # Define the path to the logo image
-    logo_filename = f"{provider_name.lower()}.png"
+    logo_filename = logo_filename or f"{provider_name.lower()}.png"
     
     # Use the resource_path helper to get the correct path whether we're running from source or as a frozen app
     logo_path = resource_path(os.path.join("tt_sim_import", "assets", logo_filename))
     
-    print(f"Attempting to load logo from: {logo_path}")
-    
     try:
         # Try to load the PNG logo
         if os.path.exists(logo_path):
-            print(f"Found logo file for {provider_name}: {logo_path}")
-            # Open the image using PIL
-            pil_image = Image.open(logo_path)
-            
-            print(f"Loaded logo image for {provider_name}: {pil_image.size} {pil_image.mode}")
-            
-            # Resize the image to fit the canvas while maintaining aspect ratio
-            # Reduce size slightly to account for border
-            img_width, img_height = pil_image.size
-            inner_width = width - 6  # Account for border thickness
-            inner_height = height - 6
-            ratio = min(inner_width/img_width, inner_height/img_height)
-            new_width = int(img_width * ratio)
-            new_height = int(img_height * ratio)
-            
-            # Create normal size image - ensure each image has its own instance
-            normal_pil_image = pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            # Render the logo to fit the canvas while maintaining aspect ratio, reduced
+            # slightly to account for the border. Renders are cached in memory and on disk.
+            normal_pil_image = image_cache.fit(logo_path, inner_width, inner_height, scale)
             normal_tk_image = ImageTk.PhotoImage(normal_pil_image)
             
             # Create enlarged image (10% larger) for 3D effect - ensure each image has its own instance
-            enlarged_width = int(new_width * 1.10)
-            enlarged_height = int(new_height * 1.10)
-            enlarged_pil_image = pil_image.resize((enlarged_width, enlarged_height), Image.Resampling.LANCZOS)
+            enlarged_pil_image = image_cache.fit(logo_path, round(inner_width * 1.10), round(inner_height * 1.10),
+                                                 scale)
             enlarged_tk_image = ImageTk.PhotoImage(enlarged_pil_image)
             
             # Save references to prevent garbage collection - use separate variables for each provider
@@ -220,22 +189,18 @@ def create_logo_canvas(parent, color, provider_name, width=100, height=100):
             logo_original_images[provider_name] = normal_tk_image
             logo_enlarged_images[provider_name] = enlarged_tk_image
             
-            print(f"Created images for {provider_name}:")
-            print(f"  - Normal: {id(normal_tk_image)} - {normal_tk_image.width()}x{normal_tk_image.height()}")
-            print(f"  - Enlarged: {id(enlarged_tk_image)} - {enlarged_tk_image.width()}x{enlarged_tk_image.height()}")
-            
             # Add the image to the canvas
             canvas.create_image(width/2, height/2, anchor=tk.CENTER, image=normal_tk_image, tags="logo")
-            
-            print(f"Successfully created logo on canvas for {provider_name}")
+            logger.debug(f"Created {normal_tk_image.width()}x{normal_tk_image.height()} logo for {provider_name} "
+                         f"from {logo_path}")
         else:
-            print(f"ERROR: Logo file not found for {provider_name}: {logo_path}")
+            logger.error(f"Logo file not found for {provider_name}: {logo_path}")
             # Fallback to the original circle with letter if image not found
             canvas.create_oval(10, 10, width-10, height-10, fill=color, outline="")
             canvas.create_text(width/2, height/2, text=provider_name[0], 
                                font=('Segoe UI', 36, 'bold'), fill="white", tags="logo")
     except Exception as e:
-        print(f"ERROR loading logo for {provider_name}: {str(e)}")
+        logger.error(f"Error loading logo for {provider_name}: {str(e)}")
         # Fallback to the original circle with letter if there's an error
         canvas.create_oval(10, 10, width-10, height-10, fill=color, outline="")
         canvas.create_text(width/2, height/2, text=provider_name[0], 
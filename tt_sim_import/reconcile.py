@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Delta reconciliation of a new delivery against previous Techtool exports.
+
+Both sides are reduced to compact columns in the export layout: ICCIDs, cell
+numbers and IP addresses as fixed-width byte arrays (see compact.py), read
+chunk by chunk so neither file is ever held as a DataFrame. The ICCIDs are
+hashed to uint64 and joined through a hash index, after which the added,
+removed and changed SIMs (a different cell number or IP address) are plain
+array comparisons. Only those rows are written to the delta file, with a
+Change column saying which of the three they are.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from provider_registry import registry
+from normalise import identifier_text
+from compact import compact_text, expand_column
+from ip_engine import parse_ipv4, format_ipv4
+from validation import matrix_hashes
+from export_stream import open_export_writer, export_format_for, compression_for, _require_pyarrow
+import metrics
+
+# Column of the delta file naming the kind of change
+CHANGE_COLUMN = "Change"
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+# Export columns identifying a SIM and holding its cell number
+KEY_COLUMN = "Sim Number"
+CELL_COLUMN = "Cell Number"
+
+# Rows read per chunk from the previous exports
+READ_CHUNK_SIZE = 100000
+
+def _is_ip_column(name):
+    """Return True for the IP address columns of the export layout."""
+    return str(name).lower().startswith("ip address")
+
+def _compact_identifiers(values):
+    """Return identifier values as stripped compact text.
+    
+    Columns holding only strings (as read from an export) are stripped as one
+    byte array; anything else is rendered by identifier_text first.
+    """
+    if pd.api.types.infer_dtype(values, skipna=False) == "string":
+        compact = compact_text(values)
+        return np.char.strip(compact) if compact.dtype.kind == "S" else compact
+    return compact_text(identifier_text(values).to_numpy())
+
+def compact_records(columns):
+    """Reduce export columns to the compact columns compared by the reconciliation.
+    
+    ICCIDs and cell numbers are stripped text, IP addresses are canonical dotted
+    quads where they parse (so "010.0.0.1" equals "10.0.0.1") and stripped text
+    otherwise. The Count column is dropped.
+    
+    Args:
+        columns (dict): Export column name -> array-like (see CompiledProvider.export_arrays)
+    
+    Returns:
+        dict: Export column name -> S<width> (or object) np.ndarray
+    """
+    records = {}
+    for name, values in columns.items():
+        if name == "Count" or name == CHANGE_COLUMN:
+            continue
+        compact = _compact_identifiers(values)
+        if _is_ip_column(name):
+            addresses, valid = parse_ipv4(compact)
+            if valid.any():
+                compact = compact.astype(np.result_type(compact.dtype, "S15"))
+                compact[valid] = format_ipv4(addresses[valid])
+        records[name] = compact
+    return records
+
+def read_export_chunks(file_path, chunk_size=READ_CHUNK_SIZE):
+    """Read a previous export chunk by chunk, in any of the export formats.
+    
+    CSV and JSON Lines files may be gzip or zstd compressed; Parquet and Arrow
+    files require the optional pyarrow package.
+    
+    Args:
+        file_path (str): Export file written by the GUI or the batch converter
+        chunk_size (int, optional): Maximum number of rows per chunk
+    
+    Yields:
+        dict: Export column name -> np.ndarray of text
+    """
+    export_format = export_format_for(file_path) or "csv"
+    if export_format in ("parquet", "arrow"):
+        pyarrow = _require_pyarrow()
+        if export_format == "parquet":
+            import pyarrow.parquet as pq
+            batches = pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size)
+        else:
+            import pyarrow.ipc as ipc
+            reader = ipc.open_file(pyarrow.memory_map(file_path, "r"))
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        for batch in batches:
+            yield {name: batch.column(i).to_numpy(zero_copy_only=False)
+                   for i, name in enumerate(batch.schema.names)}
+        return
+    
+    compression = compression_for(file_path) or "infer"
+    if export_format == "ndjson":
+        chunks = pd.read_json(file_path, lines=True, dtype=False, chunksize=chunk_size, compression=compression)
+    else:
+        chunks = pd.read_csv(file_path, dtype=str, keep_default_na=False, chunksize=chunk_size,
+                             compression=compression)
+    with chunks:
+        for chunk in chunks:
+            yield {name: chunk[name].to_numpy() for name in chunk.columns}
+
+class RecordSet:
+    """
+    Compact records of one side of the reconciliation, keyed by ICCID.
+    
+    Chunks are collected as compact arrays and concatenated once by finish().
+    When an ICCID occurs more than once the last record wins, so later
+    exports override earlier ones.
+    
+    Attributes:
+        columns (dict): Export column name -> compact np.ndarray, after finish()
+        keys (np.ndarray): uint64 ICCID hash per record, after finish()
+        rows_read (int): Number of rows read
+        blank (int): Rows without an ICCID, which cannot be reconciled
+        duplicates (int): Rows overridden by a later row with the same ICCID
+    """
+    
+    def __init__(self):
+        self.columns = {}
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.rows_read = 0
+        self.blank = 0
+        self.duplicates = 0
+        self._parts = []
+    
+    def add(self, columns):
+        """Add a chunk of export columns."""
+        records = compact_records(columns)
+        if KEY_COLUMN not in records:
+            raise ValueError(f"Export data has no {KEY_COLUMN} column.")
+        self.rows_read += len(records[KEY_COLUMN])
+        self._parts.append(records)
+    
+    def add_file(self, file_path, chunk_size=READ_CHUNK_SIZE):
+        """Add the rows of an export file."""
+        with metrics.span("read", bytes=os.path.getsize(file_path)) as timed:
+            rows = self.rows_read
+            for columns in read_export_chunks(file_path, chunk_size):
+                self.add(columns)
+            timed.add(rows=self.rows_read - rows)
+    
+    def finish(self):
+        """Concatenate the chunks, drop blank and overridden ICCIDs and hash the keys."""
+        names = []
+        for records in self._parts:
+            names.extend(name for name in records if name not in names)
+        columns = {}
+        for name in names:
+            parts = [records.get(name, np.zeros(len(records[KEY_COLUMN]), dtype="S1")) for records in self._parts]
+            columns[name] = np.concatenate(parts) if parts else np.zeros(0, dtype="S1")
+        self._parts = []
+        
+        iccids = columns.get(KEY_COLUMN, np.zeros(0, dtype="S1"))
+        keys = _key_hashes(iccids)
+        blank = iccids == b""
+        overridden = pd.Index(keys).duplicated(keep="last") & ~blank
+        keep = ~blank & ~overridden
+        self.blank = int(blank.sum())
+        self.duplicates = int(overridden.sum())
+        self.columns = {name: values[keep] for name, values in columns.items()}
+        self.keys = keys[keep]
+        return self
+    
+    def __len__(self):
+        return len(self.keys)
+
+def _key_hashes(iccids):
+    """Hash ICCIDs to uint64 keys.
+    
+    The NUL padding of the fixed-width bytes is not hashed, so a delivery and
+    an export padded to different widths produce the same key per ICCID.
+    """
+    if iccids.dtype.kind != "S":
+        iccids = np.array([str(value).encode("utf-8") for value in iccids], dtype="S")
+    if len(iccids) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    return matrix_hashes(iccids.view(np.uint8).reshape(len(iccids), iccids.itemsize))
+
+class Delta:
+    """
+    Result of a reconciliation: the added, removed and changed SIMs.
+    
+    Attributes:
+        new (RecordSet): Records of the new delivery
+        previous (RecordSet): Records of the previous exports
+        added (np.ndarray): Positions in new of the SIMs not exported before
+        changed (np.ndarray): Positions in new of the SIMs with another cell number or IP address
+        removed (np.ndarray): Positions in previous of the SIMs missing from the delivery
+        header (list): Export columns of the delta file, Change last
+    """
+    
+    def __init__(self, new, previous):
+        self.new = new
+        self.previous = previous
+        
+        # Hash join on the ICCID keys, confirmed on the ICCIDs themselves
+        with metrics.span("reconcile", rows=len(new) + len(previous)):
+            positions = pd.Index(previous.keys).get_indexer(new.keys)
+            matched = positions >= 0
+            new_iccids = new.columns.get(KEY_COLUMN, np.zeros(len(new), dtype="S1"))
+            previous_iccids = previous.columns.get(KEY_COLUMN, np.zeros(len(previous), dtype="S1"))
+            matched[matched] = previous_iccids[positions[matched]] == new_iccids[matched]
+            
+            matched_rows = np.flatnonzero(matched)
+            matched_positions = positions[matched]
+            different = np.zeros(len(matched_rows), dtype=bool)
+            for name in self._compared_columns():
+                new_values = self._column(new, name)[matched_rows]
+                previous_values = self._column(previous, name)[matched_positions]
+                different |= new_values != previous_values
+            
+            self.added = np.flatnonzero(~matched)
+            self.changed = matched_rows[different]
+            kept = np.zeros(len(previous), dtype=bool)
+            kept[matched_positions] = True
+            self.removed = np.flatnonzero(~kept)
+        
+        self.header = ["Count"] + [name for name in self._names() if name != CHANGE_COLUMN] + [CHANGE_COLUMN]
+    
+    def _names(self):
+        """Return the export columns of both sides, new delivery first."""
+        names = [CELL_COLUMN, KEY_COLUMN]
+        for records in (self.new, self.previous):
+            names.extend(name for name in records.columns if name not in names)
+        return names
+    
+    def _compared_columns(self):
+        """Return the columns whose change makes a SIM changed: the cell number and IP addresses."""
+        return [name for name in self._names() if name == CELL_COLUMN or _is_ip_column(name)]
+    
+    @staticmethod
+    def _column(records, name):
+        """Return a compact column of a side, empty values where the side lacks it."""
+        values = records.columns.get(name)
+        return values if values is not None else np.zeros(len(records), dtype="S1")
+    
+    def summary(self):
+        """Return the number of SIMs per kind of change.
+        
+        Returns:
+            dict: added, removed, changed, unchanged, plus the rows read and skipped per side
+        """
+        return {
+            ADDED: int(len(self.added)),
+            REMOVED: int(len(self.removed)),
+            CHANGED: int(len(self.changed)),
+            "unchanged": int(len(self.new) - len(self.added) - len(self.changed)),
+            "new_rows": self.new.rows_read,
+            "previous_rows": self.previous.rows_read,
+            "blank_iccids": self.new.blank + self.previous.blank,
+            "duplicate_iccids": self.new.duplicates + self.previous.duplicates
+        }
+    
+    def iter_chunks(self, chunk_size=READ_CHUNK_SIZE):
+        """Yield the delta rows as export columns: added, then changed, then removed.
+        
+        Yields:
+            dict: Export column name -> np.ndarray of text, including Count and Change
+        """
+        count = 1
+        for change, records, positions in ((ADDED, self.new, self.added), (CHANGED, self.new, self.changed),
+                                           (REMOVED, self.previous, self.removed)):
+            for start in range(0, len(positions), chunk_size):
+                rows = positions[start:start + chunk_size]
+                columns = {"Count": np.arange(count, count + len(rows))}
+                for name in self.header[1:-1]:
+                    columns[name] = expand_column(self._column(records, name)[rows])
+                columns[CHANGE_COLUMN] = np.full(len(rows), change, dtype=object)
+                count += len(rows)
+                yield columns
+    
+    def write(self, file_path, output_format=None, compression=None):
+        """Write the delta rows to an export file.
+        
+        Args:
+            file_path (str): Destination path
+            output_format (str, optional): Export format. Defaults to the file extension, else CSV.
+            compression (str, optional): None, "gzip" or "zstd". Defaults to the file extension.
+        
+        Returns:
+            int: The number of rows written
+        """
+        with metrics.span("write") as timed:
+            with open_export_writer(file_path, self.header, output_format, compression) as writer:
+                for columns in self.iter_chunks():
+                    writer.write(columns)
+            timed.add(rows=writer.rows)
+        return writer.rows
+
+def reconcile(chunks, previous_files, provider=None, chunk_size=READ_CHUNK_SIZE):
+    """Reconcile a new delivery against one or more previous exports.
+    
+    Args:
+        chunks (iterable): Standardised SIM DataFrames of the new delivery (e.g. a SimStreamReader)
+        previous_files (list): Previous export files, oldest first
+        provider (str, optional): Provider of the delivery. Detected from the columns if not given.
+        chunk_size (int, optional): Rows per chunk read from the previous exports
+    
+    Returns:
+        Delta: The added, removed and changed SIMs
+    """
+    new = RecordSet()
+    for chunk in chunks:
+        compiled = registry.get(provider) if provider else registry.for_columns(chunk.columns)
+        new.add(compiled.export_arrays(chunk))
+    previous = RecordSet()
+    for file_path in previous_files:
+        previous.add_file(file_path, chunk_size)
+    return Delta(new.finish(), previous.finish())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Serialisers for SimulationData files.
+
+Documents are written as compact JSON (no indentation) through orjson when
+it is installed, or the standard library json module otherwise. The NDJSON
+mode writes the `data` payload one line per entry (and one line per item of
+list entries), so it can be written and read without holding the encoded
+document in memory. Large numeric `results` arrays are stored in a NumPy
+.npy sidecar next to the document and memory-mapped on load.
+"""
+
+import os
+import json
+import types
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Results arrays with at least this many elements go to the .npy sidecar by default
+SIDECAR_MIN_SIZE = 4096
+
+# Key of the document entry referring to a sidecar file
+SIDECAR_KEY = "$npy"
+
+def _json_default(value):
+    """Encode the NumPy values the JSON encoders do not handle."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, "to_list"):
+        # Records streamed from a tabular file (see sim_convert.RecordSource)
+        return value.to_list()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(obj):
+    """Encode an object as compact JSON.
+    
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_json_default).encode("utf-8")
+
+def loads(data):
+    """Decode JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def backend_name():
+    """Return the name of the JSON backend in use."""
+    return "orjson" if orjson is not None else "json"
+
+def sidecar_path(filepath):
+    """Return the path of the results sidecar of a document."""
+    return os.path.splitext(filepath)[0] + ".results.npy"
+
+def _numeric_array(values):
+    """Return values as a numeric NumPy array, or None if they are not a flat numeric array."""
+    if isinstance(values, np.ndarray):
+        array = values
+    elif isinstance(values, list):
+        try:
+            array = np.asarray(values)
+        except ValueError:
+            return None
+    else:
+        return None
+    return array if array.dtype.kind in "biuf" else None
+
+def externalise_results(data, filepath, sidecar=None):
+    """Move a large numeric `results` array of the data to the .npy sidecar.
+    
+    Args:
+        data (dict): The data payload
+        filepath (str): Path of the document being written
+        sidecar (bool, optional): Force (True) or disable (False) the sidecar. By default only
+                                  arrays of SIDECAR_MIN_SIZE elements or more are moved.
+    
+    Returns:
+        dict: The data to encode, with `results` replaced by a reference to the sidecar
+    """
+    if sidecar is False or not isinstance(data, dict) or "results" not in data:
+        return data
+    array = _numeric_array(data["results"])
+    if array is None or (sidecar is None and array.size < SIDECAR_MIN_SIZE):
+        return data
+    
+    target = sidecar_path(filepath)
+    # Results memory-mapped from this very sidecar are read-only, so the file is still current
+    source = getattr(array, "filename", None)
+    if not (source and os.path.exists(target) and os.path.samefile(source, target)):
+        temp_path = target + ".tmp"
+        with open(temp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(temp_path, target)
+    
+    reference = {SIDECAR_KEY: os.path.basename(target), "dtype": array.dtype.str, "shape": list(array.shape)}
+    return dict(data, results=reference)
+
+def internalise_results(data, filepath):
+    """Replace a sidecar reference in the data by the memory-mapped results array."""
+    if not isinstance(data, dict):
+        return data
+    reference = data.get("results")
+    if not (isinstance(reference, dict) and SIDECAR_KEY in reference):
+        return data
+    path = os.path.join(os.path.dirname(os.path.abspath(filepath)), reference[SIDECAR_KEY])
+    return dict(data, results=np.load(path, mmap_mode="r"))
+
+class JsonSerialiser:
+    """Whole-document compact JSON: {"metadata": ..., "data": ...}."""
+    
+    def save(self, filepath, metadata, data):
+        with open(filepath, "wb") as f:
+            f.write(dumps({"metadata": metadata, "data": data}))
+    
+    def load(self, filepath):
+        """Return (metadata, data); metadata is None for documents that are only data.
+        
+        Raises:
+            ValueError: If the document is not a JSON object
+        """
+        with open(filepath, "rb") as f:
+            content = loads(f.read())
+        if not isinstance(content, dict):
+            raise ValueError("JSON content must be an object/dictionary")
+        if "data" in content and "metadata" in content:
+            return content["metadata"], content["data"]
+        return None, content
+
+class NdjsonSerialiser:
+    """Line-delimited documents streaming the `data` payload.
+    
+    The first line holds the metadata. Every entry of the data follows as
+    {"key": ..., "value": ...}, except list entries, which are written as
+    {"key": ..., "items": n} followed by one line per item.
+    """
+    
+    def save(self, filepath, metadata, data):
+        if not isinstance(data, dict):
+            raise ValueError("NDJSON documents require the data to be an object/dictionary")
+        with open(filepath, "wb") as f:
+            f.write(dumps({"metadata": metadata}) + b"\n")
+            for key, value in data.items():
+                if hasattr(value, "to_list"):
+                    value = value.to_list()
+                if isinstance(value, (list, np.ndarray)):
+                    f.write(dumps({"key": key, "items": len(value)}) + b"\n")
+                    for item in value:
+                        f.write(dumps(item) + b"\n")
+                else:
+                    f.write(dumps({"key": key, "value": value}) + b"\n")
+    
+    def iter_entries(self, filepath):
+        """Yield (key, value) of every data entry, followed by list items one at a time.
+        
+        Yields:
+            tuple: ("metadata", metadata) first, then (key, value) for plain entries and
+                   (key, iterator of items) for list entries. List items must be consumed
+                   before advancing to the next entry.
+        """
+        with open(filepath, "rb") as f:
+            yield "metadata", loads(f.readline())["metadata"]
+            for line in f:
+                entry = loads(line)
+                if "items" in entry:
+                    yield entry["key"], (loads(f.readline()) for _ in range(entry["items"]))
+                else:
+                    yield entry["key"], entry["value"]
+    
+    def load(self, filepath):
+        """Return (metadata, data)."""
+        entries = self.iter_entries(filepath)
+        _, metadata = next(entries)
+        data = {}
+        for key, value in entries:
+            data[key] = list(value) if isinstance(value, types.GeneratorType) else value
+        return metadata, data
+
+# Serialisers by format name, and the file extensions that select them
+SERIALISERS = {"json": JsonSerialiser(), "ndjson": NdjsonSerialiser()}
+SERIALISER_EXTENSIONS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+def serialiser_for(format_type=None, filepath=None):
+    """Return the serialiser of a format, or of a file's extension if no format is given.
+    
+    Args:
+        format_type (str, optional): Format name or extension, e.g. "json", "ndjson" or "jsonl"
+        filepath (str, optional): Path whose extension selects the format
+    
+    Returns:
+        JsonSerialiser or NdjsonSerialiser: The serialiser, or None if the format is not supported
+    """
+    if not format_type and filepath:
+        format_type = os.path.splitext(filepath)[1]
+    name = (format_type or "").lower().lstrip(".")
+    return SERIALISERS.get(SERIALISER_EXTENSIONS.get("." + name, name))
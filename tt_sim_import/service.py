@@ -0,0 +1,453 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Local HTTP conversion service for other tools.
+
+A supplier workbook is POSTed to /convert, either as the raw request body
+or as the "file" field of a multipart form, with an optional provider
+(inferred from the file name and headers otherwise). The Techtool CSV
+comes back with chunked transfer encoding, streamed while it is written.
+
+The asyncio event loop only moves bytes. Each workbook is converted by
+batch.convert_file in a process pool, with the same column resolution,
+validation and export as the GUI and the batch converter. At most
+max_concurrency conversions run at once. Further requests wait their
+turn, up to max_queue of them (uploads still being received count as
+waiting), and are refused with 503 beyond that. Uploads are streamed to a
+temporary file, multipart forms included, so they are never held in memory.
+GET /metrics reports the queue depth and request counters as JSON.
+
+Usage:
+    python service.py [--host HOST] [--port PORT] [-j JOBS] [--max-queue N]
+    
+    curl --data-binary @MTN_delivery.xlsx "http://127.0.0.1:8765/convert?filename=MTN_delivery.xlsx" -o out.csv
+    curl -F file=@delivery.xlsx -F provider=Vodacom http://127.0.0.1:8765/convert -o out.csv
+"""
+
+import os
+import sys
+import json
+import shutil
+import asyncio
+import logging
+import argparse
+import multiprocessing
+import tempfile
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from constants import PROVIDER_SPECS
+from batch import convert_file, is_input_file, output_path_for
+from excel_stream import DEFAULT_CHUNK_SIZE
+import metrics
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Requests waiting for a conversion slot before new ones are refused
+DEFAULT_MAX_QUEUE = 32
+
+# Largest accepted upload
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+
+# Largest accepted request line and headers
+MAX_HEADER_BYTES = 64 * 1024
+
+# Bytes read from the socket / the export file at a time
+IO_CHUNK_SIZE = 64 * 1024
+
+# Seconds between checks of an export file that is still being written
+TAIL_INTERVAL = 0.05
+
+# Name of uploads that do not say what they are called
+DEFAULT_UPLOAD_NAME = "upload.xlsx"
+
+logger = logging.getLogger('tt_sim_import.service')
+
+class HttpError(Exception):
+    """An error answered with an HTTP status and a JSON body."""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+            413: "Payload Too Large", 415: "Unsupported Media Type", 422: "Unprocessable Entity",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+def _provider_name(value):
+    """Return the registered spelling of a provider name given in any case."""
+    for name in PROVIDER_SPECS:
+        if name.lower() == value.lower():
+            return name
+    raise HttpError(400, f"Unknown provider: {value}. Choose from {', '.join(PROVIDER_SPECS)}.")
+
+def _upload_name(value):
+    """Return a safe file name for an upload, keeping its extension for provider inference."""
+    name = os.path.basename((value or DEFAULT_UPLOAD_NAME).replace("\\", "/"))
+    if not is_input_file(name):
+        raise HttpError(415, f"Unsupported file: {name}. Upload an .xlsx or .xls workbook.")
+    return name
+
+def _parse_headers(head):
+    """Parse header lines (without the blank line ending them) into an email message."""
+    return BytesParser(policy=HTTP).parsebytes(head + b"\r\n\r\n", headersonly=True)
+
+async def _read_multipart(reader, length, boundary, directory, default_name=None):
+    """Read a multipart/form-data body, streaming the "file" part to disk.
+    
+    The body is read in IO_CHUNK_SIZE pieces and never held whole in memory;
+    only the small text fields are kept.
+    
+    Args:
+        reader (asyncio.StreamReader): Connection positioned at the start of the body
+        length (int): Content-Length of the body
+        boundary (bytes): Multipart boundary
+        directory (str): Directory receiving the uploaded file
+        default_name (str, optional): File name used when the part has none
+    
+    Returns:
+        tuple: (path of the stored file or None, dict of the other fields as text)
+    """
+    remaining = length
+    # The first delimiter is not preceded by a line break, add one so every delimiter looks the same
+    buffer = b"\r\n"
+    delimiter = b"\r\n--" + boundary
+    path = None
+    fields = {}
+    
+    async def fill():
+        nonlocal buffer, remaining
+        if not remaining:
+            raise HttpError(400, "The multipart upload is truncated.")
+        data = await reader.readexactly(min(remaining, IO_CHUNK_SIZE))
+        remaining -= len(data)
+        buffer += data
+    
+    async def read_until(marker, sink=None, max_bytes=None):
+        # Pass everything before the marker to the sink (or drop it), keeping what follows in the buffer
+        nonlocal buffer
+        passed = 0
+        
+        def emit(data):
+            nonlocal passed
+            passed += len(data)
+            if max_bytes is not None and passed > max_bytes:
+                raise HttpError(400, "Multipart headers or field too large.")
+            if sink is not None:
+                sink(data)
+        
+        while True:
+            index = buffer.find(marker)
+            if index >= 0:
+                emit(buffer[:index])
+                buffer = buffer[index + len(marker):]
+                return
+            # Keep a partial marker that may continue in the next piece
+            keep = len(marker) - 1
+            if len(buffer) > keep:
+                emit(buffer[:-keep])
+                buffer = buffer[-keep:]
+            await fill()
+    
+    await read_until(delimiter)
+    while True:
+        while len(buffer) < 2:
+            await fill()
+        if buffer.startswith(b"--"):
+            break
+        head = bytearray()
+        await read_until(b"\r\n\r\n", head.extend, MAX_HEADER_BYTES)
+        part = _parse_headers(bytes(head).strip(b"\r\n"))
+        field = part.get_param("name", header="content-disposition")
+        if field == "file" and path is None:
+            path = os.path.join(directory, _upload_name(part.get_filename() or default_name))
+            with open(path, "wb") as f:
+                await read_until(delimiter, f.write)
+        else:
+            value = bytearray()
+            await read_until(delimiter, value.extend, MAX_HEADER_BYTES)
+            if field:
+                fields[field] = value.decode("utf-8", "replace").strip()
+    
+    # Drain the epilogue so the connection is left at the end of the request
+    while remaining:
+        data = await reader.readexactly(min(remaining, IO_CHUNK_SIZE))
+        remaining -= len(data)
+    return path, fields
+
+class ConversionService:
+    """Convert uploaded workbooks to Techtool CSV files over HTTP.
+    
+    Args:
+        max_concurrency (int, optional): Conversions running at once (process pool size). Defaults to the CPU count.
+        max_queue (int, optional): Requests waiting for a conversion slot before new ones get a 503
+        stream (bool, optional): Read workbooks in bounded-memory chunks. Defaults to True.
+        chunk_size (int, optional): Rows per chunk when streaming
+    
+    Attributes:
+        metrics (dict): Request counters, see the /metrics endpoint
+    """
+    
+    def __init__(self, max_concurrency=None, max_queue=DEFAULT_MAX_QUEUE, stream=True, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.max_concurrency = max(max_concurrency or os.cpu_count() or 1, 1)
+        self.max_queue = max_queue
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(max_workers=self.max_concurrency)
+        self.metrics = {"queued": 0, "active": 0, "completed": 0, "failed": 0, "rejected": 0, "rows": 0}
+        self._slots = None
+    
+    def snapshot(self):
+        """Return the metrics with the limits they apply to."""
+        return dict(self.metrics, max_concurrency=self.max_concurrency, max_queue=self.max_queue)
+    
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start listening and return the asyncio server."""
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+    
+    def close(self):
+        """Stop the conversion workers."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _replace_executor(self, broken):
+        """Start a new process pool in place of one whose worker died, once per broken pool."""
+        if self.executor is broken:
+            logger.warning("A conversion worker died, restarting the process pool")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = ProcessPoolExecutor(max_workers=self.max_concurrency)
+    
+    async def handle(self, reader, writer):
+        """Serve one request per connection."""
+        try:
+            method, path, query, headers = await self._read_head(reader)
+            if path == "/metrics" and method == "GET":
+                await self._send_json(writer, 200, self.snapshot())
+            elif path == "/health" and method == "GET":
+                await self._send_json(writer, 200, {"status": "ok"})
+            elif path == "/convert":
+                if method != "POST":
+                    raise HttpError(405, "Use POST to upload a workbook.")
+                await self._convert(reader, writer, query, headers)
+            else:
+                raise HttpError(404, f"Not found: {path}")
+        except HttpError as e:
+            await self._send_json(writer, e.status, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.exception("Request failed")
+            try:
+                await self._send_json(writer, 500, {"error": f"Internal error: {e}"})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+    
+    async def _read_head(self, reader):
+        """Read the request line and headers.
+        
+        Returns:
+            tuple: (method, path, query dict of lists, headers dict with lower-case names)
+        """
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise HttpError(400, "Request headers too large.") from None
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line.") from None
+        headers = {}
+        for line in lines[1:]:
+            name, separator, value = line.partition(":")
+            if separator:
+                headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        return method.upper(), url.path, parse_qs(url.query), headers
+    
+    async def _read_upload(self, reader, query, headers, directory):
+        """Store the uploaded workbook in a directory.
+        
+        Returns:
+            tuple: (path of the stored workbook, provider name or None)
+        """
+        if "content-length" not in headers:
+            raise HttpError(411, "The upload needs a Content-Length.")
+        value = headers["content-length"]
+        if not (value.isascii() and value.isdigit()):
+            raise HttpError(400, f"Invalid Content-Length: {value}")
+        length = int(value)
+        if length > MAX_UPLOAD_BYTES:
+            raise HttpError(413, f"Uploads are limited to {MAX_UPLOAD_BYTES} bytes.")
+        provider = query.get("provider", [headers.get("x-provider")])[0]
+        name = query.get("filename", [headers.get("x-filename")])[0]
+        
+        content_type = headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            boundary = _parse_headers(f"Content-Type: {content_type}".encode("latin-1")).get_boundary()
+            if not boundary:
+                raise HttpError(400, "The multipart upload has no boundary.")
+            path, fields = await _read_multipart(reader, length, boundary.encode("latin-1"), directory, name)
+            if path is None:
+                raise HttpError(400, 'The form has no "file" field.')
+            provider = fields.get("provider", provider)
+        else:
+            path = os.path.join(directory, _upload_name(name))
+            with open(path, "wb") as f:
+                remaining = length
+                while remaining:
+                    data = await reader.readexactly(min(remaining, IO_CHUNK_SIZE))
+                    f.write(data)
+                    remaining -= len(data)
+        return path, _provider_name(provider) if provider else None
+    
+    async def _convert(self, reader, writer, query, headers):
+        """Convert an upload in the process pool and stream the CSV as it is written."""
+        if self.metrics["queued"] >= self.max_queue:
+            self.metrics["rejected"] += 1
+            raise HttpError(503, "Too many conversions queued, retry later.")
+        
+        directory = tempfile.mkdtemp(prefix="sim_service_")
+        future = None
+        try:
+            # Uploads in progress count against the queue limit too, each holds a connection and disk space
+            self.metrics["queued"] += 1
+            try:
+                upload_path, provider = await self._read_upload(reader, query, headers, directory)
+                await self._slots.acquire()
+            finally:
+                self.metrics["queued"] -= 1
+            self.metrics["active"] += 1
+            executor = self.executor
+            try:
+                future = asyncio.get_running_loop().run_in_executor(
+                    executor, convert_file, upload_path, directory, provider, "csv", self.stream,
+                    self.chunk_size, False, 1)
+                await self._stream_output(writer, future, output_path_for(upload_path, directory))
+            except BrokenProcessPool as e:
+                # The pool broke before the conversion was submitted
+                self.metrics["failed"] += 1
+                self._replace_executor(executor)
+                raise HttpError(500, f"The conversion failed: {e!r}") from e
+            finally:
+                # A worker died (e.g. out of memory): later conversions would fail on the same pool
+                if future is not None and future.done() and not future.cancelled() \
+                        and isinstance(future.exception(), BrokenProcessPool):
+                    self._replace_executor(executor)
+                self.metrics["active"] -= 1
+                self._slots.release()
+        finally:
+            if future is not None and not future.done():
+                # The client went away: remove the files once the worker is done with them
+                future.add_done_callback(lambda _: shutil.rmtree(directory, ignore_errors=True))
+            else:
+                shutil.rmtree(directory, ignore_errors=True)
+    
+    async def _stream_output(self, writer, future, output_path):
+        """Send the export file while the worker writes it, then the outcome of the conversion."""
+        started = False
+        f = None
+        try:
+            while True:
+                done = future.done()
+                if f is None and os.path.exists(output_path):
+                    f = open(output_path, "rb")
+                data = f.read(IO_CHUNK_SIZE) if f is not None else b""
+                if data:
+                    if not started:
+                        filename = os.path.basename(output_path)
+                        writer.write(self._head(200, "text/csv; charset=utf-8", {
+                            "Transfer-Encoding": "chunked",
+                            "Content-Disposition": f'attachment; filename="{filename}"'}))
+                        started = True
+                    writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    await writer.drain()
+                elif done:
+                    break
+                else:
+                    await asyncio.wait([future], timeout=TAIL_INTERVAL)
+        finally:
+            if f is not None:
+                f.close()
+        
+        try:
+            result = future.result()
+        except Exception as e:
+            self.metrics["failed"] += 1
+            logger.error(f"Conversion of {os.path.basename(output_path)} failed: {e!r}")
+            if started:
+                # As for a failed conversion below, the connection ends without the final chunk
+                return
+            raise HttpError(500, f"The conversion failed: {e!r}") from e
+        if result["error"]:
+            self.metrics["failed"] += 1
+            if started:
+                # Headers are gone: end the connection without the final chunk so the client sees the failure
+                return
+            raise HttpError(422, result["error"])
+        self.metrics["completed"] += 1
+        self.metrics["rows"] += result["rows"]
+        metrics.report_run("convert", result["metrics"], result["seconds"], file=os.path.basename(result["file"]),
+                           provider=result["provider"])
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+    
+    @staticmethod
+    def _head(status, content_type, extra=None):
+        """Return the status line and headers of a response."""
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", f"Content-Type: {content_type}",
+                 "Connection: close"]
+        lines.extend(f"{name}: {value}" for name, value in (extra or {}).items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    
+    async def _send_json(self, writer, status, payload):
+        """Send a complete JSON response."""
+        body = json.dumps(payload).encode("utf-8")
+        extra = {"Content-Length": len(body)}
+        if status == 503:
+            extra["Retry-After"] = 1
+        writer.write(self._head(status, "application/json", extra) + body)
+        await writer.drain()
+
+def parse_args(argv=None):
+    """Parse the command line arguments of the service."""
+    parser = argparse.ArgumentParser(description="Serve Techtool CSV conversions of SIM workbooks over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Conversions running at once (defaults to the CPU count)")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Requests waiting for a worker before new ones are refused "
+                             f"(default: {DEFAULT_MAX_QUEUE})")
+    return parser.parse_args(argv)
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, max_concurrency=None, max_queue=DEFAULT_MAX_QUEUE):
+    """Run the service until cancelled."""
+    service = ConversionService(max_concurrency, max_queue)
+    try:
+        server = await service.start(host, port)
+        print(f"Serving on http://{host}:{port} ({service.max_concurrency} workers)", flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main(argv=None):
+    """Start the service."""
+    args = parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.jobs, args.max_queue))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    # Worker processes of the frozen (PyInstaller) build re-run this executable
+    multiprocessing.freeze_support()
+    sys.exit(main())
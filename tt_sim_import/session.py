@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Session store holding the datasets imported in the GUI.
+
+Several named datasets (one per provider and source file) are held at the
+same time, so importing MTN no longer replaces the Vodacom data. Each
+dataset keeps its columns as read-only NumPy arrays in their compact form
+(fixed-width bytes for identifiers, uint32 for IP addresses, see
+compact.py). DataFrames handed out hold the text of the rows requested
+only, and a combined export walks the datasets chunk by chunk at write
+time instead of concatenating them.
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+from task_runner import check_cancelled
+from compact import compact_columns, text_frame, column_nbytes
+
+class Dataset:
+    """An imported dataset held as read-only column arrays.
+    
+    Attributes:
+        name (str): Name of the dataset in the session
+        provider (str): Provider of the data
+        source_file (str): Path of the imported workbook
+        columns (dict): Standard column name -> read-only np.ndarray in its compact form
+        flags (np.ndarray): Read-only per-row validation flags (see validation.py)
+        summary (dict): Validation summary
+        column_mapping (dict): Original header -> standard column name, as resolved on import
+        imported_at (float): Time of the import (time.time())
+        nbytes (int): Memory held by the dataset, including the Python string objects
+    """
+    
+    def __init__(self, name, provider, source_file, sim_data, flags=None, summary=None, column_mapping=None):
+        self.name = name
+        self.provider = provider
+        self.source_file = source_file
+        self.summary = summary or {}
+        self.column_mapping = dict(column_mapping or {})
+        self.imported_at = time.time()
+        if isinstance(sim_data, pd.DataFrame):
+            sim_data = compact_columns(sim_data)
+        self.columns = {column: _read_only(values) for column, values in sim_data.items()}
+        row_count = len(next(iter(self.columns.values()), ()))
+        self.flags = _read_only(np.zeros(row_count, dtype=np.uint8) if flags is None else np.asarray(flags))
+        self.nbytes = sum(column_nbytes(values) for values in self.columns.values()) + self.flags.nbytes
+    
+    def __len__(self):
+        return len(self.flags)
+    
+    def __repr__(self):
+        return f"Dataset({self.name!r}, rows={len(self)})"
+    
+    def frame(self, start=0, stop=None):
+        """Return the text of (a row range of) the dataset as a DataFrame."""
+        return text_frame(self.columns, start, stop)
+    
+    def iter_chunks(self, chunk_size, cancel_event=None):
+        """Yield consecutive row ranges of the dataset, checking for cancellation in between."""
+        for start in range(0, max(len(self), 1), chunk_size):
+            check_cancelled(cancel_event)
+            yield self.frame(start, start + chunk_size)
+
+def _read_only(values):
+    """Mark an array read-only so views handed out cannot modify the session data."""
+    values.flags.writeable = False
+    return values
+
+def _format_bytes(size):
+    """Format a byte count for display."""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+class SessionStore:
+    """Named datasets imported during a session, in import order."""
+    
+    def __init__(self):
+        self._datasets = {}
+    
+    @staticmethod
+    def dataset_name(provider, source_file):
+        """Return the name of a provider's dataset imported from a file."""
+        return f"{provider}: {os.path.basename(source_file)}"
+    
+    def add(self, provider, source_file, sim_data, flags=None, summary=None, column_mapping=None):
+        """Add an imported dataset, replacing an earlier import of the same file for the same provider.
+        
+        Args:
+            provider (str): Provider of the data
+            source_file (str): Path of the imported workbook
+            sim_data (pd.DataFrame or dict): DataFrame with the standard Cell/Sim/IP columns, or its
+                compact column arrays (see compact.compact_columns)
+            flags (np.ndarray, optional): Per-row validation flags
+            summary (dict, optional): Validation summary
+            column_mapping (dict, optional): Original header -> standard column name
+        
+        Returns:
+            Dataset: The stored dataset
+        """
+        name = self.dataset_name(provider, source_file)
+        self._datasets.pop(name, None)
+        dataset = Dataset(name, provider, source_file, sim_data, flags, summary, column_mapping)
+        self._datasets[name] = dataset
+        return dataset
+    
+    def get(self, name):
+        """Return a dataset by name.
+        
+        Raises:
+            KeyError: If there is no dataset with that name
+        """
+        return self._datasets[name]
+    
+    def remove(self, name):
+        """Remove a dataset from the session."""
+        del self._datasets[name]
+    
+    def clear(self):
+        """Remove every dataset from the session."""
+        self._datasets.clear()
+    
+    def names(self):
+        """Return the dataset names, in import order."""
+        return list(self._datasets)
+    
+    def datasets(self, provider=None):
+        """Return the datasets, optionally only those of one provider, in import order."""
+        return [dataset for dataset in self._datasets.values() if provider is None or dataset.provider == provider]
+    
+    def latest(self):
+        """Return the most recently imported dataset, or None."""
+        return next(reversed(self._datasets.values()), None)
+    
+    def __len__(self):
+        return len(self._datasets)
+    
+    def __iter__(self):
+        return iter(self._datasets.values())
+    
+    @property
+    def total_rows(self):
+        """Number of SIMs over all datasets."""
+        return sum(len(dataset) for dataset in self)
+    
+    def memory_usage(self):
+        """Return the memory held by each dataset in bytes, by name."""
+        return {dataset.name: dataset.nbytes for dataset in self}
+    
+    def describe(self):
+        """Describe the datasets and their memory use for the status bar."""
+        if not self._datasets:
+            return "No data imported"
+        parts = [f"{dataset.name} ({len(dataset):,} SIMs, {_format_bytes(dataset.nbytes)})" for dataset in self]
+        total = sum(self.memory_usage().values())
+        return f"{' | '.join(parts)} - total {_format_bytes(total)}"
+    
+    def iter_chunks(self, chunk_size, names=None, cancel_event=None):
+        """Yield row ranges of several datasets in turn, as one logical concatenation.
+        
+        Args:
+            chunk_size (int): Maximum number of rows per chunk
+            names (list, optional): Datasets to include. Defaults to all datasets.
+            cancel_event (threading.Event, optional): Checked before each chunk
+        
+        Yields:
+            pd.DataFrame: Rows with the standard columns of the chunk's dataset, as text
+        """
+        for name in names or self.names():
+            yield from self._datasets[name].iter_chunks(chunk_size, cancel_event)
+
+# Session of the running GUI
+session_store = SessionStore()
@@ -0,0 +1,432 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Conversion engine moving SimulationData between JSON, CSV, Parquet and XLSX.
+
+JSON and NDJSON hold the whole document (see serialisers.py). The tabular
+formats hold one table of records, the `records` entry of the data (or
+`results` when there are no records), plus a header holding the metadata,
+the other data entries, the column types and the null markers so that a
+round trip restores the same values:
+
+- CSV: the table, with the header in a `.meta.json` file next to it
+- Parquet: the table, with the header in the schema metadata (requires pyarrow)
+- XLSX: the table on the first sheet, the header on a hidden sheet
+
+Readers yield records one at a time and writers consume them as they come,
+so converting a tabular file to another tabular format is one streaming
+pass without an intermediate copy of the data.
+
+An empty cell means an empty string in CSV and a null in XLSX, so string
+columns holding either are given a null marker in the header: nulls are
+written as the marker, which is chosen so that it differs from every value
+of the column, and empty cells are read back as empty strings.
+"""
+
+import os
+import csv
+import itertools
+import numpy as np
+from serialisers import SERIALISERS, dumps, loads
+
+# Data entries used as the table of the tabular formats, in order of preference
+TABLE_KEYS = ("records", "results")
+
+# Records per batch written to Parquet row groups
+PARQUET_BATCH_SIZE = 65536
+
+# Name of the hidden XLSX sheet holding the header
+XLSX_HEADER_SHEET = "_header"
+
+# Characters per cell of the XLSX header sheet
+XLSX_CELL_LIMIT = 32000
+
+# Parquet schema metadata key holding the header
+PARQUET_HEADER_KEY = b"simulation_data"
+
+# Null marker of string columns, prefixed with more backslashes while a value of the column equals it
+NULL_MARKER = "\\N"
+
+def _column_type(values):
+    """Return the type of a column from the Python types of its non-null values."""
+    types = {type(value) for value in values if value is not None}
+    if not types or types == {str}:
+        return "str"
+    if types == {bool}:
+        return "bool"
+    if types == {int}:
+        return "int"
+    if types == {float}:
+        return "float"
+    # Mixed columns, including integers mixed with floats, are stored as JSON text to keep each value's type
+    return "json"
+
+def _null_marker(values):
+    """Return the null marker of a string column holding nulls or empty strings, or None if it needs none."""
+    values = set(values)
+    if None not in values and "" not in values:
+        return None
+    marker = NULL_MARKER
+    while marker in values:
+        marker = "\\" + marker
+    return marker
+
+def split_document(metadata, data):
+    """Split a document into the header of the tabular formats and its records.
+    
+    Args:
+        metadata (dict): SimulationData metadata
+        data (dict): SimulationData data
+    
+    Returns:
+        tuple: (header dict, iterable of record dicts)
+    """
+    data = data if isinstance(data, dict) else {"value": data}
+    table_key = next((key for key in TABLE_KEYS
+                      if isinstance(data.get(key), (list, tuple, np.ndarray, RecordSource))), None)
+    rows = data[table_key] if table_key else []
+    
+    if isinstance(rows, RecordSource):
+        columns = rows.header["table"]["columns"]
+        scalar = rows.header["table"]["scalar"]
+        nulls = rows.header["table"].get("nulls")
+        records = rows.iter_records()
+    else:
+        if isinstance(rows, np.ndarray):
+            rows = rows.tolist()
+        scalar = not all(isinstance(row, dict) for row in rows)
+        if scalar:
+            column_values = {table_key: rows}
+            records = ({table_key: value} for value in rows)
+        else:
+            names = list(dict.fromkeys(name for row in rows for name in row))
+            column_values = {name: [row.get(name) for row in rows] for name in names}
+            records = rows
+        columns = {name: _column_type(values) for name, values in column_values.items()}
+        nulls = {name: _null_marker(values) for name, values in column_values.items() if columns[name] == "str"}
+        nulls = {name: marker for name, marker in nulls.items() if marker is not None}
+    
+    table = {"key": table_key, "columns": columns, "scalar": scalar}
+    if nulls:
+        table["nulls"] = nulls
+    header = {
+        "metadata": metadata,
+        "data": {key: value for key, value in data.items() if key != table_key},
+        "table": table
+    }
+    return header, records
+
+def join_document(header, records):
+    """Rebuild (metadata, data) from a header and its records (see split_document)."""
+    data = dict(header["data"])
+    if header["table"]["key"] is not None:
+        data[header["table"]["key"]] = records
+    return header["metadata"], data
+
+def encode_cell(value, column_type, null=None):
+    """Encode a value for a tabular cell: nested values as JSON text, nulls as the column's null marker."""
+    if value is None:
+        return null
+    if column_type == "json":
+        return dumps(value).decode("utf-8")
+    return value
+
+def decode_cell(value, column_type, null=None):
+    """Decode a tabular cell, from text (CSV) or from a typed cell (XLSX/Parquet)."""
+    if null is not None:
+        # A string column with a null marker: empty cells hold empty strings
+        if value == null:
+            return None
+        return "" if value is None else value
+    if value is None or (value == "" and column_type != "str"):
+        return None
+    if column_type == "json":
+        return loads(value)
+    if column_type == "str" or isinstance(value, bool):
+        return value
+    if column_type == "int":
+        return int(value)
+    if column_type == "float":
+        # XLSX reads integral floats back as integers
+        return float(value)
+    if column_type == "bool":
+        return value == "True"
+    return value
+
+class RecordSource:
+    """Records of a tabular file, read lazily and streamed on every iteration.
+    
+    Loading a tabular file keeps its table as a RecordSource, so a later save
+    to another format streams the records from the source file to the
+    destination in one pass. Iterating yields the decoded values of the
+    document (dicts, or scalars for scalar tables).
+    """
+    
+    def __init__(self, handler, filepath, header):
+        self.handler = handler
+        self.filepath = filepath
+        self.header = header
+        self._length = None
+    
+    def iter_records(self):
+        """Yield the records as column dicts."""
+        return self.handler.iter_records(self.filepath, self.header)
+    
+    def __iter__(self):
+        if self.header["table"]["scalar"]:
+            key = self.header["table"]["key"]
+            return (record[key] for record in self.iter_records())
+        return self.iter_records()
+    
+    def __len__(self):
+        if self._length is None:
+            self._length = sum(1 for _ in self.iter_records())
+        return self._length
+    
+    def __eq__(self, other):
+        return list(self) == list(other)
+    
+    def __repr__(self):
+        return f"RecordSource({self.filepath!r})"
+    
+    def to_list(self):
+        """Read every record into a list."""
+        return list(self)
+
+class JsonFormat:
+    """Whole-document JSON or NDJSON, through the serialisers."""
+    
+    tabular = False
+    
+    def __init__(self, format_type):
+        self.serialiser = SERIALISERS[format_type]
+    
+    def read(self, filepath):
+        metadata, data = self.serialiser.load(filepath)
+        return metadata, data
+    
+    def write(self, filepath, metadata, data):
+        self.serialiser.save(filepath, metadata, data)
+
+class _TabularFormat:
+    """Base class of the tabular formats: read() and write() work on (metadata, data)."""
+    
+    tabular = True
+    
+    def read(self, filepath):
+        header = self.read_header(filepath)
+        return join_document(header, RecordSource(self, filepath, header))
+    
+    def write(self, filepath, metadata, data):
+        header, records = split_document(metadata, data)
+        self.write_records(filepath, header, records)
+
+class CsvFormat(_TabularFormat):
+    """CSV table with its header in a .meta.json file."""
+    
+    @staticmethod
+    def header_path(filepath):
+        return os.path.splitext(filepath)[0] + ".meta.json"
+    
+    def read_header(self, filepath):
+        header_path = self.header_path(filepath)
+        if os.path.exists(header_path):
+            with open(header_path, "rb") as f:
+                return loads(f.read())
+        # A plain CSV file: every column is text
+        with open(filepath, "r", encoding="utf-8", newline="") as f:
+            names = next(csv.reader(f), [])
+        return {"metadata": None, "data": {},
+                "table": {"key": TABLE_KEYS[0], "columns": {name: "str" for name in names}, "scalar": False}}
+    
+    def iter_records(self, filepath, header):
+        columns = header["table"]["columns"]
+        nulls = header["table"].get("nulls", {})
+        with open(filepath, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                yield {name: decode_cell(row.get(name), column_type, nulls.get(name))
+                       for name, column_type in columns.items()}
+    
+    def write_records(self, filepath, header, records):
+        columns = header["table"]["columns"]
+        nulls = header["table"].get("nulls", {})
+        with open(filepath, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(list(columns))
+            writer.writerows([encode_cell(record.get(name), column_type, nulls.get(name))
+                              for name, column_type in columns.items()] for record in records)
+        with open(self.header_path(filepath), "wb") as f:
+            f.write(dumps(header))
+
+class XlsxFormat(_TabularFormat):
+    """XLSX workbook: the table on the first sheet, the header on a hidden sheet."""
+    
+    def read_header(self, filepath):
+        from openpyxl import load_workbook
+        
+        # A file object, openpyxl refuses paths without an Excel extension
+        with open(filepath, "rb") as f:
+            workbook = load_workbook(f, read_only=True, data_only=True)
+            try:
+                if XLSX_HEADER_SHEET in workbook.sheetnames:
+                    rows = workbook[XLSX_HEADER_SHEET].iter_rows(max_col=1, values_only=True)
+                    return loads("".join(row[0] for row in rows if row and row[0]))
+                names = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+            finally:
+                workbook.close()
+        # A plain workbook: keep the cell values as they are
+        return {"metadata": None, "data": {},
+                "table": {"key": TABLE_KEYS[0], "columns": {str(name): "any" for name in names if name is not None},
+                          "scalar": False}}
+    
+    def iter_records(self, filepath, header):
+        from openpyxl import load_workbook
+        
+        columns = list(header["table"]["columns"].items())
+        nulls = header["table"].get("nulls", {})
+        with open(filepath, "rb") as f:
+            workbook = load_workbook(f, read_only=True, data_only=True)
+            try:
+                for row in workbook.worksheets[0].iter_rows(min_row=2, values_only=True):
+                    yield {name: decode_cell(row[i] if i < len(row) else None, column_type, nulls.get(name))
+                           for i, (name, column_type) in enumerate(columns)}
+            finally:
+                workbook.close()
+    
+    def write_records(self, filepath, header, records):
+        from openpyxl import Workbook
+        
+        columns = header["table"]["columns"]
+        nulls = header["table"].get("nulls", {})
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(str(header["table"]["key"] or TABLE_KEYS[0])[:31])
+        sheet.append(list(columns))
+        for record in records:
+            sheet.append([encode_cell(record.get(name), column_type, nulls.get(name))
+                          for name, column_type in columns.items()])
+        header_sheet = workbook.create_sheet(XLSX_HEADER_SHEET)
+        header_sheet.sheet_state = "hidden"
+        # The header is split over rows, a cell holds at most 32767 characters
+        text = dumps(header).decode("utf-8")
+        for start in range(0, len(text), XLSX_CELL_LIMIT):
+            header_sheet.append([text[start:start + XLSX_CELL_LIMIT]])
+        workbook.save(filepath)
+
+class ParquetFormat(_TabularFormat):
+    """Parquet table with the header in the schema metadata, written in row groups (requires pyarrow)."""
+    
+    ARROW_TYPES = {"str": "string", "int": "int64", "float": "float64", "bool": "bool_", "json": "string"}
+    
+    def _pyarrow(self):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet conversion requires the pyarrow package (pip install pyarrow).") from None
+        return pyarrow
+    
+    def read_header(self, filepath):
+        pa = self._pyarrow()
+        schema = pa.parquet.read_schema(filepath)
+        if schema.metadata and PARQUET_HEADER_KEY in schema.metadata:
+            return loads(schema.metadata[PARQUET_HEADER_KEY])
+        return {"metadata": None, "data": {},
+                "table": {"key": TABLE_KEYS[0], "columns": {name: "any" for name in schema.names}, "scalar": False}}
+    
+    def iter_records(self, filepath, header):
+        pa = self._pyarrow()
+        columns = header["table"]["columns"]
+        for batch in pa.parquet.ParquetFile(filepath).iter_batches(batch_size=PARQUET_BATCH_SIZE):
+            values = {name: batch.column(name).to_pylist() for name in columns}
+            for i in range(batch.num_rows):
+                yield {name: decode_cell(values[name][i], column_type) for name, column_type in columns.items()}
+    
+    def write_records(self, filepath, header, records):
+        pa = self._pyarrow()
+        # Columns of untyped sources are stored as JSON text, so any value round-trips
+        columns = {name: "json" if column_type == "any" else column_type
+                   for name, column_type in header["table"]["columns"].items()}
+        # Parquet has typed nulls, so no null markers are needed
+        table = {key: value for key, value in header["table"].items() if key != "nulls"}
+        header = dict(header, table=dict(table, columns=columns))
+        schema = pa.schema([(name, getattr(pa, self.ARROW_TYPES[column_type])())
+                            for name, column_type in columns.items()],
+                           metadata={PARQUET_HEADER_KEY: dumps(header)})
+        records = iter(records)
+        with pa.parquet.ParquetWriter(filepath, schema) as writer:
+            for index in itertools.count():
+                batch = list(itertools.islice(records, PARQUET_BATCH_SIZE))
+                if batch or index == 0:
+                    arrays = [pa.array([encode_cell(record.get(name), column_type) for record in batch],
+                                       type=schema.field(name).type)
+                              for name, column_type in columns.items()]
+                    writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                if len(batch) < PARQUET_BATCH_SIZE:
+                    break
+
+def detach_sources(data, filepath):
+    """Read the records streamed from a file into memory before that file is overwritten.
+    
+    Returns:
+        dict: The data, with RecordSource entries reading from filepath replaced by lists
+    """
+    if not isinstance(data, dict):
+        return data
+    target = os.path.abspath(filepath)
+    return {key: value.to_list() if isinstance(value, RecordSource) and os.path.abspath(value.filepath) == target
+            else value for key, value in data.items()}
+
+# Conversion formats by name, and the file extensions that select them
+FORMATS = {
+    "json": JsonFormat("json"),
+    "ndjson": JsonFormat("ndjson"),
+    "csv": CsvFormat(),
+    "parquet": ParquetFormat(),
+    "xlsx": XlsxFormat()
+}
+FORMAT_EXTENSIONS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv",
+                     ".parquet": "parquet", ".xlsx": "xlsx"}
+
+def register_format(name, handler, extensions=()):
+    """Register a conversion format.
+    
+    Args:
+        name (str): Format name
+        handler: Object with read(filepath) -> (metadata, data) and write(filepath, metadata, data)
+        extensions (iterable, optional): File extensions selecting the format, e.g. ".tsv"
+    """
+    FORMATS[name] = handler
+    for extension in extensions:
+        FORMAT_EXTENSIONS[extension.lower()] = name
+
+def format_for(format_type=None, filepath=None):
+    """Return the name of a supported format, from a format name or a file's extension, or None."""
+    if not format_type and filepath:
+        format_type = os.path.splitext(filepath)[1]
+    name = (format_type or "").lower().lstrip(".")
+    name = FORMAT_EXTENSIONS.get("." + name, name)
+    return name if name in FORMATS else None
+
+def convert_file(source_path, target_path, source_format=None, target_format=None):
+    """Convert a SimulationData file to another format.
+    
+    Between tabular formats the records are streamed from the source to the
+    target in a single pass.
+    
+    Args:
+        source_path (str): Path of the file to convert
+        target_path (str): Path of the converted file
+        source_format (str, optional): Format of the source. Defaults to its extension.
+        target_format (str, optional): Format of the target. Defaults to its extension.
+    
+    Raises:
+        ValueError: If a format is not supported
+    """
+    source_name = format_for(source_format, source_path)
+    target_name = format_for(target_format, target_path)
+    if source_name is None or target_name is None:
+        raise ValueError(f"Unsupported conversion: {source_path} -> {target_path}. "
+                         f"Supported formats: {', '.join(FORMATS)}.")
+    metadata, data = FORMATS[source_name].read(source_path)
+    FORMATS[target_name].write(target_path, metadata, detach_sources(data, target_path))
@@ -7,8 +7,9 @@ This module contains functionality for working with simulation data.
 """
 
 import os
-import json
 import logging
+from serialisers import externalise_results, internalise_results
+from sim_convert import FORMATS, format_for, detach_sources
 
 logger = logging.getLogger('tt_sim_import.sim_data')
 
@@ -25,64 +26,85 @@ class SimulationData:
         }
     
     def load_from_file(self, filepath):
-        """Load simulation data from a file."""
+        """Load simulation data from a file.
+        
+        JSON (.json), NDJSON (.ndjson/.jsonl), CSV, Parquet and XLSX files are
+        supported, see serialisers.py and sim_convert.py. Results stored in a
+        .npy sidecar are memory-mapped; the records of tabular files are read
+        lazily, as a sim_convert.RecordSource.
+        """
         logger.info(f"Loading simulation data from file: {filepath}")
         
         _, file_ext = os.path.splitext(filepath)
+        format_name = format_for(filepath=filepath)
+        if format_name is None:
+            # Implement other format loading as needed
+            logger.warning(f"Unsupported file format: {file_ext}")
+            return False
         
         try:
-            if file_ext.lower() == '.json':
-                with open(filepath, 'r') as f:
-                    content = json.load(f)
-                    if isinstance(content, dict):
-                        if 'data' in content and 'metadata' in content:
-                            self.data = content['data']
-                            self.metadata = content['metadata']
-                        else:
-                            self.data = content
-                    else:
-                        raise ValueError("JSON content must be an object/dictionary")
-                return True
-            else:
-                # Implement other format loading as needed
-                logger.warning(f"Unsupported file format: {file_ext}")
-                return False
+            handler = FORMATS[format_name]
+            metadata, data = handler.read(filepath)
+            self.data = data if handler.tabular else internalise_results(data, filepath)
+            if metadata is not None:
+                self.metadata = metadata
+            return True
         except Exception as e:
             logger.error(f"Error loading data: {str(e)}")
             return False
     
-    def save_to_file(self, filepath, format_type=None):
-        """Save simulation data to a file."""
+    def save_to_file(self, filepath, format_type=None, results_sidecar=None):
+        """Save simulation data to a file.
+        
+        Args:
+            filepath (str): Destination path
+            format_type (str, optional): "json", "ndjson", "csv", "parquet" or "xlsx". Defaults to the
+                                         file extension, then to the format set by convert_format.
+            results_sidecar (bool, optional): Store `results` in a memory-mappable .npy file next to
+                                              JSON documents. By default only large numeric arrays are.
+        """
         logger.info(f"Saving simulation data to file: {filepath}")
         
         dir_path = os.path.dirname(filepath)
         if dir_path and not os.path.exists(dir_path):
             os.makedirs(dir_path)
             
-        format_type = format_type or os.path.splitext(filepath)[1].lstrip('.')
+        format_type = format_type or os.path.splitext(filepath)[1].lstrip('.') or self.metadata.get("format")
+        format_name = format_for(format_type)
+        if format_name is None:
+            # Implement other format saving as needed
+            logger.warning(f"Unsupported output format: {format_type}")
+            return False
         
         try:
-            if format_type.lower() == 'json':
-                with open(filepath, 'w') as f:
-                    json.dump({
-                        'metadata': self.metadata,
-                        'data': self.data
-                    }, f, indent=2)
-                return True
-            else:
-                # Implement other format saving as needed
-                logger.warning(f"Unsupported output format: {format_type}")
-                return False
+            handler = FORMATS[format_name]
+            self.data = detach_sources(self.data, filepath)
+            data = self.data if handler.tabular else externalise_results(self.data, filepath, results_sidecar)
+            handler.write(filepath, self.metadata, data)
+            return True
         except Exception as e:
             logger.error(f"Error saving data: {str(e)}")
             return False
     
     def convert_format(self, target_format):
-        """Convert simulation data to a specified format."""
+        """Convert simulation data to a specified format.
+        
+        The conversion is lazy: the target format is recorded in the metadata
+        and applied by the next save_to_file, which streams the records to
+        the target in a single pass (records loaded from a tabular file are
+        not read before then).
+        
+        Args:
+            target_format (str): "json", "ndjson", "csv", "parquet" or "xlsx"
+        
+        Returns:
+            bool: False if the format is not supported
+        """
         logger.info(f"Converting simulation data to format: {target_format}")
         
-        # Implement format conversion logic
-        # This is a placeholder - actual conversion would depend on your specific needs
-        self.metadata["format"] = target_format
+        if format_for(target_format) is None:
+            logger.warning(f"Unsupported target format: {target_format}")
+            return False
         
-        return True
\ No newline at end of file
+        self.metadata["format"] = target_format
+        return True
@@ -4,11 +4,196 @@
 """
 Main entry point for the SIM Management application.
 This module imports and uses functionality from the other modules.
+
+Without arguments the GUI is started. With -i/--input the supplier
+workbooks are converted headless, one process pool worker per file, and
+with -w/--watch the input directory is watched for new workbooks. With
+--reconcile only the SIMs added, removed or changed since the given
+previous exports are written.
 """
 
-from gui import create_gui
+import startup_timing
+from constants import PROVIDER_SPECS
+import argparse
+import multiprocessing
+import os
+import sys
+import time
 
-if __name__ == "__main__":
+# Output formats supported by the batch converter (parquet and arrow require the pyarrow package)
+OUTPUT_FORMATS = ["csv", "ndjson", "parquet", "arrow"]
+
+# Output compressions supported by the batch converter (zstd requires the zstandard package)
+OUTPUT_COMPRESSIONS = ["gzip", "zstd"]
+
+def parse_args(argv=None):
+    """Parse the command line arguments of the batch converter."""
+    parser = argparse.ArgumentParser(
+        description=f"Convert {'/'.join(PROVIDER_SPECS)} SIM workbooks to Techtool import files."
+    )
+    parser.add_argument("-i", "--input", required=True,
+                        help="Input workbook or directory of workbooks")
+    parser.add_argument("-o", "--output",
+                        help="Output directory (defaults to the input directory)")
+    parser.add_argument("-f", "--format", default="csv", choices=OUTPUT_FORMATS,
+                        help="Output format: csv, ndjson, or parquet/arrow with the pyarrow package (default: csv)")
+    parser.add_argument("-z", "--compress", choices=OUTPUT_COMPRESSIONS,
+                        help="Compress the output files (gzip, or zstd with the zstandard package)")
+    parser.add_argument("-p", "--provider", choices=list(PROVIDER_SPECS), type=_provider_name,
+                        help="Provider of the input files (inferred per file if omitted)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of worker processes (defaults to the CPU count)")
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="Stream workbooks in bounded-memory chunks instead of loading them whole")
+    parser.add_argument("--all-sheets", action="store_true",
+                        help="Convert every sheet with SIM columns, adding a source sheet column")
+    parser.add_argument("--chunk-size", type=int, default=50000,
+                        help="Rows per chunk when streaming (default: 50000)")
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="Keep watching the input directory and convert workbooks as they arrive")
+    parser.add_argument("--error-dir",
+                        help="Directory receiving workbooks that fail in watch mode (defaults to OUTPUT/errors)")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="Seconds a new workbook must stay unchanged before it is converted (default: 2)")
+    parser.add_argument("--reconcile", nargs="+", metavar="PREVIOUS",
+                        help="Write only the SIMs added, removed or changed since these previous exports")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="Log per-stage timings and write them as JSON to FILE")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Print each file as it completes")
+    args = parser.parse_args(argv)
+    if args.compress and args.format in ("parquet", "arrow"):
+        parser.error(f"{args.format} output is compressed internally and cannot be combined with --compress")
+    if args.watch and not os.path.isdir(args.input):
+        parser.error("--watch requires an input directory")
+    if args.reconcile and (args.watch or not os.path.isfile(args.input)):
+        parser.error("--reconcile requires a single input workbook")
+    return args
+
+def _provider_name(value):
+    """Accept provider names case-insensitively."""
+    for name in PROVIDER_SPECS:
+        if name.lower() == value.lower():
+            return name
+    return value
+
+def run_cli(argv=None):
+    """Run the headless batch converter.
+    
+    Returns:
+        int: Process exit code, non-zero if any file failed to convert
+    """
+    from batch import collect_input_files, run_batch, write_summary, format_summary
+    import metrics
+    
+    args = parse_args(argv)
+    if args.metrics:
+        metrics.configure(metrics_file=args.metrics)
+    if args.watch:
+        return run_watch(args)
+    if args.reconcile:
+        return run_reconcile(args)
+    
+    try:
+        input_files = collect_input_files(args.input)
+    except FileNotFoundError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+        
+    if not input_files:
+        print(f"No Excel files found in {args.input}", file=sys.stderr)
+        return 2
+    
+    input_dir = args.input if os.path.isdir(args.input) else os.path.dirname(os.path.abspath(args.input))
+    output_dir = args.output or input_dir
+    
+    def report(result):
+        if args.verbose:
+            status = f"failed: {result['error']}" if result["error"] else f"{result['rows']} SIMs"
+            print(f"{os.path.basename(result['file'])}: {status}")
+    
+    start = time.perf_counter()
+    with metrics.run("batch", files=len(input_files)):
+        results = run_batch(input_files, output_dir, args.provider, args.format, args.jobs, report,
+                            stream=args.stream, chunk_size=args.chunk_size, all_sheets=args.all_sheets,
+                            compression=args.compress)
+    elapsed = time.perf_counter() - start
+    
+    summary_path = write_summary(results, output_dir, elapsed)
+    print(format_summary(results, elapsed))
+    print(f"Summary written to {summary_path}")
+    
+    return 1 if any(r["error"] for r in results) else 0
+
+def run_watch(args):
+    """Convert the workbooks dropped in the input directory until interrupted.
+    
+    Returns:
+        int: Process exit code
+    """
+    from watch import FolderWatcher
+    
+    output_dir = args.output or args.input
+    error_dir = args.error_dir or os.path.join(output_dir, "errors")
+    
+    def report(result):
+        status = f"failed: {result['error']}" if result["error"] else f"{result['rows']} SIMs"
+        print(f"{os.path.basename(result['file'])}: {status}", flush=True)
+    
+    watcher = FolderWatcher(args.input, output_dir, error_dir, provider=args.provider, output_format=args.format,
+                            max_workers=args.jobs, settle_seconds=args.settle, progress=report, stream=args.stream,
+                            chunk_size=args.chunk_size, all_sheets=args.all_sheets, compression=args.compress)
+    print(f"Watching {args.input} (Ctrl+C to stop)", flush=True)
+    watcher.run()
+    print(f"{watcher.converted} file(s) converted, {watcher.failed} failed")
+    return 0
+
+def run_reconcile(args):
+    """Write the SIMs of the input workbook added, removed or changed since the previous exports.
+    
+    Returns:
+        int: Process exit code
+    """
+    from excel_stream import SimStreamReader
+    from export_stream import compressed_path
+    from reconcile import reconcile
+    import metrics
+    
+    output_dir = args.output or os.path.dirname(os.path.abspath(args.input))
+    stem = os.path.splitext(os.path.basename(args.input))[0]
+    output_path = compressed_path(os.path.join(output_dir, f"{stem}_delta.{args.format}"), args.compress)
+    
+    try:
+        with metrics.run("reconcile", file=args.input, previous=len(args.reconcile)):
+            with SimStreamReader(args.input, args.provider, args.chunk_size) as reader:
+                delta = reconcile(reader, args.reconcile, reader.provider)
+            os.makedirs(output_dir, exist_ok=True)
+            delta.write(output_path, args.format, args.compress)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"Reconciliation failed: {e}", file=sys.stderr)
+        return 1
+    
+    summary = delta.summary()
+    print(f"{summary['added']} added, {summary['changed']} changed, {summary['removed']} removed, "
+          f"{summary['unchanged']} unchanged")
+    print(f"Delta written to {output_path}")
+    return 0
+
+def main(argv=None):
+    """Start the batch converter if arguments are given, otherwise the GUI."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        return run_cli(argv)
+    
+    from gui import create_gui
+    
     # Create the GUI and start the application
     root = create_gui()
-    root.mainloop()
\ No newline at end of file
+    startup_timing.mark("entering mainloop")
+    root.mainloop()
+    return 0
+
+if __name__ == "__main__":
+    # Worker processes of the frozen (PyInstaller) build re-run this executable
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Startup timing report for tracking cold-start regressions.
+
+Set the SIM_STARTUP_TIMING environment variable to enable it:
+    SIM_STARTUP_TIMING=1            print the report to stderr
+    SIM_STARTUP_TIMING=timing.json  write the report as JSON (useful for the windowed build)
+
+Phases are measured from the moment this module is first imported, so it
+should be imported before anything else by the entry points.
+"""
+
+import os
+import sys
+import time
+import json
+import importlib
+
+# Environment variable enabling the report
+STARTUP_TIMING_ENV = "SIM_STARTUP_TIMING"
+
+_start = time.perf_counter()
+_phases = []
+_imports = []
+
+def enabled():
+    """Return True if startup timing was requested."""
+    return bool(os.environ.get(STARTUP_TIMING_ENV))
+
+def mark(phase):
+    """Record that a startup phase has been reached.
+    
+    Args:
+        phase (str): Name of the phase, e.g. 'window created'
+    """
+    if enabled():
+        _phases.append((phase, time.perf_counter() - _start))
+
+def timed_import(module_name):
+    """Import a module, recording how long the import took.
+    
+    Args:
+        module_name (str): Name of the module to import
+        
+    Returns:
+        module: The imported module
+    """
+    started = time.perf_counter()
+    already_loaded = module_name in sys.modules
+    module = importlib.import_module(module_name)
+    if enabled() and not already_loaded:
+        _imports.append((module_name, time.perf_counter() - started))
+    return module
+
+def report():
+    """Return the recorded timings as a dictionary."""
+    return {
+        "phases": [{"phase": phase, "seconds": round(seconds, 4)} for phase, seconds in _phases],
+        "imports": [{"module": name, "seconds": round(seconds, 4)} for name, seconds in _imports]
+    }
+
+def dump():
+    """Write the timing report to stderr or to the file named by SIM_STARTUP_TIMING."""
+    target = os.environ.get(STARTUP_TIMING_ENV)
+    if not target:
+        return
+    
+    if target == "1":
+        lines = ["Startup timing:"]
+        for phase, seconds in _phases:
+            lines.append(f"  {seconds * 1000:8.1f} ms  {phase}")
+        for name, seconds in _imports:
+            lines.append(f"  {seconds * 1000:8.1f} ms  import {name}")
+        print("\n".join(lines), file=sys.stderr)
+    else:
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump(report(), f, indent=2)
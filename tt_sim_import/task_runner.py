@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Background execution of heavy operations for the SIM Management GUI.
+
+Work runs on a single background executor thread. Progress, results and
+errors are handed back through a thread-safe queue that is polled from the
+Tk main loop with after(), so widgets are only ever touched on the main thread.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Milliseconds between polls of the result queue
+POLL_INTERVAL_MS = 100
+
+class OperationCancelled(Exception):
+    """Raised inside a background operation when the user cancelled it."""
+
+def check_cancelled(cancel_event):
+    """Raise OperationCancelled if the cancel event has been set.
+    
+    Args:
+        cancel_event (threading.Event): Event set by the cancel button, may be None
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise OperationCancelled()
+
+class TaskRunner:
+    """Run one heavy operation at a time off the Tk main thread.
+    
+    Args:
+        root (tk.Tk): The application window, used to schedule queue polling
+        status_label (tk.Label, optional): Status bar label receiving progress messages
+        cancel_button (tk.Button, optional): Button enabled while an operation runs
+        busy_widgets (list, optional): Widgets disabled while an operation runs
+    """
+    
+    def __init__(self, root, status_label=None, cancel_button=None, busy_widgets=None):
+        self.root = root
+        self.status_label = status_label
+        self.cancel_button = cancel_button
+        self.busy_widgets = list(busy_widgets or [])
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sim-worker")
+        self._queue = queue.Queue()
+        self._cancel_event = None
+        self._callbacks = None
+        
+        self._set_busy(False)
+        
+    @property
+    def busy(self):
+        """True while an operation is running."""
+        return self._callbacks is not None
+    
+    def submit(self, work, on_success, on_error=None, on_cancel=None, on_progress=None):
+        """Start a background operation.
+        
+        Args:
+            work (callable): Called as work(report, cancel_event) on the worker thread.
+                             report(message) sends a progress message to the main thread.
+            on_success (callable): Called with the return value of work on the main thread
+            on_error (callable, optional): Called with the raised exception on the main thread
+            on_cancel (callable, optional): Called on the main thread after a cancellation
+            on_progress (callable, optional): Called with each progress message on the main thread
+            
+        Returns:
+            bool: False if another operation is still running
+        """
+        if self.busy:
+            return False
+        
+        self._cancel_event = threading.Event()
+        self._callbacks = {
+            "success": on_success,
+            "error": on_error,
+            "cancel": on_cancel,
+            "progress": on_progress
+        }
+        self._set_busy(True)
+        
+        cancel_event = self._cancel_event
+        report = lambda message: self._queue.put(("progress", message))
+        
+        def run():
+            try:
+                self._queue.put(("success", work(report, cancel_event)))
+            except OperationCancelled:
+                self._queue.put(("cancel", None))
+            except Exception as e:
+                self._queue.put(("error", e))
+        
+        self._executor.submit(run)
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+        return True
+    
+    def cancel(self):
+        """Ask the running operation to stop at its next checkpoint."""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self.show_status("Cancelling...")
+            
+    def shutdown(self):
+        """Cancel the running operation and stop the executor."""
+        self.cancel()
+        self._executor.shutdown(wait=False)
+    
+    def _poll(self):
+        """Drain the queue on the main thread and dispatch the callbacks."""
+        if not self.busy:
+            return
+        
+        while True:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == "progress":
+                self.show_status(payload)
+                if self._callbacks["progress"]:
+                    self._callbacks["progress"](payload)
+                continue
+            
+            # The operation finished, release the runner before calling back
+            callback = self._callbacks[kind]
+            self._callbacks = None
+            self._cancel_event = None
+            self._set_busy(False)
+            if callback is not None:
+                if kind == "cancel":
+                    callback()
+                else:
+                    callback(payload)
+            return
+        
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+    
+    def show_status(self, message):
+        """Show a message in the status bar."""
+        if self.status_label is not None:
+            self.status_label.config(text=message)
+    
+    def _set_busy(self, busy):
+        """Enable the cancel button and disable the busy widgets while running."""
+        if self.cancel_button is not None:
+            self.cancel_button.config(state="normal" if busy else "disabled")
+        for widget in self.busy_widgets:
+            widget.config(state="disabled" if busy else "normal")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the benchmark harness and its synthetic workbook generator.
+"""
+
+import os
+import unittest
+import tempfile
+import pandas as pd
+from constants import PROVIDER_SPECS
+from header_resolver import default_resolver
+from benchmark import generate_workbook, run_case, format_results, STAGES
+
+class TestBenchmark(unittest.TestCase):
+    """Test cases for the benchmark harness."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        
+    def test_generated_headers_resolve(self):
+        """Test that every provider's generated header resolves to that provider."""
+        for provider in PROVIDER_SPECS:
+            for seed in range(3):
+                file_path = os.path.join(self.temp_dir.name, f"{provider}_{seed}.xlsx")
+                headers = generate_workbook(file_path, provider, 20, seed)
+                renamed, _ = default_resolver.resolve(headers, provider)
+                self.assertEqual(sorted(renamed.values()),
+                                 sorted(PROVIDER_SPECS[provider]["required_columns"] +
+                                        list(PROVIDER_SPECS[provider]["ip_columns"])))
+                self.assertEqual(len(pd.read_excel(file_path)), 20)
+                
+    def test_run_case(self):
+        """Test that a case reports every stage and the generated defects."""
+        file_path = os.path.join(self.temp_dir.name, "mtn.xlsx")
+        generate_workbook(file_path, "MTN", 3000)
+        
+        for stream in (False, True):
+            result = run_case(file_path, "MTN", stream)
+            self.assertEqual(result["rows"], 3000)
+            self.assertEqual(list(result["seconds"]), STAGES)
+            self.assertEqual(result["invalid_cell_numbers"], 0)
+            self.assertGreater(result["flagged_rows"], 0)
+            self.assertEqual(set(result["inventory"]), {"insert", "update", "bytes"})
+            
+        report = {"results": [result]}
+        self.assertIn("vs base", format_results(report, report))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the compact column representations.
+"""
+
+import os
+import shutil
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from compact import compact_text, compact_ip, compact_columns, expand_column, text_frame, column_nbytes
+from import_utils import read_sim_file
+from excel_stream import SimStreamReader
+
+class TestCompactColumns(unittest.TestCase):
+    """Test cases for the compact column representations."""
+    
+    def test_identifiers_as_fixed_width_bytes(self):
+        """Test that ASCII identifiers are stored as fixed-width bytes and round-trip."""
+        values = ["89270000000000000003", "8927000000000000001", ""]
+        compact = compact_text(values)
+        self.assertEqual(compact.dtype, np.dtype("S20"))
+        self.assertEqual(list(expand_column(compact)), values)
+        
+        # Non-ASCII text cannot be stored as bytes and is kept as it is
+        self.assertEqual(compact_text(["Blad é"]).dtype, object)
+    
+    def test_ip_addresses_as_uint32(self):
+        """Test that canonical IP addresses are stored as uint32 and anything else as text."""
+        compact = compact_ip(["10.0.0.1", "196.25.1.200"])
+        self.assertEqual(compact.dtype, np.uint32)
+        self.assertEqual(list(expand_column(compact)), ["10.0.0.1", "196.25.1.200"])
+        
+        # Blanks, invalid addresses and leading zeros would not round-trip through uint32
+        for values in (["10.0.0.1", ""], ["10.0.0.1", "bad"], ["10.0.0.01"]):
+            compact = compact_ip(values)
+            self.assertEqual(compact.dtype.kind, "S")
+            self.assertEqual(list(expand_column(compact)), values)
+    
+    def test_frame_round_trip_and_memory(self):
+        """Test that compact columns rebuild the same text frame in a fraction of the memory."""
+        rows = 10000
+        sim_df = pd.DataFrame({
+            "Cell Number": [f"2782{i:07d}" for i in range(rows)],
+            "Sim Number": [f"8927{i:016d}" for i in range(rows)],
+            "IP Address": [f"10.0.{i // 256}.{i % 256}" for i in range(rows)]
+        }, dtype=object)
+        columns = compact_columns(sim_df)
+        self.assertEqual([values.dtype for values in columns.values()], [np.dtype("S11"), np.dtype("S20"), np.uint32])
+        pd.testing.assert_frame_equal(text_frame(columns), sim_df, check_dtype=False)
+        pd.testing.assert_frame_equal(text_frame(columns, 5, 7), sim_df.iloc[5:7].reset_index(drop=True),
+                                      check_dtype=False)
+        
+        object_bytes = sim_df.memory_usage(index=False, deep=True).sum()
+        compact_bytes = sum(column_nbytes(values) for values in columns.values())
+        self.assertLess(compact_bytes * 4, object_bytes)
+
+class TestTextReading(unittest.TestCase):
+    """Test that identifiers are read as text from the start."""
+    
+    def setUp(self):
+        """Create a workbook with a gap in the numeric cell numbers."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "vodacom.xlsx")
+        pd.DataFrame({
+            "MSISDN": [821234567, None, 831234567],
+            "ICCID": ["89270000000000000003", "89270000000000000011", "8927000000000000001"],
+            "IP Address": ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+        }).to_excel(self.file_path, index=False)
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_read_sim_file(self):
+        """Test that whole-file reads keep cell numbers and ICCIDs as exact text."""
+        _, sim_df = read_sim_file(self.file_path, "Vodacom")
+        self.assertEqual(sim_df["Cell Number"].iloc[0], "821234567")
+        self.assertEqual(list(sim_df["Sim Number"]),
+                         ["89270000000000000003", "89270000000000000011", "8927000000000000001"])
+    
+    def test_stream_reader(self):
+        """Test that streamed chunks hold text, without a float detour for columns with gaps."""
+        with SimStreamReader(self.file_path, "Vodacom") as reader:
+            chunk = next(iter(reader))
+        self.assertEqual(list(chunk["Cell Number"]), ["821234567", "", "831234567"])
+        self.assertEqual(chunk["Sim Number"].iloc[1], "89270000000000000011")
+
+if __name__ == "__main__":
+    unittest.main()
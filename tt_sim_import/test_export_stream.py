@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the streaming CSV export writer.
+"""
+
+import os
+import gzip
+import json
+import shutil
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from export_stream import (CsvExportWriter, format_csv_rows, compression_for, compressed_path, export_format_for,
+                           LINE_TERMINATOR)
+from export_utils import build_export_frame, write_export_csv_chunks, write_export_chunks
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+class TestCsvExportWriter(unittest.TestCase):
+    """Test cases for CsvExportWriter."""
+    
+    def setUp(self):
+        """Create a Vodacom chunk and a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.sim_df = pd.DataFrame({
+            "Cell Number": ["0821234567", "831234567", None],
+            "Sim Number": ["89270000000000000003", "89270000000000000011", "89270000000000000029"],
+            "IP Address": ["10.0.0.1", None, "10.0.0.3"]
+        })
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_matches_to_csv(self):
+        """Test that chunked output is identical to writing the export frame with to_csv."""
+        output_path = os.path.join(self.temp_dir, "export.csv")
+        progress = []
+        chunks = [self.sim_df.iloc[:2], self.sim_df.iloc[2:]]
+        self.assertEqual(write_export_csv_chunks(chunks, output_path, progress.append), 3)
+        self.assertEqual(progress, [2, 3])
+        
+        with open(output_path, "r", encoding="utf-8", newline="") as f:
+            expected = build_export_frame(self.sim_df).to_csv(index=False, lineterminator=LINE_TERMINATOR)
+            self.assertEqual(f.read(), expected)
+    
+    def test_gzip(self):
+        """Test that a .gz destination is compressed and decompresses to the plain CSV."""
+        plain_path = os.path.join(self.temp_dir, "export.csv")
+        gzip_path = os.path.join(self.temp_dir, "export.csv.gz")
+        write_export_csv_chunks([self.sim_df], plain_path)
+        write_export_csv_chunks([self.sim_df], gzip_path)
+        with open(plain_path, "rb") as plain, gzip.open(gzip_path, "rb") as compressed:
+            self.assertEqual(compressed.read(), plain.read())
+    
+    def test_quoting_and_header_only(self):
+        """Test that values with separators are quoted and empty exports still get a header."""
+        text = format_csv_rows([["1", "2"], ['a,b', 'say "hi"']], 2)
+        self.assertEqual(text.splitlines(), ['1,"a,b"', '2,"say ""hi"""'])
+        
+        output_path = os.path.join(self.temp_dir, "empty.csv")
+        with CsvExportWriter(output_path, ["Count", "Cell Number"]):
+            pass
+        self.assertEqual(pd.read_csv(output_path).columns.tolist(), ["Count", "Cell Number"])
+        
+        # Columns a chunk lacks are left empty
+        with CsvExportWriter(output_path, ["Count", "Ip Address2"]) as writer:
+            writer.write({"Count": np.arange(1, 3)})
+        with open(output_path, "r", encoding="utf-8") as f:
+            self.assertEqual(f.read().splitlines(), ["Count,Ip Address2", "1,", "2,"])
+    
+    def test_compression_selection(self):
+        """Test that compression follows the extension and is appended to batch outputs."""
+        self.assertEqual(compression_for("export.CSV.GZ"), "gzip")
+        self.assertEqual(compression_for("export.csv.zst"), "zstd")
+        self.assertIsNone(compression_for("export.csv"))
+        self.assertEqual(compressed_path("out_techtool.csv", "gzip"), "out_techtool.csv.gz")
+        self.assertEqual(compressed_path("out_techtool.csv", None), "out_techtool.csv")
+
+class TestExportFormats(unittest.TestCase):
+    """Test cases for the JSON Lines, Parquet and Arrow export formats."""
+    
+    def setUp(self):
+        """Create the expected export of a Vodacom chunk and a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.sim_df = pd.DataFrame({
+            "Cell Number": ["0821234567", None],
+            "Sim Number": ["89270000000000000003", 'odd "value"'],
+            "IP Address": ["10.0.0.1", None]
+        })
+        self.expected = build_export_frame(self.sim_df)
+        self.expected["Ip Address1"] = self.expected["Ip Address1"].fillna("")
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_format_selection(self):
+        """Test that the format follows the extension, ignoring a compression extension."""
+        self.assertEqual(export_format_for("export.jsonl.gz"), "ndjson")
+        self.assertEqual(export_format_for("export.feather"), "arrow")
+        self.assertEqual(export_format_for("export.parquet"), "parquet")
+        self.assertIsNone(export_format_for("export.txt"))
+        with self.assertRaises(ValueError):
+            write_export_chunks([self.sim_df], os.path.join(self.temp_dir, "export.csv"), output_format="xml")
+    
+    def test_ndjson(self):
+        """Test that JSON Lines output holds the same columns and values as the CSV."""
+        output_path = os.path.join(self.temp_dir, "export.ndjson")
+        self.assertEqual(write_export_chunks([self.sim_df.iloc[:1], self.sim_df.iloc[1:]], output_path), 2)
+        with open(output_path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records, self.expected.to_dict(orient="records"))
+    
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_and_arrow(self):
+        """Test that Parquet and Arrow output hold the same columns and values as the CSV."""
+        for extension in ("parquet", "arrow"):
+            output_path = os.path.join(self.temp_dir, f"export.{extension}")
+            write_export_chunks([self.sim_df.iloc[:1], self.sim_df.iloc[1:]], output_path)
+            if extension == "parquet":
+                exported = pd.read_parquet(output_path)
+            else:
+                exported = pd.read_feather(output_path)
+            pd.testing.assert_frame_equal(exported, self.expected, check_dtype=False)
+            with self.assertRaises(ValueError):
+                write_export_chunks([self.sim_df], output_path + ".gz")
+
+if __name__ == "__main__":
+    unittest.main()
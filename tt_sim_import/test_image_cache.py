@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the pre-rendered image asset cache.
+"""
+
+import os
+import time
+import shutil
+import unittest
+import tempfile
+from PIL import Image
+from image_cache import ImageCache
+
+class TestImageCache(unittest.TestCase):
+    """Test cases for ImageCache."""
+    
+    def setUp(self):
+        """Create a source asset and an empty cache directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        self.asset_path = os.path.join(self.temp_dir, "logo.png")
+        Image.new("RGBA", (400, 100), (228, 0, 0, 255)).save(self.asset_path)
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_render_sizes(self):
+        """Test fit and width rendering keep the aspect ratio."""
+        cache = ImageCache()
+        self.assertEqual(cache.fit(self.asset_path, 94, 94).size, (94, 23))
+        self.assertEqual(cache.width(self.asset_path, 80).size, (80, 20))
+        self.assertEqual(cache.width(self.asset_path, 80, scale=1.5).size, (120, 30))
+    
+    def test_memory_and_disk_hits(self):
+        """Test that renders are reused from memory and from disk across instances."""
+        cache = ImageCache(self.cache_dir)
+        first = cache.width(self.asset_path, 250)
+        self.assertIs(cache.width(self.asset_path, 250), first)
+        self.assertEqual(cache.stats(), {"memory_hits": 1, "disk_hits": 0, "misses": 1})
+        
+        warm_cache = ImageCache(self.cache_dir)
+        warm = warm_cache.width(self.asset_path, 250)
+        self.assertEqual(warm_cache.stats()["disk_hits"], 1)
+        self.assertEqual(warm.tobytes(), first.tobytes())
+    
+    def test_modified_asset_invalidates(self):
+        """Test that a changed asset is re-rendered and the stale render removed."""
+        cache = ImageCache(self.cache_dir)
+        cache.width(self.asset_path, 100)
+        
+        Image.new("RGBA", (200, 100), (255, 203, 5, 255)).save(self.asset_path)
+        stamp = time.time() + 10
+        os.utime(self.asset_path, (stamp, stamp))
+        
+        warm_cache = ImageCache(self.cache_dir)
+        self.assertEqual(warm_cache.width(self.asset_path, 100).size, (100, 50))
+        self.assertEqual(warm_cache.stats()["misses"], 1)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
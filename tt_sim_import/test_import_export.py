@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the headless import and export functionality.
+"""
+
+import os
+import sys
+import unittest
+import subprocess
+from unittest import mock
+import tempfile
+import shutil
+import pandas as pd
+from import_utils import resolve_columns, infer_provider, read_sim_file, ColumnResolutionError
+from header_resolver import HeaderResolver
+from export_utils import build_export_frame, write_export_csv_chunks
+from excel_stream import SimStreamReader, read_sim_file_chunked
+from constants import COLUMN_MAPPING_ATTR
+from multi_sheet import WorkbookSheets
+import batch
+from batch import collect_input_files, run_batch, convert_file
+from validation import ChunkValidator
+
+class TestColumnResolution(unittest.TestCase):
+    """Test cases for resolving supplier column names."""
+    
+    def test_resolve_vodacom(self):
+        """Test resolving a Vodacom header."""
+        renamed, ip_columns = resolve_columns(["MSISDN", "ICCID", "IP Address", "Billing"], "Vodacom")
+        self.assertEqual(renamed, {"MSISDN": "Cell Number", "ICCID": "Sim Number", "IP Address": "IP Address"})
+        self.assertEqual(ip_columns, ["IP Address"])
+    
+    def test_resolve_mtn(self):
+        """Test resolving an MTN header with CN/NL IP columns."""
+        renamed, ip_columns = resolve_columns(["Cell No", "Sim No", "CN-IP", "NL-IP"], "MTN")
+        self.assertEqual(renamed["CN-IP"], "IP Address1")
+        self.assertEqual(renamed["NL-IP"], "IP Address2")
+        self.assertEqual(ip_columns, ["IP Address1", "IP Address2"])
+    
+    def test_missing_columns(self):
+        """Test that missing columns raise a descriptive error."""
+        with self.assertRaises(ColumnResolutionError) as ctx:
+            resolve_columns(["MSISDN", "IP Address"], "Vodacom")
+        self.assertIn("Sim Number", str(ctx.exception))
+        self.assertEqual(ctx.exception.status_text, "Missing columns.")
+    
+    def test_infer_provider(self):
+        """Test inferring the provider from file names and headers."""
+        self.assertEqual(infer_provider(["MSISDN", "ICCID", "IP"], "MTN_batch.xlsx"), "MTN")
+        self.assertEqual(infer_provider(["MSISDN", "ICCID", "IP"], "delivery.xlsx"), "Vodacom")
+        self.assertEqual(infer_provider(["MSISDN", "ICCID", "IP1", "IP2"]), "MTN")
+        self.assertIsNone(infer_provider(["MSISDN", "ICCID"]))
+
+class TestHeaderResolver(unittest.TestCase):
+    """Test cases for the precompiled header resolver."""
+    
+    def test_signature_cache(self):
+        """Test that a repeated header layout is served from the cache."""
+        resolver = HeaderResolver()
+        header = ["MSISDN", "ICCID", "CN-IP", "NL-IP"]
+        first = resolver.resolve(header, "MTN")
+        second = resolver.resolve(list(header), "MTN")
+        self.assertEqual(first, second)
+        self.assertEqual(resolver.cache_info(), {"hits": 1, "misses": 1, "size": 1})
+        
+        # Returned mappings are copies, mutating them must not poison the cache
+        second[0].clear()
+        self.assertEqual(resolver.resolve(header, "MTN"), first)
+    
+    def test_cached_errors(self):
+        """Test that failed resolutions are cached and raised again."""
+        resolver = HeaderResolver()
+        for _ in range(2):
+            with self.assertRaises(ColumnResolutionError) as ctx:
+                resolver.resolve(["MSISDN", "ICCID"], "Vodacom")
+            self.assertEqual(ctx.exception.status_text, "Missing IP column.")
+        self.assertEqual(resolver.cache_info()["hits"], 1)
+    
+    def test_variation_priority(self):
+        """Test that the first listed variation wins, regardless of column order."""
+        resolver = HeaderResolver()
+        renamed, _ = resolver.resolve(["SIM", "ICCID", "Cell No", "IP", "IP Address"], "Vodacom")
+        self.assertEqual(renamed["ICCID"], "Sim Number")
+        self.assertEqual(renamed["IP Address"], "IP Address")
+        self.assertNotIn("SIM", renamed)
+    
+    def test_blank_headers_ignored(self):
+        """Test that blank headers never match the MTN substring rules."""
+        resolver = HeaderResolver()
+        renamed, _ = resolver.resolve(["", "MSISDN", "ICCID", "IP1", "IP2"], "MTN")
+        self.assertNotIn("", renamed)
+
+class TestExport(unittest.TestCase):
+    """Test cases for building the Techtool export layout."""
+    
+    def test_build_export_frame(self):
+        """Test the export layout for an MTN import."""
+        sim_df = pd.DataFrame({
+            "Cell Number": ["821234567", "27831234567"],
+            "Sim Number": ["8927000000000000001", "8927000000000000002"],
+            "IP Address1": ["10.0.0.1", "10.0.0.2"],
+            "IP Address2": ["10.1.0.1", "10.1.0.2"]
+        })
+        export_sims = build_export_frame(sim_df)
+        self.assertEqual(list(export_sims.columns),
+                         ["Count", "Cell Number", "Sim Number", "Ip Address1", "Ip Address2"])
+        self.assertEqual(list(export_sims["Count"]), [1, 2])
+        self.assertEqual(list(export_sims["Cell Number"]), ["27821234567", "27831234567"])
+
+class TestBatch(unittest.TestCase):
+    """Test cases for the headless batch converter."""
+    
+    def setUp(self):
+        """Create a directory with one Vodacom and one broken workbook."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.temp_dir, "out")
+        pd.DataFrame({
+            "MSISDN": ["821234567", "831234567"],
+            "ICCID": ["8927000000000000001", "8927000000000000002"],
+            "IP Address": ["10.0.0.1", "10.0.0.2"]
+        }).to_excel(os.path.join(self.temp_dir, "vodacom.xlsx"), index=False)
+        pd.DataFrame({"Unrelated": [1]}).to_excel(os.path.join(self.temp_dir, "broken.xlsx"), index=False)
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_read_sim_file(self):
+        """Test reading a workbook and inferring its provider."""
+        provider, sim_df = read_sim_file(os.path.join(self.temp_dir, "vodacom.xlsx"))
+        self.assertEqual(provider, "Vodacom")
+        self.assertEqual(list(sim_df.columns), ["Cell Number", "Sim Number", "IP Address"])
+    
+    def test_run_batch(self):
+        """Test converting a directory with a process pool."""
+        input_files = collect_input_files(self.temp_dir)
+        self.assertEqual([os.path.basename(f) for f in input_files], ["broken.xlsx", "vodacom.xlsx"])
+        
+        results = run_batch(input_files, self.output_dir, max_workers=2)
+        broken, vodacom = results
+        self.assertIsNotNone(broken["error"])
+        self.assertIsNone(vodacom["error"])
+        self.assertEqual(vodacom["rows"], 2)
+        
+        exported = pd.read_csv(vodacom["output"], dtype=str)
+        self.assertEqual(list(exported["Cell Number"]), ["27821234567", "27831234567"])
+    
+    def test_headless_without_tkinter(self):
+        """Test that the batch converter and its import/export modules load without tkinter."""
+        code = ("import sys; sys.modules['tkinter'] = None; "
+                "import import_utils, export_utils, batch, watch, service, sim_import")
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+class TestStreaming(unittest.TestCase):
+    """Test cases for the streaming workbook reader."""
+    
+    def setUp(self):
+        """Create an MTN workbook with a title row above the header."""
+        from openpyxl import Workbook
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "delivery.xlsx")
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["MTN delivery April"])
+        sheet.append(["Cell No", "Billing", "Sim No", "CN", "NL"])
+        for i in range(25):
+            sheet.append([821234500 + i, 99.0, f"89270000000000000{i:02d}", f"10.0.0.{i}", f"10.1.0.{i}"])
+        workbook.save(self.file_path)
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_chunks(self):
+        """Test that only the SIM columns are read, in bounded chunks."""
+        with SimStreamReader(self.file_path, chunk_size=10) as reader:
+            self.assertEqual(reader.provider, "MTN")
+            self.assertEqual(reader.header_row, 1)
+            chunks = list(reader)
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual(list(chunks[0].columns), ["Cell Number", "Sim Number", "IP Address1", "IP Address2"])
+        self.assertEqual(chunks[2]["IP Address2"].iloc[-1], "10.1.0.24")
+    
+    def test_streamed_export(self):
+        """Test that streamed chunks produce one continuous CSV."""
+        output_path = os.path.join(self.temp_dir, "out.csv")
+        with SimStreamReader(self.file_path, "MTN", chunk_size=7) as reader:
+            self.assertEqual(write_export_csv_chunks(reader, output_path), 25)
+        exported = pd.read_csv(output_path, dtype=str)
+        self.assertEqual(list(exported["Count"]), [str(i) for i in range(1, 26)])
+        self.assertEqual(exported["Cell Number"].iloc[0], "27821234500")
+    
+    def test_read_sim_file_finds_header(self):
+        """Test that the whole-file reader accepts the same title rows as the streaming reader."""
+        provider, sim_df = read_sim_file(self.file_path)
+        self.assertEqual(provider, "MTN")
+        with SimStreamReader(self.file_path, chunk_size=100) as reader:
+            streamed = next(iter(reader))
+        pd.testing.assert_frame_equal(sim_df.reset_index(drop=True), streamed, check_dtype=False)
+        
+        # A blank row above the title row
+        from openpyxl import load_workbook
+        workbook = load_workbook(self.file_path)
+        workbook.active.insert_rows(1)
+        workbook.save(self.file_path)
+        self.assertEqual(len(read_sim_file(self.file_path, "MTN")[1]), 25)
+        self.assertIsNone(convert_file(self.file_path, self.temp_dir)["error"])
+    
+    def test_whole_file_fallback_mapping(self):
+        """Test that workbooks read whole instead of streamed (legacy .xls) keep their column mapping."""
+        streamed = read_sim_file_chunked(self.file_path)[1].attrs[COLUMN_MAPPING_ATTR]
+        self.assertEqual(streamed, {"Cell No": "Cell Number", "Sim No": "Sim Number",
+                                    "CN": "IP Address1", "NL": "IP Address2"})
+        # pandas reads the workbook by its content, the extension only selects the fallback
+        legacy_path = os.path.join(self.temp_dir, "delivery.xls")
+        shutil.copy(self.file_path, legacy_path)
+        provider, sim_df = read_sim_file_chunked(legacy_path, chunk_size=10)
+        self.assertEqual(provider, "MTN")
+        self.assertEqual(len(sim_df), 25)
+        self.assertEqual(sim_df.attrs[COLUMN_MAPPING_ATTR], streamed)
+    
+    def test_streamed_convert_uses_provider_rules(self):
+        """Test that a streamed conversion validates with the IP rules of the reader's provider."""
+        with mock.patch.object(batch, "ChunkValidator", wraps=ChunkValidator) as validator:
+            result = convert_file(self.file_path, self.temp_dir, "MTN", stream=True, chunk_size=10)
+        self.assertIsNone(result["error"])
+        validator.assert_called_once_with(provider="MTN")
+        self.assertEqual(result["validation"]["rows"], 25)
+    
+    def test_stream_and_whole_file_outputs_identical(self):
+        """Test that padded identifiers are written stripped whether or not the workbook is streamed."""
+        from openpyxl import load_workbook
+        workbook = load_workbook(self.file_path)
+        workbook.active.append([" 821234599 ", 99.0, " 89270000000000000002 ", " 10.0.0.1 ", "10.1.0.1"])
+        workbook.save(self.file_path)
+        
+        outputs = {}
+        for stream in (False, True):
+            output_dir = os.path.join(self.temp_dir, f"stream_{stream}")
+            os.makedirs(output_dir)
+            result = convert_file(self.file_path, output_dir, "MTN", stream=stream, chunk_size=10)
+            self.assertIsNone(result["error"])
+            self.assertEqual(result["rows"], 26)
+            with open(result["output"], "rb") as f:
+                outputs[stream] = f.read()
+        self.assertEqual(outputs[False], outputs[True])
+        self.assertIn(b",89270000000000000002,10.0.0.1,", outputs[False])
+        self.assertNotIn(b" 8927", outputs[False])
+
+class TestMultiSheet(unittest.TestCase):
+    """Test cases for importing every sheet of a workbook."""
+    
+    def setUp(self):
+        """Create an MTN workbook split over two APN sheets, a notes sheet and a third APN sheet."""
+        from openpyxl import Workbook
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "mtn_delivery.xlsx")
+        workbook = Workbook()
+        workbook.remove(workbook.active)
+        for name, count in [("APN A", 12), ("Notes", 0), ("APN B", 5), ("APN C", 3)]:
+            sheet = workbook.create_sheet(name)
+            if name == "Notes":
+                sheet.append(["Delivered by courier"])
+                continue
+            if name == "APN C":
+                sheet.append(["Batch 7"])
+            sheet.append(["Cell No", "Sim No", "IP1", "IP2"])
+            for i in range(count):
+                sheet.append([821234500 + i, f"8927000000000000{i:03d}", f"10.0.0.{i}", f"10.1.0.{i}"])
+        workbook.save(self.file_path)
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+        
+    def test_scan(self):
+        """Test that sheets without SIM columns are skipped and layouts are resolved once."""
+        sheets = WorkbookSheets(self.file_path)
+        self.assertEqual(sheets.provider, "MTN")
+        self.assertEqual(list(sheets.layouts), ["APN A", "APN B", "APN C"])
+        self.assertEqual(list(sheets.skipped), ["Notes"])
+        self.assertEqual(sheets.layouts["APN C"]["header_row"], 1)
+        self.assertEqual(sheets.layout_count, 1)
+    
+    def test_read_concurrently(self):
+        """Test that the sheets are concatenated in workbook order with their source sheet."""
+        sheets = WorkbookSheets(self.file_path, "MTN")
+        for max_workers in (1, 3):
+            sim_df = sheets.read(max_workers, chunk_size=4)
+            self.assertEqual(len(sim_df), 20)
+            self.assertEqual(list(sim_df.columns),
+                             ["Cell Number", "Sim Number", "IP Address1", "IP Address2", "Source Sheet"])
+            self.assertEqual(list(sim_df["Source Sheet"].drop_duplicates()), ["APN A", "APN B", "APN C"])
+            self.assertEqual(sim_df["IP Address2"].iloc[12], "10.1.0.0")
+        
+        chunks = list(sheets.iter_chunks(chunk_size=10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 2, 5, 3])
+    
+    def test_batch_all_sheets(self):
+        """Test converting every sheet headless."""
+        results = run_batch([self.file_path], self.temp_dir, all_sheets=True)
+        self.assertIsNone(results[0]["error"])
+        self.assertEqual(results[0]["rows"], 20)
+        self.assertEqual(results[0]["sheets"], ["APN A", "APN B", "APN C"])
+        
+        results = run_batch([self.file_path], self.temp_dir, all_sheets=True, stream=True, chunk_size=4)
+        self.assertEqual(results[0]["rows"], 20)
+        exported = pd.read_csv(results[0]["output"], dtype=str)
+        self.assertEqual(list(exported["Count"]), [str(i) for i in range(1, 21)])
+
+if __name__ == '__main__':
+    unittest.main()
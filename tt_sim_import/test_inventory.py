@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the SQLite SIM inventory.
+"""
+
+import os
+import shutil
+import unittest
+import tempfile
+from unittest import mock
+import numpy as np
+import pandas as pd
+from compact import compact_columns
+from parse_cache import normalise_sim_frame
+import inventory
+from inventory import Inventory, ImportRecorder, record_import
+from batch import convert_file
+
+class TestInventory(unittest.TestCase):
+    """Test cases for Inventory."""
+    
+    def setUp(self):
+        """Create an inventory in a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.inventory = Inventory(os.path.join(self.temp_dir, "inventory.db"))
+        self.mtn_df = pd.DataFrame({
+            "Cell Number": ["0831234567", "831234568", "0831234569"],
+            "Sim Number": ["89270000000000000003", "89270000000000000011", ""],
+            "IP Address1": ["10.0.0.1", "010.0.0.2", "10.0.0.3"],
+            "IP Address2": ["10.1.0.1", "10.1.0.2", None]
+        })
+        
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_upsert_and_lookups(self):
+        """Test that imports are upserted and found through the indexed lookups."""
+        counts = self.inventory.upsert("MTN", "/deliveries/mtn.xlsx", self.mtn_df, np.array([0, 128, 0]))
+        self.assertEqual(counts, {"rows": 2, "inserted": 2, "updated": 0, "skipped": 1})
+        
+        sim = self.inventory.find_by_iccid("89270000000000000011")
+        self.assertEqual((sim["msisdn"], sim["ip_address1"], sim["ip_address2"], sim["provider"], sim["flags"]),
+                         ("27831234568", "10.0.0.2", "10.1.0.2", "MTN", 128))
+        self.assertEqual(sim["source_file"], os.path.abspath("/deliveries/mtn.xlsx"))
+        self.assertEqual([s["iccid"] for s in self.inventory.find_by_ip(" 10.1.0.1")], ["89270000000000000003"])
+        self.assertEqual(len(self.inventory.find_by_msisdn("083 123 4567", "MTN")), 1)
+        self.assertEqual(self.inventory.existing("iccid", ["89270000000000000003", "89270000000000000999"]),
+                         {"89270000000000000003"})
+        
+        # A Vodacom delivery reusing an MTN address and moving one SIM
+        vodacom_df = pd.DataFrame({
+            "Cell Number": ["0821234567", "0829999999"],
+            "Sim Number": ["8927000000000000001", "89270000000000000011"],
+            "IP Address": ["10.0.0.1", "10.5.0.1"]
+        })
+        counts = self.inventory.upsert("Vodacom", "/deliveries/voda.xlsx", compact_columns(
+            normalise_sim_frame(vodacom_df, "Vodacom")))
+        self.assertEqual((counts["inserted"], counts["updated"]), (1, 1))
+        self.assertEqual(self.inventory.count(), 3)
+        self.assertEqual(self.inventory.count("Vodacom"), 2)
+        self.assertEqual(self.inventory.shared_ips(), {"10.0.0.1": ["89270000000000000003", "8927000000000000001"]})
+        self.assertEqual([record["provider"] for record in self.inventory.imports()], ["MTN", "Vodacom"])
+    
+    def test_export_chunks(self):
+        """Test that a provider's SIMs are read back as standardised chunks."""
+        self.inventory.upsert("MTN", "/deliveries/mtn.xlsx", self.mtn_df)
+        chunks = list(self.inventory.iter_chunks("MTN", "/deliveries/mtn.xlsx", chunk_size=1))
+        self.assertEqual(len(chunks), 2)
+        exported = pd.concat(chunks, ignore_index=True)
+        self.assertEqual(list(exported.columns), ["Cell Number", "Sim Number", "IP Address1", "IP Address2"])
+        self.assertEqual(list(exported["IP Address1"]), ["10.0.0.1", "10.0.0.2"])
+        self.assertEqual(list(self.inventory.iter_chunks("MTN", "/deliveries/other.xlsx")), [])
+    
+    def test_record_import(self):
+        """Test that cached re-imports are not upserted again and bad data never fails the import."""
+        with mock.patch.object(inventory, "inventory", self.inventory):
+            self.assertEqual(record_import("MTN", "/deliveries/mtn.xlsx", self.mtn_df)["inserted"], 2)
+            self.assertIsNone(record_import("MTN", "/deliveries/mtn.xlsx", self.mtn_df, cached=True))
+            self.assertIsNotNone(record_import("MTN", "/deliveries/copy.xlsx", self.mtn_df, cached=True))
+            self.assertEqual(len(self.inventory.imports()), 2)
+            
+            with self.assertLogs("tt_sim_import.inventory", "WARNING"):
+                self.assertIsNone(record_import("MTN", "/deliveries/bad.xlsx", self.mtn_df.drop(columns="Sim Number")))
+                self.assertIsNone(record_import("Unknown", "/deliveries/mtn.xlsx", self.mtn_df))
+    
+    def test_batch_conversions_recorded(self):
+        """Test that batch conversions, streamed or not, are recorded in the inventory."""
+        workbook = os.path.join(self.temp_dir, "mtn.xlsx")
+        self.mtn_df.to_excel(workbook, index=False)
+        with mock.patch.object(inventory, "inventory", self.inventory):
+            self.assertIsNone(convert_file(workbook, self.temp_dir, "MTN")["error"])
+            self.assertIsNone(convert_file(workbook, self.temp_dir, "MTN", stream=True, chunk_size=1)["error"])
+        imports = self.inventory.imports()
+        self.assertEqual([(record["provider"], record["rows"]) for record in imports], [("MTN", 3), ("MTN", 3)])
+        self.assertEqual(self.inventory.count("MTN"), 2)
+        
+        recorder = ImportRecorder(self.inventory, "MTN", workbook)
+        recorder.add(self.mtn_df.iloc[:1])
+        recorder.add(normalise_sim_frame(self.mtn_df.iloc[1:], "MTN"))
+        self.assertEqual(recorder.close(), {"rows": 2, "inserted": 0, "updated": 2, "skipped": 1})
+    
+    def test_disabled(self):
+        """Test that a disabled inventory records nothing."""
+        self.assertFalse(Inventory().enabled)
+        self.assertIsNone(record_import("MTN", "/deliveries/mtn.xlsx", self.mtn_df))
+        with self.assertRaises(ValueError):
+            Inventory().count()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the bulk IPv4 engine.
+"""
+
+import unittest
+import numpy as np
+from ip_engine import parse_ipv4, parse_subnet, compile_subnets, subnet_index, shared_addresses, IpRules
+
+class TestSubnets(unittest.TestCase):
+    """Test cases for subnet parsing and membership."""
+    
+    def test_parse_subnet(self):
+        """Test that host bits are cleared and bad subnets are refused."""
+        self.assertEqual(parse_subnet("10.16.1.2/12"), (0x0A100000, 0xFFF00000))
+        self.assertEqual(parse_subnet("192.168.0.7"), (0xC0A80007, 0xFFFFFFFF))
+        self.assertEqual(parse_subnet("0.0.0.0/0"), (0, 0))
+        for cidr in ("10.0.0.0/33", "10.0.0/8", "10.0.0.0/x"):
+            with self.assertRaises(ValueError):
+                parse_subnet(cidr)
+    
+    def test_subnet_index(self):
+        """Test that each address gets the first subnet containing it."""
+        networks, masks = compile_subnets(["10.0.0.0/16", "10.0.0.0/8", "192.168.1.0/24"])
+        addresses, _ = parse_ipv4(np.array(["10.0.5.5", "10.9.0.1", "192.168.1.200", "192.168.2.1"]))
+        self.assertEqual(list(subnet_index(addresses, networks, masks)), [0, 1, 2, -1])
+
+class TestSharedAddresses(unittest.TestCase):
+    """Test cases for cross-SIM duplicate detection."""
+    
+    def test_shared_across_columns(self):
+        """Test that an address used by two SIMs is flagged in any column, but not a repeat within a row."""
+        addresses, valid = parse_ipv4(np.array(["10.0.0.1", "10.1.0.1",
+                                                "10.0.0.2", "10.0.0.1",
+                                                "10.0.0.3", "10.0.0.3",
+                                                "bad", "bad"]))
+        shared = shared_addresses(addresses.reshape(4, 2), valid.reshape(4, 2))
+        self.assertEqual(list(shared), [True, True, False, False])
+    
+    def test_matches_reference(self):
+        """Test random addresses against a dictionary based reference."""
+        rng = np.random.default_rng(3)
+        addresses = rng.integers(0, 50, (300, 2)).astype(np.uint32)
+        valid = rng.random((300, 2)) > 0.1
+        users = {}
+        for row in range(300):
+            for column in range(2):
+                if valid[row, column]:
+                    users.setdefault(addresses[row, column], set()).add(row)
+        expected = [any(len(users[a]) > 1 for a, v in zip(addresses[row], valid[row]) if v) for row in range(300)]
+        self.assertEqual(list(shared_addresses(addresses, valid)), expected)
+
+class TestIpRules(unittest.TestCase):
+    """Test cases for the per-provider subnet and pair rules."""
+    
+    def test_check(self):
+        """Test outside addresses and pairs on different APN subnets."""
+        rules = IpRules({"IP Address1": ["10.10.0.0/16", "10.20.0.0/16"],
+                         "IP Address2": ["10.110.0.0/16", "10.120.0.0/16"]},
+                        [("IP Address1", "IP Address2")])
+        parsed = {
+            "IP Address1": parse_ipv4(np.array(["10.10.0.1", "10.10.0.2", "10.30.0.1", "10.20.0.1", "bad"])),
+            "IP Address2": parse_ipv4(np.array(["10.110.0.1", "10.120.0.2", "10.110.0.3", "10.120.0.1", "bad"]))
+        }
+        outside, mismatch = rules.check(parsed)
+        self.assertEqual(list(outside), [False, False, True, False, False])
+        self.assertEqual(list(mismatch), [False, True, False, False, False])
+    
+    def test_identical_pair(self):
+        """Test that a pair using one address twice mismatches without any subnets configured."""
+        rules = IpRules(pairs=[("IP Address1", "IP Address2")])
+        parsed = {
+            "IP Address1": parse_ipv4(np.array(["10.0.0.1", "10.0.0.2"])),
+            "IP Address2": parse_ipv4(np.array(["10.0.0.1", "10.0.1.2"]))
+        }
+        outside, mismatch = rules.check(parsed)
+        self.assertFalse(outside.any())
+        self.assertEqual(list(mismatch), [True, False])
+
+if __name__ == "__main__":
+    unittest.main()
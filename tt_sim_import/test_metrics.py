@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the timing spans and metrics.
+"""
+
+import os
+import json
+import shutil
+import unittest
+import tempfile
+import pandas as pd
+import metrics
+from import_utils import read_sim_file
+from export_utils import write_export_chunks
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for the metrics module."""
+    
+    def setUp(self):
+        """Create a temporary directory and remember the metrics settings."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.environ = {name: os.environ.get(name) for name in (metrics.METRICS_ENV, metrics.METRICS_LEVEL_ENV)}
+        self.settings = vars(metrics._settings).copy()
+    
+    def tearDown(self):
+        """Restore the metrics settings and clean up the temporary directory."""
+        vars(metrics._settings).update(self.settings)
+        for name, value in self.environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(self.temp_dir)
+    
+    def test_disabled(self):
+        """Test that disabled metrics hand out a shared no-op span and record nothing."""
+        metrics.configure(False)
+        self.assertIs(metrics.span("read"), metrics.span("write"))
+        with metrics.run("import") as collector:
+            with metrics.span("read") as timed:
+                timed.add(rows=10)
+            metrics.count("bytes_read", 100)
+        self.assertIsNone(collector)
+    
+    def test_spans_and_merge(self):
+        """Test that spans are aggregated per name and worker reports are merged."""
+        metrics.configure(True)
+        with metrics.collect() as collector:
+            for rows in (3, 4):
+                with metrics.span("write", rows=rows):
+                    pass
+            with self.assertRaises(ValueError):
+                with metrics.span("read"):
+                    raise ValueError()
+            with metrics.collect() as worker:
+                metrics.count("bytes_written", 5)
+            metrics.merge(worker.report())
+        report = collector.report()
+        self.assertEqual((report["spans"]["write"]["count"], report["spans"]["write"]["rows"]), (2, 7))
+        self.assertEqual(report["spans"]["read"]["errors"], 1)
+        # Counted once by the nested collection and once by the merge
+        self.assertEqual(report["counters"]["bytes_written"], 10)
+    
+    def test_run_file_and_stages(self):
+        """Test that a run over the import/export path writes every stage to the metrics file."""
+        metrics_file = os.path.join(self.temp_dir, "metrics.json")
+        metrics.configure(True, metrics_file)
+        
+        file_path = os.path.join(self.temp_dir, "vodacom.xlsx")
+        pd.DataFrame({
+            "MSISDN": ["821234567", "831234567"],
+            "ICCID": ["8927000000000000001", "8927000000000000002"],
+            "IP Address": ["10.0.0.1", "10.0.0.2"]
+        }).to_excel(file_path, index=False)
+        with metrics.run("convert", file="vodacom.xlsx"):
+            _, sim_df = read_sim_file(file_path, "Vodacom")
+            write_export_chunks([sim_df], os.path.join(self.temp_dir, "out.csv"))
+        
+        with open(metrics_file, "r", encoding="utf-8") as f:
+            record = json.load(f)["runs"][-1]
+        self.assertEqual((record["run"], record["file"]), ("convert", "vodacom.xlsx"))
+        self.assertEqual(set(record["spans"]),
+                         {"read", "resolve_headers", "rename", "validate_provider", "normalise", "write"})
+        self.assertEqual(record["spans"]["read"]["rows"], 2)
+        self.assertGreater(record["counters"]["bytes_written"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
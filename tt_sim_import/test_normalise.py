@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the vectorized cell number normalisation.
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from normalise import normalise_msisdn, identifier_text
+
+class TestNormaliseMsisdn(unittest.TestCase):
+    """Test cases for normalise_msisdn."""
+    
+    def test_text_forms(self):
+        """Test the formats found in supplier files."""
+        values = ["821234567", "0821234567", "+27 82 123 4567", "0027821234567",
+                  "27821234567", "082-123-4567", "821234567.0"]
+        normalised, valid = normalise_msisdn(pd.Series(values))
+        self.assertEqual(list(normalised), ["27821234567"] * len(values))
+        self.assertTrue(valid.all())
+    
+    def test_numeric_cells(self):
+        """Test integer and float cells, including missing values."""
+        normalised, valid = normalise_msisdn(pd.Series([821234567.0, np.nan, 27821234567.0]))
+        self.assertEqual(list(normalised), ["27821234567", "", "27821234567"])
+        self.assertEqual(list(valid), [True, False, True])
+        
+        normalised, valid = normalise_msisdn(np.array([821234567, 12345]))
+        self.assertEqual(list(normalised), ["27821234567", "12345"])
+        self.assertEqual(list(valid), [True, False])
+    
+    def test_invalid_lengths(self):
+        """Test that invalid numbers are flagged and keep their digits."""
+        normalised, valid = normalise_msisdn(pd.Series(["12345", "08212345678", None, "n/a"]))
+        self.assertEqual(list(normalised), ["12345", "08212345678", "", ""])
+        self.assertFalse(valid.any())
+    
+    def test_index_preserved(self):
+        """Test that the index of the input Series is kept."""
+        normalised, _ = normalise_msisdn(pd.Series(["0821234567"], index=[7]))
+        self.assertEqual(list(normalised.index), [7])
+
+class TestIdentifierText(unittest.TestCase):
+    """Test cases for identifier_text."""
+    
+    def test_column_kinds(self):
+        """Test text, float, integer and mixed identifier columns."""
+        iccids = ["8927000000000000001", " 8927000000000000002 ", "10.0.0.1"]
+        self.assertEqual(list(identifier_text(pd.Series(iccids))), ["8927000000000000001", "8927000000000000002", "10.0.0.1"])
+        self.assertEqual(list(identifier_text(pd.Series(["10.0.0.0", None], dtype="str"))), ["10.0.0.0", ""])
+        self.assertEqual(list(identifier_text(np.array([8927001.0, np.nan, 1.5, 1e20]))),
+                         ["8927001", "", "1.5", "100000000000000000000"])
+        self.assertEqual(list(identifier_text(np.array([8927001, 8927002], dtype=np.int64))), ["8927001", "8927002"])
+        self.assertEqual(list(identifier_text(np.array([8927001.0, np.nan], dtype=object))), ["8927001", ""])
+        
+        mixed = np.array([8927001.0, " 8927002 ", None, np.nan, pd.NA, 8927003, "10.0.0.1", 2.5], dtype=object)
+        text = identifier_text(pd.Series(mixed, index=range(10, 18)))
+        self.assertEqual(list(text), ["8927001", "8927002", "", "", "", "8927003", "10.0.0.1", "2.5"])
+        self.assertEqual(list(text.index), list(range(10, 18)))
+        self.assertEqual(text.dtype, object)
+
+if __name__ == '__main__':
+    unittest.main()
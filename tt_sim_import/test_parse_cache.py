@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the content-addressed parse cache.
+"""
+
+import os
+import shutil
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from import_utils import read_sim_file
+from compact import compact_columns, expand_column
+from parse_cache import ParseCache, normalise_sim_frame
+
+class TestParseCache(unittest.TestCase):
+    """Test cases for ParseCache."""
+    
+    def setUp(self):
+        """Create a Vodacom workbook and an empty cache directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        self.file_path = os.path.join(self.temp_dir, "vodacom.xlsx")
+        self.parse_count = 0
+        pd.DataFrame({
+            "MSISDN": [821234567, 831234567, None],
+            "ICCID": ["89270000000000000003", "89270000000000000003", 89270000001.0],
+            "IP Address": ["10.0.0.1", " 10.0.0.2", "bad"]
+        }).to_excel(self.file_path, index=False)
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+        
+    def parse(self):
+        self.parse_count += 1
+        return read_sim_file(self.file_path, "Vodacom")
+    
+    def test_hit_returns_identical_data(self):
+        """Test that a hit skips parsing and returns the same columns and flags as the miss."""
+        cache = ParseCache(self.cache_dir)
+        provider, columns, flags, summary, mapping, cached = cache.load(self.file_path, "Vodacom", self.parse)
+        self.assertFalse(cached)
+        self.assertEqual(list(expand_column(columns["Cell Number"])), ["27821234567", "27831234567", ""])
+        self.assertEqual(list(expand_column(columns["Sim Number"])), ["89270000000000000003"] * 2 + ["89270000001"])
+        self.assertEqual(list(expand_column(columns["IP Address"])), ["10.0.0.1", "10.0.0.2", "bad"])
+        
+        warm_cache = ParseCache(self.cache_dir)
+        hit = warm_cache.load(self.file_path, "Vodacom", self.parse)
+        self.assertTrue(hit[5])
+        self.assertEqual(self.parse_count, 1)
+        self.assertEqual(hit[0], provider)
+        self.assertEqual(list(hit[1]), list(columns))
+        for name, values in columns.items():
+            self.assertEqual(hit[1][name].dtype, values.dtype)
+            np.testing.assert_array_equal(hit[1][name], values)
+        self.assertEqual(list(hit[2]), list(flags))
+        self.assertEqual(hit[3], summary)
+        self.assertEqual(hit[4], mapping)
+        self.assertEqual(mapping, {"MSISDN": "Cell Number", "ICCID": "Sim Number", "IP Address": "IP Address"})
+        self.assertEqual(warm_cache.stats()["hits"], 1)
+        
+    def test_key_depends_on_content_and_mode(self):
+        """Test that changed content or import mode miss the cache."""
+        cache = ParseCache(self.cache_dir)
+        key = cache.key(self.file_path, "Vodacom")
+        self.assertNotEqual(key, cache.key(self.file_path, "Vodacom", all_sheets=True))
+        self.assertNotEqual(key, cache.key(self.file_path, None))
+        
+        pd.DataFrame({"MSISDN": [1], "ICCID": [2], "IP": ["10.0.0.1"]}).to_excel(self.file_path, index=False)
+        self.assertNotEqual(key, cache.key(self.file_path, "Vodacom"))
+        
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted beyond the size bound."""
+        cache = ParseCache(self.cache_dir, max_bytes=0)
+        columns = compact_columns(normalise_sim_frame(read_sim_file(self.file_path, "Vodacom")[1], "Vodacom"))
+        cache.put("first", "Vodacom", columns, [0, 0, 0])
+        cache.put("second", "Vodacom", columns, [0, 0, 0])
+        self.assertIsNone(cache.get("first"))
+        self.assertIsNotNone(cache.get("second"))
+        self.assertEqual(cache.stats()["entries"], 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        
+    def test_disabled(self):
+        """Test that a cache without directory always parses."""
+        cache = ParseCache()
+        cache.load(self.file_path, "Vodacom", self.parse)
+        cache.load(self.file_path, "Vodacom", self.parse)
+        self.assertEqual(self.parse_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
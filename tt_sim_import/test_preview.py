@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the data preview grid model (the Tk window itself needs a display).
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from session import SessionStore
+from preview import PreviewModel, ROW_COLUMN, FLAGS_COLUMN
+from validation import MSISDN_INVALID, ICCID_DUPLICATE
+
+class TestPreviewModel(unittest.TestCase):
+    """Test cases for PreviewModel."""
+    
+    def setUp(self):
+        """Create a dataset with two flagged rows and its recorded column mapping."""
+        store = SessionStore()
+        sim_df = pd.DataFrame({
+            "Cell Number": ["27821234567", "bad", "27841234567", "27851234567"],
+            "Sim Number": ["8927001", "8927002", "8927003", "8927003"],
+            "IP Address": ["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4"]
+        })
+        flags = np.array([0, MSISDN_INVALID, 0, ICCID_DUPLICATE], dtype=np.uint16)
+        mapping = {"MSISDN": "Cell Number", "ICCID": "Sim Number", "IP Address": "IP Address"}
+        self.dataset = store.add("Vodacom", "/deliveries/voda.xlsx", sim_df, flags, column_mapping=mapping)
+        self.model = PreviewModel(self.dataset)
+    
+    def test_rows_window(self):
+        """Test that a window of rows is expanded to text, with row numbers and flagged rows marked."""
+        self.assertEqual(self.model.columns, [ROW_COLUMN, "Cell Number", "Sim Number", "IP Address", FLAGS_COLUMN])
+        rows = self.model.rows(1, 2)
+        self.assertEqual(rows[0], ((2, "bad", "8927002", "10.0.0.2", "msisdn_invalid"), True))
+        self.assertEqual(rows[1], ((3, "27841234567", "8927003", "10.0.0.3", ""), False))
+        self.assertEqual(len(self.model.rows(3, 10)), 1)
+        self.assertEqual(self.model.rows(4, 10), [])
+        
+        # The model reads the session's arrays, it does not copy them
+        for column, values in self.dataset.columns.items():
+            self.assertIs(self.model.dataset.columns[column], values)
+    
+    def test_scrolling(self):
+        """Test the scrollbar commands and the clamping of the window."""
+        self.assertEqual(self.model.move(0, 2, "scroll", 1, "units"), 1)
+        self.assertEqual(self.model.move(0, 2, "scroll", 5, "pages"), 2)
+        self.assertEqual(self.model.move(2, 2, "scroll", -1, "pages"), 1)
+        self.assertEqual(self.model.move(0, 2, "moveto", "0.5"), 2)
+        self.assertEqual(self.model.move(3, 2, "moveto", "-0.1"), 0)
+        self.assertEqual(self.model.clamp(10, 10), 0)
+        self.assertEqual(self.model.fractions(1, 2), (0.25, 0.75))
+    
+    def test_flagged_and_mapping(self):
+        """Test jumping between flagged rows and the display of the column mapping."""
+        self.assertEqual(list(self.model.flagged), [1, 3])
+        self.assertEqual(self.model.next_flagged(0), 1)
+        self.assertEqual(self.model.next_flagged(1), 3)
+        self.assertEqual(self.model.next_flagged(3), 1)
+        self.assertEqual(self.model.heading("Cell Number"), "Cell Number (MSISDN)")
+        self.assertEqual(self.model.heading("IP Address"), "IP Address")
+        self.assertIn("ICCID -> Sim Number", self.model.mapping_text())
+    
+    def test_large_dataset(self):
+        """Test that windows deep into a million rows only expand the rows asked for."""
+        store = SessionStore()
+        row_count = 1_000_000
+        columns = {
+            "Cell Number": np.char.add(b"2782", np.arange(row_count).astype("S7")),
+            "Sim Number": np.char.add(b"8927", np.arange(row_count).astype("S16")),
+            "IP Address": np.arange(row_count, dtype=np.uint32) + 167772160
+        }
+        flags = np.zeros(row_count, dtype=np.uint16)
+        flags[-5] = MSISDN_INVALID
+        model = PreviewModel(store.add("Vodacom", "/deliveries/big.xlsx", columns, flags))
+        rows = model.rows(model.clamp(row_count, 30), 30)
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[-1][0][:2], (row_count, "2782999999"))
+        self.assertEqual(model.next_flagged(0), row_count - 5)
+        self.assertEqual(model.mapping_text(), "Column mapping: not recorded")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the declarative provider registry.
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from provider_registry import ProviderRegistry, registry
+from header_resolver import HeaderResolver, ColumnResolutionError
+from constants import PROVIDER_SPECS
+
+# A third carrier declared purely as data
+CELL_C_SPEC = {
+    "required_columns": ["Cell Number", "Sim Number"],
+    "ip_columns": {"IP Address": ["apn ip", "static ip"]},
+    "ip_match": "exact",
+    "export_columns": {"IP Address": "Ip Address1"},
+    "filename_hints": ["cellc"]
+}
+
+class TestProviderRegistry(unittest.TestCase):
+    """Test cases for ProviderRegistry and CompiledProvider."""
+    
+    def setUp(self):
+        """Create a registry with the shipped providers plus a declared one."""
+        self.registry = ProviderRegistry(PROVIDER_SPECS)
+        self.registry.register("Cell C", CELL_C_SPEC)
+        self.resolver = HeaderResolver(registry=self.registry)
+    
+    def test_shared_registry(self):
+        """Test that the shared registry holds the shipped providers."""
+        self.assertEqual(registry.names(), ["Vodacom", "MTN"])
+        self.assertEqual(registry.get("MTN").ip_columns, ["IP Address1", "IP Address2"])
+        with self.assertRaises(ValueError):
+            registry.get("Telkom")
+    
+    def test_declared_provider(self):
+        """Test resolving, inferring and transforming a provider added as data."""
+        renamed, ip_columns = self.resolver.resolve(["MSISDN", "ICCID", "Static IP"], "Cell C")
+        self.assertEqual(renamed["Static IP"], "IP Address")
+        self.assertEqual(self.registry.infer(["MSISDN"], "cellc_april.xlsx"), "Cell C")
+        
+        with self.assertRaises(ColumnResolutionError) as ctx:
+            self.resolver.resolve(["MSISDN", "ICCID", "IP"], "Cell C")
+        self.assertIn("IP Address", str(ctx.exception))
+        
+        sim_df = pd.DataFrame({"Cell Number": [841234567], "Sim Number": ["8927"], "IP Address": ["10.0.0.1"]})
+        export_sims = self.registry.get("Cell C").transform(sim_df)
+        self.assertEqual(list(export_sims.columns), ["Count", "Cell Number", "Sim Number", "Ip Address1"])
+        self.assertEqual(export_sims["Cell Number"].iloc[0], "27841234567")
+    
+    def test_validate(self):
+        """Test the vectorized column checks."""
+        sim_df = pd.DataFrame({
+            "Cell Number": ["821234567", None, ""],
+            "Sim Number": ["1", "2", "3"],
+            "IP Address1": ["10.0.0.1", np.nan, "10.0.0.3"]
+        })
+        report = self.registry.get("MTN").validate(sim_df)
+        self.assertEqual(report["missing_columns"], ["IP Address2"])
+        self.assertEqual(report["blank_values"], {"Cell Number": 2, "Sim Number": 0, "IP Address1": 1})
+    
+    def test_for_columns(self):
+        """Test detecting the provider of standardised data."""
+        self.assertEqual(registry.for_columns(["Cell Number", "Sim Number", "IP Address"]).name, "Vodacom")
+        self.assertEqual(registry.for_columns(["Cell Number", "Sim Number", "IP Address1", "IP Address2"]).name,
+                         "MTN")
+
+if __name__ == '__main__':
+    unittest.main()
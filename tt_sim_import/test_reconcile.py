@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the delta reconciliation against previous exports.
+"""
+
+import os
+import shutil
+import unittest
+import tempfile
+import pandas as pd
+from export_utils import write_export_csv, write_export_chunks
+from reconcile import reconcile, read_export_chunks
+from sim_import import run_cli
+
+class TestReconcile(unittest.TestCase):
+    """Test cases for reconcile."""
+    
+    def setUp(self):
+        """Write last month's export and this month's delivery."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.previous = pd.DataFrame({
+            "Cell Number": ["0821234567", "0821234568", "0821234569", "0821234570"],
+            "Sim Number": ["8927000000000000001", "8927000000000000002", "8927000000000000003",
+                           "8927000000000000004"],
+            "IP Address": ["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4"]
+        })
+        self.previous_path = os.path.join(self.temp_dir, "previous.csv")
+        write_export_csv(self.previous, self.previous_path)
+        
+        # SIM 1 unchanged (IP written with a leading zero), 2 has a new number, 3 a new IP,
+        # 4 is gone and 5 is new
+        self.delivery = pd.DataFrame({
+            "Cell Number": ["821234567", "0829999999", "0821234569", "0821234571"],
+            "Sim Number": ["8927000000000000001", "8927000000000000002", "8927000000000000003",
+                           "8927000000000000005"],
+            "IP Address": ["010.0.0.1", "10.0.0.2", "10.0.9.3", "10.0.0.5"]
+        })
+        
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_delta(self):
+        """Test that only added, changed and removed SIMs are written."""
+        delta = reconcile([self.delivery.iloc[:2], self.delivery.iloc[2:]], [self.previous_path], "Vodacom")
+        summary = delta.summary()
+        self.assertEqual((summary["added"], summary["changed"], summary["removed"], summary["unchanged"]),
+                         (1, 2, 1, 1))
+        
+        delta_path = os.path.join(self.temp_dir, "delta.csv")
+        self.assertEqual(delta.write(delta_path), 4)
+        written = pd.read_csv(delta_path, dtype=str)
+        self.assertEqual(list(written.columns), ["Count", "Cell Number", "Sim Number", "Ip Address1", "Change"])
+        self.assertEqual(list(written["Sim Number"].str[-1]), ["5", "2", "3", "4"])
+        self.assertEqual(list(written["Change"]), ["added", "changed", "changed", "removed"])
+        self.assertEqual(list(written["Cell Number"])[:2], ["27821234571", "27829999999"])
+    
+    def test_later_exports_win(self):
+        """Test that a later export overrides an earlier one and compressed JSON Lines are read."""
+        later_path = os.path.join(self.temp_dir, "later.ndjson.gz")
+        write_export_chunks([self.delivery.iloc[1:3]], later_path)
+        self.assertEqual(len(next(read_export_chunks(later_path))["Sim Number"]), 2)
+        
+        summary = reconcile([self.delivery], [self.previous_path, later_path], "Vodacom").summary()
+        self.assertEqual((summary["added"], summary["changed"], summary["removed"], summary["unchanged"]),
+                         (1, 0, 1, 3))
+        self.assertEqual(summary["duplicate_iccids"], 2)
+    
+    def test_mixed_iccid_widths(self):
+        """Test that SIMs match when the previous export also holds 20-digit ICCIDs."""
+        previous = pd.concat([self.previous.iloc[:2], pd.DataFrame({
+            "Cell Number": ["0821234580"], "Sim Number": ["89270000000000000013"], "IP Address": ["10.0.0.9"]
+        })], ignore_index=True)
+        previous_path = os.path.join(self.temp_dir, "mixed.csv")
+        write_export_csv(previous, previous_path)
+        
+        summary = reconcile([self.previous.iloc[:2]], [previous_path], "Vodacom").summary()
+        self.assertEqual((summary["added"], summary["changed"], summary["removed"], summary["unchanged"]),
+                         (0, 0, 1, 2))
+    
+    def test_cli(self):
+        """Test the --reconcile option of the batch converter."""
+        workbook = os.path.join(self.temp_dir, "vodacom_delivery.xlsx")
+        self.delivery.to_excel(workbook, index=False)
+        self.assertEqual(run_cli(["-i", workbook, "--reconcile", self.previous_path]), 0)
+        written = pd.read_csv(os.path.join(self.temp_dir, "vodacom_delivery_delta.csv"), dtype=str)
+        self.assertEqual(list(written["Change"]), ["added", "changed", "changed", "removed"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the local HTTP conversion service.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import socket
+import asyncio
+import unittest
+from unittest import mock
+import tempfile
+import urllib.error
+import urllib.request
+import pandas as pd
+from import_utils import read_sim_file
+from export_utils import write_export_csv
+import service
+from service import ConversionService, HttpError
+
+def exit_worker(*args):
+    """Stand-in for convert_file that kills its worker process, as running out of memory does."""
+    os._exit(1)
+
+class TestConversionService(unittest.TestCase):
+    """Test cases for ConversionService."""
+    
+    def setUp(self):
+        """Create an MTN workbook and the CSV the GUI exports for it."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "MTN_delivery.xlsx")
+        pd.DataFrame({
+            "Cell No": ["0831234567", "831234568"],
+            "Sim No": ["89270000000000000003", "89270000000000000011"],
+            "CN-IP": ["10.0.0.1", "10.0.0.2"],
+            "NL-IP": ["10.1.0.1", None]
+        }).to_excel(self.file_path, index=False)
+        with open(self.file_path, "rb") as f:
+            self.workbook = f.read()
+        
+        expected_path = os.path.join(self.temp_dir, "expected.csv")
+        write_export_csv(read_sim_file(self.file_path)[1], expected_path)
+        with open(expected_path, "rb") as f:
+            self.expected = f.read()
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def serve(self, requests, max_queue=4):
+        """Start a service on a free port and run blocking requests against it."""
+        async def run():
+            service = ConversionService(max_concurrency=1, max_queue=max_queue)
+            server = await service.start("127.0.0.1", 0)
+            url = "http://127.0.0.1:%d" % server.sockets[0].getsockname()[1]
+            try:
+                return await asyncio.to_thread(requests, url, service)
+            finally:
+                server.close()
+                await server.wait_closed()
+                service.close()
+        return asyncio.run(run())
+    
+    @staticmethod
+    def fetch(request):
+        """Return (status, body) of a request, also for error statuses."""
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+    
+    @staticmethod
+    def send_raw(url, head):
+        """Send a hand-written request head and return the response status."""
+        host, port = url.rsplit("/", 1)[-1].split(":")
+        with socket.create_connection((host, int(port)), timeout=60) as connection:
+            connection.sendall(head)
+            return int(connection.makefile("rb").readline().split()[1])
+    
+    def test_convert(self):
+        """Test that raw and multipart uploads return the same CSV as the GUI export."""
+        boundary = uuid.uuid4().hex
+        form = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"provider\"\r\n\r\nmtn\r\n"
+                f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"delivery.xlsx\"\r\n"
+                f"Content-Type: application/octet-stream\r\n\r\n").encode() + self.workbook + \
+               f"\r\n--{boundary}--\r\n".encode()
+        
+        def requests(url, service):
+            raw = self.fetch(urllib.request.Request(f"{url}/convert?filename=MTN_delivery.xlsx", data=self.workbook))
+            multipart = self.fetch(urllib.request.Request(
+                f"{url}/convert", data=form, headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}))
+            metrics = self.fetch(f"{url}/metrics")
+            return raw, multipart, metrics
+        
+        raw, multipart, metrics = self.serve(requests)
+        self.assertEqual(raw, (200, self.expected))
+        self.assertEqual(multipart, (200, self.expected))
+        metrics = json.loads(metrics[1])
+        self.assertEqual((metrics["completed"], metrics["rows"], metrics["queued"]), (2, 4, 0))
+    
+    def test_errors(self):
+        """Test that bad uploads are answered with an error status and a message."""
+        def requests(url, service):
+            return [
+                self.fetch(urllib.request.Request(f"{url}/convert?provider=Telkom", data=self.workbook)),
+                self.fetch(urllib.request.Request(f"{url}/convert?filename=notes.txt", data=b"text")),
+                self.fetch(urllib.request.Request(f"{url}/convert?provider=MTN", data=b"not a workbook")),
+                self.fetch(f"{url}/convert"),
+                self.fetch(f"{url}/missing")
+            ] + [
+                (self.send_raw(url, f"POST /convert HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode()), None)
+                for length in ("abc", "-5")
+            ]
+        
+        statuses = [status for status, _ in self.serve(requests)]
+        self.assertEqual(statuses, [400, 415, 422, 405, 404, 400, 400])
+    
+    def test_multipart_streamed_to_disk(self):
+        """Test that multipart uploads are parsed in small pieces, with delimiters split between them."""
+        boundary = b"sim-boundary"
+        body = (b"preamble\r\n--sim-boundary\r\nContent-Disposition: form-data; name=\"provider\"\r\n\r\n MTN \r\n"
+                b"--sim-boundary\r\nContent-Disposition: form-data; name=\"file\"; filename=\"../d.xlsx\"\r\n\r\n"
+                + self.workbook + b"\r\n--sim-boundary--\r\nepilogue")
+        
+        async def parse(data):
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return await service._read_multipart(reader, len(data), boundary, self.temp_dir)
+        
+        for chunk_size in (5, 13, 64 * 1024):
+            with mock.patch.object(service, "IO_CHUNK_SIZE", chunk_size):
+                path, fields = asyncio.run(parse(body))
+            self.assertEqual(path, os.path.join(self.temp_dir, "d.xlsx"))
+            self.assertEqual(fields, {"provider": "MTN"})
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), self.workbook)
+        
+        with self.assertRaises(HttpError):
+            asyncio.run(parse(body[:-40]))
+    
+    def test_uploads_count_against_queue(self):
+        """Test that a request still uploading occupies a queue place."""
+        def requests(url, service):
+            host, port = url.rsplit("/", 1)[-1].split(":")
+            with socket.create_connection((host, int(port)), timeout=60) as uploading:
+                uploading.sendall(b"POST /convert HTTP/1.1\r\nContent-Length: 100000\r\n\r\npartial")
+                while service.metrics["queued"] == 0:
+                    time.sleep(0.01)
+                return self.fetch(urllib.request.Request(f"{url}/convert", data=self.workbook))[0]
+        
+        self.assertEqual(self.serve(requests, max_queue=1), 503)
+    
+    def test_worker_died(self):
+        """Test that a dead worker is answered with 500 and the process pool is replaced."""
+        def requests(url, service):
+            with mock.patch("service.convert_file", exit_worker):
+                died = self.fetch(urllib.request.Request(f"{url}/convert?filename=MTN.xlsx", data=self.workbook))
+            converted = self.fetch(urllib.request.Request(f"{url}/convert?filename=MTN.xlsx", data=self.workbook))
+            return died, converted, json.loads(self.fetch(f"{url}/metrics")[1])
+        
+        died, converted, metrics = self.serve(requests)
+        self.assertEqual(died[0], 500)
+        self.assertIn("error", json.loads(died[1]))
+        self.assertEqual(converted, (200, self.expected))
+        self.assertEqual((metrics["failed"], metrics["completed"], metrics["active"]), (1, 1, 0))
+    
+    def test_queue_limit(self):
+        """Test that requests beyond the queue limit are refused."""
+        def requests(url, service):
+            service.metrics["queued"] = service.max_queue
+            return self.fetch(urllib.request.Request(f"{url}/convert", data=self.workbook))
+        
+        status, body = self.serve(requests)
+        self.assertEqual(status, 503)
+        self.assertIn("error", json.loads(body))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the multi-dataset session store.
+"""
+
+import os
+import shutil
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from session import SessionStore
+from export_utils import export_header, write_export_csv_chunks
+
+class TestSessionStore(unittest.TestCase):
+    """Test cases for SessionStore."""
+    
+    def setUp(self):
+        """Create a session with a Vodacom and an MTN dataset."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SessionStore()
+        self.vodacom_df = pd.DataFrame({
+            "Cell Number": ["27821234567", "27831234567", "27841234567"],
+            "Sim Number": ["8927001", "8927002", "8927003"],
+            "IP Address": ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+        })
+        self.mtn_df = pd.DataFrame({
+            "Cell Number": ["27731234567"],
+            "Sim Number": ["8927101"],
+            "IP Address1": ["10.1.0.1"],
+            "IP Address2": ["10.2.0.1"]
+        })
+        self.store.add("Vodacom", "/deliveries/voda.xlsx", self.vodacom_df, np.array([0, 8, 0], dtype=np.uint8))
+        self.store.add("MTN", "/deliveries/mtn.xlsx", self.mtn_df)
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_datasets(self):
+        """Test that imports of several providers and files are kept side by side."""
+        self.assertEqual(self.store.names(), ["Vodacom: voda.xlsx", "MTN: mtn.xlsx"])
+        self.assertEqual(self.store.total_rows, 4)
+        self.assertEqual(self.store.latest().provider, "MTN")
+        
+        # Re-importing a file replaces its dataset
+        self.store.add("Vodacom", "/deliveries/voda.xlsx", self.vodacom_df.iloc[:1])
+        self.assertEqual(len(self.store.datasets("Vodacom")), 1)
+        self.assertEqual(self.store.total_rows, 2)
+    
+    def test_compact_read_only_columns(self):
+        """Test that the stored columns are compact and read-only, and frames return their text."""
+        dataset = self.store.get("Vodacom: voda.xlsx")
+        self.assertEqual(dataset.columns["Sim Number"].dtype, np.dtype("S7"))
+        self.assertEqual(dataset.columns["IP Address"].dtype, np.uint32)
+        frame = dataset.frame(1, 3)
+        self.assertEqual(list(frame["Sim Number"]), ["8927002", "8927003"])
+        self.assertEqual(list(frame["IP Address"]), ["10.0.0.2", "10.0.0.3"])
+        with self.assertRaises(ValueError):
+            dataset.columns["Sim Number"][0] = b"changed"
+        self.assertFalse(dataset.flags.flags.writeable)
+    
+    def test_memory_accounting(self):
+        """Test the per-dataset memory accounting shown in the status bar."""
+        usage = self.store.memory_usage()
+        self.assertEqual(list(usage), self.store.names())
+        self.assertTrue(all(size > 0 for size in usage.values()))
+        self.assertIn("Vodacom: voda.xlsx (3 SIMs", self.store.describe())
+        self.store.clear()
+        self.assertEqual(self.store.describe(), "No data imported")
+    
+    def test_combined_export(self):
+        """Test a combined Vodacom+MTN export written chunk by chunk."""
+        header = export_header(dataset.provider for dataset in self.store)
+        self.assertEqual(header, ["Count", "Cell Number", "Sim Number", "Ip Address1", "Ip Address2"])
+        
+        output_path = os.path.join(self.temp_dir, "combined.csv")
+        sim_count = write_export_csv_chunks(self.store.iter_chunks(2), output_path, header=header)
+        self.assertEqual(sim_count, 4)
+        exported = pd.read_csv(output_path, dtype=str, keep_default_na=False)
+        self.assertEqual(list(exported.columns), header)
+        self.assertEqual(list(exported["Count"]), ["1", "2", "3", "4"])
+        self.assertEqual(list(exported["Ip Address2"]), ["", "", "", "10.2.0.1"])
+
+if __name__ == "__main__":
+    unittest.main()
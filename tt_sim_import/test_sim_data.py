@@ -9,8 +9,17 @@ import os
 import unittest
 import tempfile
 import json
+import shutil
+import numpy as np
+import serialisers
+import sim_convert
 from sim_data import SimulationData
 
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 class TestSimulationData(unittest.TestCase):
     """Test cases for the SimulationData class."""
     
@@ -73,5 +82,178 @@ class TestSimulationData(unittest.TestCase):
         self.assertTrue(self.sim_data.convert_format(target_format))
         self.assertEqual(self.sim_data.metadata["format"], target_format)
 
+class TestSerialisers(unittest.TestCase):
+    """Test cases for the SimulationData serialisers."""
+    
+    def setUp(self):
+        """Create a temporary directory and data with a large results array."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.metadata = {"version": "1.0", "created": None, "format": "json"}
+        self.sim_data = SimulationData({
+            "simulation_id": "test-002",
+            "records": [{"iccid": "89270000000000000003", "value": 1.5}, {"iccid": "8927", "value": None}],
+            "results": np.arange(serialisers.SIDECAR_MIN_SIZE, dtype=np.float64)
+        }, dict(self.metadata))
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_compact_json_and_sidecar(self):
+        """Test that JSON is written compactly and large results are memory-mapped from a sidecar."""
+        path = os.path.join(self.temp_dir, "run.json")
+        self.assertTrue(self.sim_data.save_to_file(path))
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        self.assertNotIn("\n", text)
+        self.assertEqual(json.loads(text)["data"]["results"]["$npy"], "run.results.npy")
+        
+        loaded = SimulationData()
+        self.assertTrue(loaded.load_from_file(path))
+        self.assertIsInstance(loaded.data["results"], np.memmap)
+        np.testing.assert_array_equal(loaded.data["results"], self.sim_data.data["results"])
+        self.assertEqual(loaded.data["records"], self.sim_data.data["records"])
+        
+        # Saving the loaded data again keeps the memory-mapped sidecar
+        self.assertTrue(loaded.save_to_file(path))
+        self.assertTrue(loaded.load_from_file(path))
+        np.testing.assert_array_equal(loaded.data["results"], self.sim_data.data["results"])
+    
+    def test_ndjson(self):
+        """Test that NDJSON documents write one line per entry and list item and round-trip."""
+        path = os.path.join(self.temp_dir, "run.ndjson")
+        self.assertTrue(self.sim_data.save_to_file(path, results_sidecar=False))
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 1 + 1 + 1 + 2 + 1 + serialisers.SIDECAR_MIN_SIZE)
+        
+        loaded = SimulationData()
+        self.assertTrue(loaded.load_from_file(path))
+        self.assertEqual(loaded.metadata, self.metadata)
+        self.assertEqual(loaded.data["records"], self.sim_data.data["records"])
+        self.assertEqual(loaded.data["results"], self.sim_data.data["results"].tolist())
+    
+    def test_legacy_documents_and_backends(self):
+        """Test that indented and data-only documents still load, with either JSON backend."""
+        path = os.path.join(self.temp_dir, "legacy.json")
+        with open(path, "w") as f:
+            json.dump({"metadata": self.metadata, "data": {"results": [1, 2]}}, f, indent=2)
+        
+        backend = serialisers.orjson
+        try:
+            for module in {backend, None}:
+                serialisers.orjson = module
+                loaded = SimulationData()
+                self.assertTrue(loaded.load_from_file(path))
+                self.assertEqual(loaded.data, {"results": [1, 2]})
+                self.assertEqual(serialisers.loads(serialisers.dumps({"a": np.int64(1)})), {"a": 1})
+        finally:
+            serialisers.orjson = backend
+        
+        self.assertFalse(SimulationData().load_from_file(os.path.join(self.temp_dir, "run.xml")))
+
+class TestConversion(unittest.TestCase):
+    """Test cases for converting SimulationData between formats."""
+    
+    def setUp(self):
+        """Create a temporary directory and data with a table of records."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.metadata = {"version": "1.0", "created": None, "format": "json"}
+        self.data = {
+            "simulation_id": "test-003",
+            "records": [
+                {"iccid": "89270000000000000003", "value": 1.5, "count": 2, "tags": ["a"]},
+                {"iccid": "0082", "value": None, "count": 3, "tags": None}
+            ],
+            "results": [1, 2, 3]
+        }
+        self.sim_data = SimulationData(self.data, dict(self.metadata))
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def assert_round_trip(self, path):
+        """Save to a path, load it back and compare the document."""
+        self.assertTrue(self.sim_data.save_to_file(path))
+        loaded = SimulationData()
+        self.assertTrue(loaded.load_from_file(path))
+        self.assertEqual(loaded.metadata, self.metadata)
+        self.assertEqual({key: list(value) if key == "records" else value for key, value in loaded.data.items()},
+                         self.data)
+        return loaded
+    
+    def test_csv_and_xlsx_round_trip(self):
+        """Test that tabular formats restore the records, their types and the other entries."""
+        loaded = self.assert_round_trip(os.path.join(self.temp_dir, "run.csv"))
+        self.assertIsInstance(loaded.data["records"], sim_convert.RecordSource)
+        self.assertEqual(len(loaded.data["records"]), 2)
+        self.assert_round_trip(os.path.join(self.temp_dir, "run.xlsx"))
+        
+        # Scalar tables round-trip as lists
+        self.sim_data = SimulationData({"results": [1.5, 2.5]}, dict(self.metadata))
+        self.data = {"results": [1.5, 2.5]}
+        loaded = self.assert_round_trip(os.path.join(self.temp_dir, "results.csv"))
+        self.assertEqual(list(loaded.data["results"]), [1.5, 2.5])
+    
+    def test_nulls_and_empty_strings(self):
+        """Test that nulls, empty strings and mixed numbers survive the CSV and XLSX round trips."""
+        self.data = {"records": [{"iccid": "8927", "msisdn": None, "n": 1, "code": "\\N"},
+                                 {"iccid": "", "msisdn": "27", "n": 1.5, "code": None}]}
+        self.sim_data = SimulationData(self.data, dict(self.metadata))
+        for name in ("run.csv", "run.xlsx"):
+            loaded = self.assert_round_trip(os.path.join(self.temp_dir, name))
+            records = list(loaded.data["records"])
+            self.assertIsNone(records[0]["msisdn"])
+            self.assertEqual(records[1]["iccid"], "")
+            self.assertIsInstance(records[0]["n"], int)
+            self.assertIsInstance(records[1]["n"], float)
+            self.assertIsNone(records[1]["code"])
+        
+        # Streamed from CSV to XLSX, the records keep their null markers
+        csv_path = os.path.join(self.temp_dir, "run.csv")
+        xlsx_path = os.path.join(self.temp_dir, "streamed.xlsx")
+        sim_convert.convert_file(csv_path, xlsx_path)
+        self.assertEqual(list(sim_convert.FORMATS["xlsx"].read(xlsx_path)[1]["records"]), self.data["records"])
+    
+    def test_lazy_conversion(self):
+        """Test that convert_format streams a loaded table to the target format on save."""
+        csv_path = os.path.join(self.temp_dir, "run.csv")
+        self.assertTrue(self.sim_data.save_to_file(csv_path))
+        
+        loaded = SimulationData()
+        self.assertTrue(loaded.load_from_file(csv_path))
+        self.assertTrue(loaded.convert_format("xlsx"))
+        self.assertFalse(loaded.convert_format("xml"))
+        # Without an extension the file is written in the format set by convert_format
+        xlsx_path = os.path.join(self.temp_dir, "run")
+        self.assertTrue(loaded.save_to_file(xlsx_path))
+        metadata, data = sim_convert.FORMATS["xlsx"].read(xlsx_path)
+        self.assertEqual(metadata["format"], "xlsx")
+        self.assertEqual(list(data["records"]), self.data["records"])
+        
+        # Overwriting the source of the records reads them first
+        self.assertTrue(loaded.save_to_file(csv_path))
+        self.assertEqual(list(loaded.data["records"]), self.data["records"])
+    
+    def test_convert_file(self):
+        """Test converting files directly, including plain CSV files without a header file."""
+        plain_path = os.path.join(self.temp_dir, "plain.csv")
+        with open(plain_path, "w", encoding="utf-8") as f:
+            f.write("MSISDN,ICCID\n0821234567,89270000000000000003\n")
+        json_path = os.path.join(self.temp_dir, "plain.json")
+        sim_convert.convert_file(plain_path, json_path)
+        with open(json_path, "r", encoding="utf-8") as f:
+            document = json.load(f)
+        self.assertEqual(document["data"]["records"], [{"MSISDN": "0821234567", "ICCID": "89270000000000000003"}])
+        
+        with self.assertRaises(ValueError):
+            sim_convert.convert_file(plain_path, os.path.join(self.temp_dir, "plain.xml"))
+    
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_round_trip(self):
+        """Test that Parquet files restore the records and the other entries."""
+        self.assert_round_trip(os.path.join(self.temp_dir, "run.parquet"))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
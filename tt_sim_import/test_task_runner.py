@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the background task runner used by the GUI.
+"""
+
+import time
+import threading
+import unittest
+from task_runner import TaskRunner, check_cancelled
+
+class FakeRoot:
+    """Stand-in for tk.Tk that runs after() callbacks from a manual loop."""
+    
+    def __init__(self):
+        self.pending = []
+        
+    def after(self, delay, callback):
+        self.pending.append(callback)
+        
+    def run_until_idle(self, timeout=5.0):
+        deadline = time.time() + timeout
+        while self.pending and time.time() < deadline:
+            callback = self.pending.pop(0)
+            callback()
+            time.sleep(0.01)
+
+class FakeWidget:
+    """Stand-in for a Tk widget that records its configuration."""
+    
+    def __init__(self):
+        self.options = {}
+        
+    def config(self, **options):
+        self.options.update(options)
+
+class TestTaskRunner(unittest.TestCase):
+    """Test cases for TaskRunner."""
+    
+    def setUp(self):
+        """Create a runner with fake widgets."""
+        self.root = FakeRoot()
+        self.status = FakeWidget()
+        self.cancel_button = FakeWidget()
+        self.button = FakeWidget()
+        self.runner = TaskRunner(self.root, self.status, self.cancel_button, [self.button])
+        
+    def tearDown(self):
+        """Stop the executor."""
+        self.runner.shutdown()
+    
+    def test_success_and_progress(self):
+        """Test that progress and results are delivered on the polling thread."""
+        results = []
+        progress = []
+        
+        def work(report, cancel_event):
+            report("halfway")
+            return threading.get_ident()
+        
+        self.assertTrue(self.runner.submit(work, results.append, on_progress=progress.append))
+        self.assertEqual(self.button.options["state"], "disabled")
+        self.assertEqual(self.cancel_button.options["state"], "normal")
+        self.root.run_until_idle()
+        
+        self.assertEqual(progress, ["halfway"])
+        self.assertNotEqual(results, [threading.get_ident()])
+        self.assertEqual(len(results), 1)
+        self.assertFalse(self.runner.busy)
+        self.assertEqual(self.button.options["state"], "normal")
+    
+    def test_cancel(self):
+        """Test that a chunked operation stops at its next checkpoint."""
+        started = threading.Event()
+        cancelled = []
+        
+        def work(report, cancel_event):
+            started.set()
+            while True:
+                check_cancelled(cancel_event)
+                time.sleep(0.01)
+        
+        self.runner.submit(work, lambda result: None, on_cancel=lambda: cancelled.append(True))
+        self.assertFalse(self.runner.submit(work, lambda result: None))
+        started.wait(1)
+        self.runner.cancel()
+        self.root.run_until_idle()
+        self.assertEqual(cancelled, [True])
+    
+    def test_error(self):
+        """Test that exceptions are handed to the error callback."""
+        errors = []
+        
+        def work(report, cancel_event):
+            raise ValueError("broken file")
+        
+        self.runner.submit(work, lambda result: None, on_error=errors.append)
+        self.root.run_until_idle()
+        self.assertEqual(str(errors[0]), "broken file")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the bulk validation stage.
+"""
+
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from constants import PROVIDER_SPECS
+from provider_registry import registry, CompiledProvider
+from validation import (iccid_digits, luhn_valid, parse_ipv4, format_ipv4, validate_sims, ChunkValidator,
+                        describe_flags, ICCID_INVALID_LENGTH, ICCID_BAD_CHECK_DIGIT, ICCID_DUPLICATE,
+                        MSISDN_INVALID, MSISDN_DUPLICATE, IP_INVALID, IP_DUPLICATE,
+                        IP_PAIR_MISMATCH)
+
+def _luhn_reference(number):
+    """Plain Python Luhn check used as the reference implementation."""
+    total = 0
+    for index, digit in enumerate(int(c) for c in reversed(number)):
+        if index % 2:
+            digit = digit * 2 - 9 if digit > 4 else digit * 2
+        total += digit
+    return total % 10 == 0
+
+class TestLuhn(unittest.TestCase):
+    """Test cases for the vectorized Luhn check."""
+    
+    def test_matches_reference(self):
+        """Test random numbers of mixed lengths against the reference implementation."""
+        rng = np.random.default_rng(7)
+        numbers = ["".join(map(str, rng.integers(0, 10, length))) for length in rng.integers(1, 21, 500)]
+        digits, lengths = iccid_digits(pd.Series(numbers))
+        self.assertEqual(list(luhn_valid(digits, lengths)), [_luhn_reference(n) for n in numbers])
+    
+    def test_float_and_blank_cells(self):
+        """Test that float suffixes are ignored and blank cells never pass."""
+        digits, lengths = iccid_digits(pd.Series(["8927000000000000009.0", None, ""]))
+        self.assertEqual(list(lengths), [19, 0, 0])
+        self.assertEqual(list(luhn_valid(digits, lengths)), [_luhn_reference("8927000000000000009"), False, False])
+
+class TestParseIpv4(unittest.TestCase):
+    """Test cases for bulk IPv4 parsing."""
+    
+    def test_valid_and_invalid(self):
+        """Test well formed addresses and the common malformed ones."""
+        values = ["10.0.0.1", "255.255.255.255", " 10.1.2.3 ", "256.1.1.1", "1.2.3", "1.2.3.4.5",
+                  "1..2.3", "0001.1.1.1", "a.b.c.d", None]
+        addresses, valid = parse_ipv4(pd.Series(values))
+        self.assertEqual(list(valid), [True, True, True] + [False] * 7)
+        self.assertEqual(list(addresses[:3]), [0x0A000001, 0xFFFFFFFF, 0x0A010203])
+        self.assertFalse(addresses[3:].any())
+    
+    def test_round_trip(self):
+        """Test that formatting the parsed addresses gives the canonical text back."""
+        values = np.array(["10.200.3.4", "192.168.0.255", "0.0.0.0"])
+        addresses, _ = parse_ipv4(values)
+        self.assertEqual(list(format_ipv4(addresses)), list(values))
+
+class TestValidateSims(unittest.TestCase):
+    """Test cases for validate_sims."""
+    
+    def setUp(self):
+        self.sim_df = pd.DataFrame({
+            "Cell Number": ["0821234567", "821234567", "12345", "0831234567"],
+            "Sim Number": ["89270000000000000003", "89270000000000000003", "8927", "89270000000000000012"],
+            "IP Address1": ["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.300.4"]
+        })
+    
+    def test_flags(self):
+        """Test the per-row flags of each check."""
+        flags, summary = validate_sims(self.sim_df)
+        self.assertEqual(flags.dtype, np.uint16)
+        self.assertEqual(list(flags), [
+            ICCID_DUPLICATE | MSISDN_DUPLICATE,
+            ICCID_DUPLICATE | MSISDN_DUPLICATE,
+            ICCID_INVALID_LENGTH | MSISDN_INVALID,
+            ICCID_BAD_CHECK_DIGIT | IP_INVALID
+        ])
+        self.assertEqual(summary["rows"], 4)
+        self.assertEqual(summary["flagged_rows"], 4)
+        self.assertEqual(summary["iccid_duplicate"], 2)
+        self.assertEqual(describe_flags(flags[2]), ["iccid_invalid_length", "msisdn_invalid"])
+    
+    def test_ip_conflicts(self):
+        """Test that addresses shared by SIMs and identical MTN pairs are flagged."""
+        sim_df = pd.DataFrame({
+            "Cell Number": ["0821234567", "0821234568", "0821234569"],
+            "Sim Number": ["89270000000000000003", "89270000000000000011", "89270000000000000029"],
+            "IP Address1": ["10.0.0.1", "10.0.0.2", "10.0.0.3"],
+            "IP Address2": ["10.1.0.1", "10.0.0.1", "10.0.0.3"]
+        })
+        flags, summary = validate_sims(sim_df)
+        self.assertEqual(list(flags), [IP_DUPLICATE, IP_DUPLICATE, IP_PAIR_MISMATCH])
+        self.assertEqual((summary["ip_duplicate"], summary["ip_pair_mismatch"]), (2, 1))
+        
+        validator = ChunkValidator(provider="MTN")
+        validator.validate(sim_df.iloc[:1])
+        validator.validate(sim_df.iloc[1:])
+        self.assertEqual(validator.summary(), summary)
+    
+    def test_chunked_duplicates(self):
+        """Test that duplicates across chunks are counted in the chunked summary."""
+        validator = ChunkValidator()
+        validator.validate(self.sim_df.iloc[:1])
+        validator.validate(self.sim_df.iloc[1:])
+        self.assertEqual(validator.summary(), validate_sims(self.sim_df)[1])
+    
+    def test_chunked_duplicates_across_widths(self):
+        """Test that chunks padded to different widths find the same duplicates as the whole frame."""
+        sim_df = pd.DataFrame({
+            "Cell Number": ["0821234567", "+27 82 123 4567", "0821234568"],
+            "Sim Number": ["89270000000000000013", "8927 0000 0000 0000 0013", "8927000000000000001"],
+            "IP Address": ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+        })
+        flags, summary = validate_sims(sim_df)
+        self.assertEqual((summary["iccid_duplicate"], summary["msisdn_duplicate"]), (2, 2))
+        
+        validator = ChunkValidator()
+        for start in range(3):
+            validator.validate(sim_df.iloc[start:start + 1])
+        self.assertEqual(validator.summary(), summary)
+    
+    def test_provider_numbering(self):
+        """Test that cell numbers are checked with the numbering rules of the provider."""
+        spec = dict(PROVIDER_SPECS["Vodacom"], country_code="264", national_number_length=8)
+        sim_df = pd.DataFrame({
+            "Cell Number": ["081234567", "26481234568", "0821234567"],
+            "Sim Number": ["89270000000000000003", "89270000000000000011", "89270000000000000029"],
+            "IP Address": ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+        })
+        with mock.patch.dict(registry._providers, {"MTC": CompiledProvider("MTC", spec)}):
+            flags, summary = validate_sims(sim_df, provider="MTC")
+            validator = ChunkValidator(provider="MTC")
+            for start in range(3):
+                validator.validate(sim_df.iloc[start:start + 1])
+            self.assertEqual(validator.summary(), summary)
+        self.assertEqual(list(flags & MSISDN_INVALID), [0, 0, MSISDN_INVALID])
+        self.assertEqual(list(validate_sims(sim_df, provider="Vodacom")[0] & MSISDN_INVALID),
+                         [MSISDN_INVALID, MSISDN_INVALID, 0])
+    
+    def test_empty(self):
+        """Test an empty DataFrame."""
+        flags, summary = validate_sims(self.sim_df.iloc[:0])
+        self.assertEqual(len(flags), 0)
+        self.assertEqual(summary["flagged_rows"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
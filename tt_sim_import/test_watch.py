@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the watch-folder ingestion daemon.
+"""
+
+import os
+import sys
+import json
+import shutil
+import unittest
+import tempfile
+import threading
+import pandas as pd
+from watch import Debouncer, FolderWatcher, PollingWatcher, InotifyWatcher
+
+class FakeClock:
+    """Monotonic clock advanced by hand."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class TestWatch(unittest.TestCase):
+    """Test cases for the watch-folder daemon."""
+    
+    def setUp(self):
+        """Create an inbox and output directories."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.inbox = os.path.join(self.temp_dir, "inbox")
+        self.output_dir = os.path.join(self.temp_dir, "out")
+        self.error_dir = os.path.join(self.temp_dir, "errors")
+        os.makedirs(self.inbox)
+    
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_debounce(self):
+        """Test that files are only ready once they stop changing."""
+        clock = FakeClock()
+        debouncer = Debouncer(settle_seconds=2.0, clock=clock)
+        path = os.path.join(self.inbox, "vodacom.xlsx")
+        with open(path, "wb") as f:
+            f.write(b"partial")
+        
+        debouncer.add([path, os.path.join(self.inbox, "gone.xlsx")])
+        self.assertEqual(debouncer.ready(), [])
+        self.assertEqual(len(debouncer), 1)
+        
+        # Still being written
+        clock.now = 1.5
+        with open(path, "ab") as f:
+            f.write(b" more")
+        self.assertEqual(debouncer.ready(), [])
+        clock.now = 3.0
+        self.assertEqual(debouncer.ready(), [])
+        clock.now = 3.6
+        self.assertEqual(debouncer.ready(), [path])
+        self.assertEqual(len(debouncer), 0)
+    
+    def test_watchers(self):
+        """Test that the watchers report new workbooks and skip lock files."""
+        watchers = [PollingWatcher(self.inbox)]
+        if sys.platform.startswith("linux"):
+            watchers.append(InotifyWatcher(self.inbox))
+        for name in ("~$vodacom.xlsx", "notes.txt", "vodacom.xlsx"):
+            with open(os.path.join(self.inbox, name), "wb") as f:
+                f.write(b"data")
+        for watcher in watchers:
+            self.assertEqual(watcher.wait(0.1), [os.path.join(self.inbox, "vodacom.xlsx")])
+            watcher.close()
+    
+    def test_folder_watcher(self):
+        """Test that workbooks dropped in the inbox are converted and failures set aside."""
+        pd.DataFrame({
+            "MSISDN": ["821234567", "831234567"],
+            "ICCID": ["8927000000000000001", "8927000000000000002"],
+            "IP Address": ["10.0.0.1", "10.0.0.2"]
+        }).to_excel(os.path.join(self.inbox, "vodacom.xlsx"), index=False)
+        pd.DataFrame({"Unrelated": [1]}).to_excel(os.path.join(self.inbox, "broken.xlsx"), index=False)
+        
+        results = []
+        
+        def report(result):
+            results.append(result)
+            if len(results) == 2:
+                watcher.stop()
+        
+        watcher = FolderWatcher(self.inbox, self.output_dir, self.error_dir, max_workers=1, settle_seconds=0.1,
+                                poll_interval=0.05, use_inotify=False, progress=report)
+        thread = threading.Thread(target=watcher.run)
+        thread.start()
+        thread.join(60)
+        self.assertFalse(thread.is_alive())
+        
+        self.assertEqual((watcher.converted, watcher.failed), (1, 1))
+        self.assertEqual(os.listdir(self.inbox), ["processed"])
+        self.assertEqual(os.listdir(os.path.join(self.inbox, "processed")), ["vodacom.xlsx"])
+        exported = pd.read_csv(os.path.join(self.output_dir, "vodacom_techtool.csv"), dtype=str)
+        self.assertEqual(list(exported["Cell Number"]), ["27821234567", "27831234567"])
+        
+        self.assertEqual(sorted(os.listdir(self.error_dir)), ["broken.error.json", "broken.xlsx"])
+        with open(os.path.join(self.error_dir, "broken.error.json"), "r", encoding="utf-8") as f:
+            self.assertTrue(json.load(f)["error"])
+
+if __name__ == "__main__":
+    unittest.main()
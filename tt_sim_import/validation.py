@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Bulk validation of imported SIM data before it is exported to Techtool.
+
+All checks are vectorized over the resolved DataFrame: a Luhn check on
+ICCIDs, a length/prefix check on cell numbers, IPv4 parsing into uint32
+and hash-based duplicate detection. The IP columns also go through the
+provider's subnet and pair rules, and addresses shared between SIMs are
+found across the whole dataset (see ip_engine). The result is a compact
+per-row error bitmask plus a summary of the number of rows failing each check.
+"""
+
+import numpy as np
+import pandas as pd
+import metrics
+from normalise import normalise_msisdn, _as_text_matrix, _strip_float_suffix, _compact_digits, _ZERO
+from ip_engine import parse_ipv4, format_ipv4, shared_addresses, IpRules
+from provider_registry import registry
+
+# Per-row error flags, combined into a uint16 bitmask
+ICCID_INVALID_LENGTH = 1
+ICCID_BAD_CHECK_DIGIT = 2
+ICCID_DUPLICATE = 4
+MSISDN_INVALID = 8
+MSISDN_DUPLICATE = 16
+IP_INVALID = 32
+IP_OUTSIDE_SUBNET = 64
+IP_DUPLICATE = 128
+IP_PAIR_MISMATCH = 256
+
+FLAG_DTYPE = np.uint16
+
+FLAG_NAMES = {
+    ICCID_INVALID_LENGTH: "iccid_invalid_length",
+    ICCID_BAD_CHECK_DIGIT: "iccid_bad_check_digit",
+    ICCID_DUPLICATE: "iccid_duplicate",
+    MSISDN_INVALID: "msisdn_invalid",
+    MSISDN_DUPLICATE: "msisdn_duplicate",
+    IP_INVALID: "ip_invalid",
+    IP_OUTSIDE_SUBNET: "ip_outside_subnet",
+    IP_DUPLICATE: "ip_duplicate",
+    IP_PAIR_MISMATCH: "ip_pair_mismatch"
+}
+
+# Accepted ICCID lengths (ITU-T E.118: up to 19 digits plus the check digit)
+ICCID_MIN_LENGTH = 19
+ICCID_MAX_LENGTH = 20
+
+def iccid_digits(values):
+    """Extract the digits of ICCID values.
+    
+    Returns:
+        tuple: (left aligned digit code matrix, number of digits per row)
+    """
+    return _compact_digits(_strip_float_suffix(_as_text_matrix(values)))
+
+def luhn_valid(digits, lengths):
+    """Vectorized Luhn check over a left aligned digit code matrix.
+    
+    Args:
+        digits (np.ndarray): (rows, width) matrix of digit character codes
+        lengths (np.ndarray): Number of digits in each row
+        
+    Returns:
+        np.ndarray: True where the check digit is valid
+    """
+    width = digits.shape[1]
+    if width == 0:
+        return np.zeros(len(lengths), dtype=bool)
+    
+    lengths = lengths.astype(np.int32)
+    total = np.zeros(len(lengths), dtype=np.int32)
+    
+    # One contiguous int8 row per digit position (digit codes fit in a byte), counted from the
+    # right with the check digit at 0. Doubled digits above 9 have 9 subtracted.
+    for position, position_codes in enumerate(digits.T.astype(np.int8)):
+        from_right = lengths - 1 - position
+        values = np.where(from_right >= 0, position_codes - np.int8(_ZERO), np.int8(0))
+        doubled = (from_right & 1).astype(bool)
+        total += values + doubled * (values - 9 * (values > 4))
+    return (total % 10 == 0) & (lengths > 0)
+
+def matrix_hashes(codes):
+    """Hash the rows of a character code matrix to uint64 (FNV-1a over the columns).
+    
+    Zero codes (the padding of the shorter rows) are skipped, so a value hashes
+    the same whatever the width of the matrix it is part of. Chunks and files
+    padded to different widths can therefore be compared by hash.
+    
+    Args:
+        codes (np.ndarray): (rows, width) matrix of character codes, padded with zeros
+        
+    Returns:
+        np.ndarray: uint64 hash per row
+    """
+    hashes = np.full(codes.shape[0], 14695981039346656037, dtype=np.uint64)
+    prime = np.uint64(1099511628211)
+    with np.errstate(over="ignore"):
+        for position in range(codes.shape[1]):
+            position_codes = codes[:, position]
+            mixed = (hashes ^ position_codes.astype(np.uint64)) * prime
+            hashes = np.where(position_codes != 0, mixed, hashes)
+    return hashes
+
+def duplicated_mask(hashes, blank):
+    """Return True for every (non-blank) row whose key hash occurs more than once.
+    
+    Args:
+        hashes (np.ndarray): uint64 key hash per row
+        blank (np.ndarray): True for rows without a key, these are never duplicates
+    """
+    return pd.Series(hashes).duplicated(keep=False).to_numpy() & ~blank
+
+def provider_rules(provider=None, columns=()):
+    """Return the compiled provider whose numbering and IP rules apply.
+    
+    Args:
+        provider (str, optional): Provider name. Inferred from the columns if not given.
+        columns (iterable, optional): Standard columns of the data
+        
+    Returns:
+        CompiledProvider: The provider, or None if it is unknown
+    """
+    try:
+        return registry.get(provider) if provider else registry.for_columns(columns)
+    except ValueError:
+        return None
+
+def ip_rules_for(provider=None, columns=()):
+    """Return the IP rules of a provider, or empty rules if the provider is unknown (see provider_rules)."""
+    compiled = provider_rules(provider, columns)
+    return compiled.ip_rules if compiled is not None else IpRules()
+
+def _check_rows(sim_df, ip_columns=None, compiled=None):
+    """Run the row level checks and compute the duplicate keys.
+    
+    Cell numbers are checked with the numbering rules and IP addresses with
+    the IP rules of the compiled provider, or with the defaults without one.
+    
+    Returns:
+        tuple: (uint16 flags without the duplicate bits, ICCID key hashes, blank ICCIDs,
+                MSISDN key hashes, blank MSISDNs, (rows, IP columns) uint32 addresses,
+                matching valid bools)
+    """
+    count = len(sim_df)
+    flags = np.zeros(count, dtype=FLAG_DTYPE)
+    if ip_columns is None:
+        ip_columns = [col for col in sim_df.columns if str(col).startswith("IP Address")]
+    if not count:
+        empty = np.zeros(0, dtype=np.uint64)
+        return (flags, empty, np.zeros(0, dtype=bool), empty, np.zeros(0, dtype=bool),
+                np.zeros((0, len(ip_columns)), dtype=np.uint32), np.zeros((0, len(ip_columns)), dtype=bool))
+    
+    # ICCID: length and Luhn check digit on the extracted digits
+    digits, lengths = iccid_digits(sim_df["Sim Number"])
+    bad_length = (lengths < ICCID_MIN_LENGTH) | (lengths > ICCID_MAX_LENGTH)
+    flags[bad_length] |= ICCID_INVALID_LENGTH
+    flags[~bad_length & ~luhn_valid(digits, lengths)] |= ICCID_BAD_CHECK_DIGIT
+    
+    # MSISDN: canonical form with a valid length and prefix
+    numbering = (compiled.country_code, compiled.national_number_length) if compiled is not None else ()
+    cell_numbers, msisdn_valid = normalise_msisdn(sim_df["Cell Number"], *numbering)
+    flags[~msisdn_valid] |= MSISDN_INVALID
+    cell_codes = _as_text_matrix(cell_numbers)
+    
+    # IPs: every IP column must hold a valid IPv4 address within the provider's subnets
+    addresses = np.zeros((count, len(ip_columns)), dtype=np.uint32)
+    ip_valid = np.zeros((count, len(ip_columns)), dtype=bool)
+    for position, column in enumerate(ip_columns):
+        addresses[:, position], ip_valid[:, position] = parse_ipv4(sim_df[column])
+    flags[~ip_valid.all(axis=1)] |= IP_INVALID
+    ip_rules = compiled.ip_rules if compiled is not None else IpRules()
+    outside, mismatch = ip_rules.check(
+        {column: (addresses[:, position], ip_valid[:, position]) for position, column in enumerate(ip_columns)})
+    flags[outside] |= IP_OUTSIDE_SUBNET
+    flags[mismatch] |= IP_PAIR_MISMATCH
+    
+    return (flags, matrix_hashes(digits), lengths == 0, matrix_hashes(cell_codes), cell_codes[:, 0] == 0,
+            addresses, ip_valid)
+
+def _flag_duplicates(flags, iccid_hashes, iccid_blank, msisdn_hashes, msisdn_blank, addresses, ip_valid):
+    """Set the duplicate bits from the keys of every row."""
+    flags[duplicated_mask(iccid_hashes, iccid_blank)] |= ICCID_DUPLICATE
+    flags[duplicated_mask(msisdn_hashes, msisdn_blank)] |= MSISDN_DUPLICATE
+    flags[shared_addresses(addresses, ip_valid)] |= IP_DUPLICATE
+
+def validate_sims(sim_df, ip_columns=None, provider=None):
+    """Run all checks over a standardised SIM DataFrame.
+    
+    Args:
+        sim_df (pd.DataFrame): DataFrame with the standard Cell/Sim/IP columns
+        ip_columns (list, optional): IP columns to check. Defaults to all "IP Address*" columns.
+        provider (str, optional): Provider whose numbering and IP rules apply. Inferred from the columns
+                                  if not given.
+        
+    Returns:
+        tuple: (np.ndarray of uint16 flags per row, dict summary with the number of
+                rows failing each check, "rows" and "flagged_rows")
+    """
+    with metrics.span("validate_rows", rows=len(sim_df)):
+        checked = _check_rows(sim_df, ip_columns, provider_rules(provider, sim_df.columns))
+        _flag_duplicates(*checked)
+    return checked[0], summarise_flags(checked[0])
+
+class ChunkValidator:
+    """
+    Validates a file chunk by chunk, as read by the streaming reader.
+    
+    Row level checks are flagged per chunk. Duplicates can only be known once
+    every chunk has been seen, so the key hashes (8 bytes per row and key) and
+    the IP addresses (4 bytes per row and IP column) are kept and duplicates
+    are counted in the final summary.
+    """
+    
+    def __init__(self, ip_columns=None, provider=None):
+        """
+        Args:
+            ip_columns (list, optional): IP columns to check. Defaults to all "IP Address*" columns.
+            provider (str, optional): Provider whose numbering and IP rules apply. Inferred from the first
+                                      chunk if not given.
+        """
+        self.ip_columns = ip_columns
+        self.provider = provider
+        self._compiled = None
+        self._resolved = False
+        self._flags = []
+        self._keys = []
+        
+    def validate(self, sim_df):
+        """Check a chunk and return its flags, without the duplicate bits."""
+        if not self._resolved:
+            self._compiled = provider_rules(self.provider, sim_df.columns)
+            self._resolved = True
+        with metrics.span("validate_rows", rows=len(sim_df)):
+            flags, *keys = _check_rows(sim_df, self.ip_columns, self._compiled)
+        self._flags.append(flags)
+        self._keys.append(keys)
+        return flags
+    
+    def summary(self):
+        """Return the summary over all chunks, including duplicates across chunks."""
+        flags = np.concatenate(self._flags) if self._flags else np.zeros(0, dtype=FLAG_DTYPE)
+        if self._keys:
+            _flag_duplicates(flags, *(np.concatenate(part) for part in zip(*self._keys)))
+        return summarise_flags(flags)
+
+def summarise_flags(flags):
+    """Count the rows failing each check.
+    
+    Args:
+        flags (np.ndarray): uint16 flags per row
+        
+    Returns:
+        dict: Check name -> row count, plus "rows" and "flagged_rows"
+    """
+    summary = {"rows": int(len(flags)), "flagged_rows": int(np.count_nonzero(flags))}
+    for flag, name in FLAG_NAMES.items():
+        summary[name] = int(np.count_nonzero(flags & flag))
+    return summary
+
+def describe_flags(flag):
+    """Return the check names set in a single row's flags."""
+    return [name for bit, name in FLAG_NAMES.items() if int(flag) & bit]
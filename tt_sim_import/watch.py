@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Watch-folder ingestion: convert supplier workbooks as they are dropped in an inbox.
+
+The inbox is monitored with inotify on Linux (through ctypes, no extra
+package) and by polling the directory elsewhere. A new file is only picked
+up once its size and modification time have stopped changing, so workbooks
+that are still being copied are not read half written. Ready files are fed
+to a process pool running batch.convert_file, the same import, validation
+and export as the batch converter and the GUI. At most max_pending files
+are in flight; the rest wait in the inbox as paths, so a burst of hundreds
+of deliveries never holds more than max_pending workbooks in memory.
+
+Converted inputs are moved to the processed directory and the exports
+written to the output directory. Inputs that fail are moved to the error
+directory next to a <name>.error.json file holding the conversion result.
+"""
+
+import os
+import json
+import time
+import select
+import signal
+import struct
+import shutil
+import threading
+import collections
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from batch import convert_file, is_input_file, output_path_for
+from export_stream import compressed_path
+from excel_stream import DEFAULT_CHUNK_SIZE
+import metrics
+
+# Seconds a file's size and modification time must stay unchanged before it is converted
+DEFAULT_SETTLE_SECONDS = 2.0
+
+# Seconds between scans of the polling watcher, and the longest wait of the inotify watcher
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Sub-directory of the inbox receiving the converted inputs by default
+PROCESSED_DIRNAME = "processed"
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# Header of an inotify event: wd, mask, cookie, name length
+_EVENT_HEADER = struct.Struct("iIII")
+
+class PollingWatcher:
+    """Report the inbox files by scanning the directory at a fixed interval."""
+    
+    def __init__(self, inbox):
+        self.inbox = inbox
+    
+    def scan(self):
+        """Return the paths of the input files currently in the inbox."""
+        return [os.path.join(self.inbox, name) for name in sorted(os.listdir(self.inbox))
+                if is_input_file(name) and os.path.isfile(os.path.join(self.inbox, name))]
+    
+    def wait(self, timeout):
+        """Wait up to timeout seconds and return the paths that may have changed."""
+        time.sleep(timeout)
+        return self.scan()
+    
+    def close(self):
+        pass
+
+class InotifyWatcher(PollingWatcher):
+    """Report the inbox files named by inotify events (Linux only).
+    
+    Raises:
+        OSError: If inotify is not available
+    """
+    
+    def __init__(self, inbox):
+        super().__init__(inbox)
+        import ctypes
+        import ctypes.util
+        
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(inbox), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, os.strerror(errno), inbox)
+    
+    def wait(self, timeout):
+        """Wait up to timeout seconds for events and return the paths they name."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        
+        names = set()
+        offset = 0
+        while offset < len(buffer):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, fall back to a full scan
+                return self.scan()
+            if name and is_input_file(name):
+                names.add(name)
+        return [os.path.join(self.inbox, name) for name in sorted(names)]
+    
+    def close(self):
+        os.close(self._fd)
+
+def create_watcher(inbox, use_inotify=None):
+    """Create the inotify watcher where available, or the polling watcher.
+    
+    Args:
+        inbox (str): Directory to watch
+        use_inotify (bool, optional): Force (True) or disable (False) inotify. Defaults to trying it.
+    """
+    if use_inotify is not False:
+        try:
+            return InotifyWatcher(inbox)
+        except (OSError, AttributeError):
+            if use_inotify:
+                raise
+    return PollingWatcher(inbox)
+
+class Debouncer:
+    """Hold back files until they have stopped changing.
+    
+    Args:
+        settle_seconds (float): Seconds a file's size and modification time must stay unchanged
+        clock (callable, optional): Monotonic clock, replaceable in tests
+    """
+    
+    def __init__(self, settle_seconds=DEFAULT_SETTLE_SECONDS, clock=time.monotonic):
+        self.settle_seconds = settle_seconds
+        self.clock = clock
+        # Path -> (size, mtime_ns, time the signature was first seen)
+        self._pending = {}
+    
+    def __len__(self):
+        return len(self._pending)
+    
+    def add(self, paths):
+        """Start (or keep) tracking paths reported by a watcher."""
+        for path in paths:
+            self._pending.setdefault(path, None)
+    
+    def ready(self):
+        """Return the tracked paths that have settled, and stop tracking them."""
+        now = self.clock()
+        settled = []
+        for path, state in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Removed or renamed before it settled
+                del self._pending[path]
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if state is None or state[:2] != signature:
+                self._pending[path] = signature + (now,)
+            elif now - state[2] >= self.settle_seconds:
+                del self._pending[path]
+                settled.append(path)
+        return sorted(settled)
+
+def _ignore_interrupts():
+    """Leave Ctrl+C to the watcher, which lets the conversions in flight finish."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _move(path, directory):
+    """Move a file into a directory, never overwriting a file already there."""
+    os.makedirs(directory, exist_ok=True)
+    stem, extension = os.path.splitext(os.path.basename(path))
+    target = os.path.join(directory, stem + extension)
+    copy = 1
+    while os.path.exists(target):
+        target = os.path.join(directory, f"{stem} ({copy}){extension}")
+        copy += 1
+    shutil.move(path, target)
+    return target
+
+class FolderWatcher:
+    """Convert the workbooks dropped in an inbox directory, until stopped.
+    
+    Usage:
+        watcher = FolderWatcher(inbox, output_dir, error_dir, progress=print)
+        watcher.run()  # until watcher.stop() or KeyboardInterrupt
+    
+    Args:
+        inbox (str): Directory receiving the supplier workbooks
+        output_dir (str): Directory to write the exports to
+        error_dir (str): Directory receiving the inputs that failed, with their error reports
+        processed_dir (str, optional): Directory receiving the converted inputs. Defaults to inbox/processed.
+        provider (str, optional): The provider name. Inferred per file if not given.
+        output_format (str, optional): 'csv', 'ndjson', 'parquet' or 'arrow'. Defaults to 'csv'.
+        max_workers (int, optional): Size of the process pool. Defaults to the CPU count.
+        max_pending (int, optional): Files converted or queued in the pool at once. Defaults to max_workers.
+        settle_seconds (float, optional): Seconds a new file must stay unchanged before it is converted
+        poll_interval (float, optional): Seconds between checks of the inbox and the workers
+        use_inotify (bool, optional): Force (True) or disable (False) inotify. Defaults to trying it.
+        progress (callable, optional): Called with each conversion result (see batch.convert_file)
+        stream (bool, optional): Read and write in bounded-memory chunks. Defaults to False.
+        chunk_size (int, optional): Rows per chunk when streaming
+        all_sheets (bool, optional): Convert every sheet with SIM columns instead of the first sheet
+        compression (str, optional): Compress the outputs with "gzip" or "zstd"
+    """
+    
+    def __init__(self, inbox, output_dir, error_dir, processed_dir=None, provider=None, output_format="csv",
+                 max_workers=None, max_pending=None, settle_seconds=DEFAULT_SETTLE_SECONDS,
+                 poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=None, progress=None, stream=False,
+                 chunk_size=DEFAULT_CHUNK_SIZE, all_sheets=False, compression=None):
+        if not os.path.isdir(inbox):
+            raise FileNotFoundError(f"Inbox directory not found: {inbox}")
+        self.inbox = inbox
+        self.output_dir = output_dir
+        self.error_dir = error_dir
+        self.processed_dir = processed_dir or os.path.join(inbox, PROCESSED_DIRNAME)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max(max_pending or self.max_workers, 1)
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.progress = progress
+        self.output_format = output_format
+        self.compression = compression
+        # Files are converted in parallel, so each spreads its sheets over a single process
+        self.convert_options = {"provider": provider, "output_format": output_format, "stream": stream,
+                                "chunk_size": chunk_size, "all_sheets": all_sheets, "sheet_workers": 1,
+                                "compression": compression}
+        self.debouncer = Debouncer(settle_seconds)
+        self.converted = 0
+        self.failed = 0
+        self._ready = collections.deque()
+        self._in_flight = {}
+        self._stop = threading.Event()
+        
+        for directory in (output_dir, error_dir, self.processed_dir):
+            os.makedirs(directory, exist_ok=True)
+    
+    @property
+    def backlog(self):
+        """Number of inbox files not yet handed to the pool (settling or waiting for a worker)."""
+        return len(self.debouncer) + len(self._ready)
+    
+    def stop(self):
+        """Ask run() to return once the files in flight are finished."""
+        self._stop.set()
+    
+    def run(self):
+        """Watch the inbox and convert its files until stop() is called.
+        
+        Files already in the inbox when the watch starts are converted too.
+        Ctrl+C stops the watch like stop() does.
+        """
+        watcher = create_watcher(self.inbox, self.use_inotify)
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_ignore_interrupts) as executor:
+                self.debouncer.add(watcher.scan())
+                while not self._stop.is_set():
+                    try:
+                        self.step(executor, watcher)
+                    except KeyboardInterrupt:
+                        self.stop()
+                self._collect(wait(self._in_flight).done)
+        finally:
+            watcher.close()
+    
+    def step(self, executor, watcher):
+        """Take in changes, collect finished conversions and submit ready files."""
+        # Settling files are re-checked even if no further event arrives for them
+        timeout = min(self.poll_interval, self.debouncer.settle_seconds) if self.backlog else self.poll_interval
+        self.debouncer.add(watcher.wait(timeout))
+        
+        if self._in_flight:
+            self._collect(wait(self._in_flight, timeout=0, return_when=FIRST_COMPLETED).done)
+        
+        queued = set(self._ready) | set(self._in_flight.values())
+        self._ready.extend(path for path in self.debouncer.ready() if path not in queued)
+        while self._ready and len(self._in_flight) < self.max_pending:
+            path = self._ready.popleft()
+            if os.path.exists(path):
+                future = executor.submit(convert_file, path, self.output_dir, **self.convert_options)
+                self._in_flight[future] = path
+    
+    def _collect(self, futures):
+        """Move the inputs of finished conversions and report their results."""
+        for future in futures:
+            path = self._in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker process itself died
+                result = {"file": path, "provider": None, "rows": 0, "output": None, "error": str(e)}
+            self._finish(path, result)
+    
+    def _finish(self, path, result):
+        """Move a converted input to the processed or error directory."""
+        if result["error"]:
+            self.failed += 1
+            partial = compressed_path(output_path_for(path, self.output_dir, self.output_format), self.compression)
+            if os.path.exists(partial):
+                os.remove(partial)
+            moved = _move(path, self.error_dir)
+            with open(os.path.splitext(moved)[0] + ".error.json", "w", encoding="utf-8") as f:
+                json.dump(dict(result, file=moved), f, indent=2)
+        else:
+            self.converted += 1
+            moved = _move(path, self.processed_dir)
+        metrics.report_run("convert", result.get("metrics"), result.get("seconds", 0.0), file=os.path.basename(path),
+                           provider=result["provider"], error=result["error"])
+        if self.progress:
+            self.progress(dict(result, file=moved))